@@ -0,0 +1,10 @@
+"""Standalone performance scripts; nothing here is imported by the bot
+
+Run them as modules from the repository root so the bot's packages are
+importable, e.g.:
+
+    python -m benchmarks.group_commit --mutations 500
+    python -m benchmarks.automod_traffic --messages 500000 --users 200000
+
+Each script's --help lists its options.
+"""
@@ -0,0 +1,108 @@
+"""
+Exercise AudioCache against local media files generated with ffmpeg.
+
+Fills the cache with short tones until it has to evict, replays them,
+and checks the invariants: repeat plays are served from disk, the cache
+and its partial downloads stay within max_bytes, tracks of unknown
+length are never recorded, copies that outgrow their size cap are
+dropped, and a missing ffmpeg binary only logs. Exits 1 if any check
+fails.
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from utils.audio_cache import AudioCache
+
+def make_tone(ffmpeg, path, seconds, frequency, codec):
+    subprocess.run(
+        [ffmpeg, '-nostdin', '-loglevel', 'error', '-y', '-f', 'lavfi',
+         '-i', f"sine=frequency={frequency}:duration={seconds}", '-c:a', codec, path],
+        check=True
+    )
+
+def cached_bytes(cache):
+    return sum(
+        os.path.getsize(os.path.join(cache.directory, name))
+        for name in os.listdir(cache.directory) if name != 'index.json'
+    )
+
+async def run(args, workdir):
+    problems = []
+    media = []
+    for index in range(args.tracks):
+        path = os.path.join(workdir, f"tone{index}.ogg")
+        make_tone(args.ffmpeg, path, args.seconds, 220 + index * 20, 'libopus')
+        media.append(path)
+    track_bytes = os.path.getsize(media[0])
+    budget = int(track_bytes * args.tracks / 2)
+
+    cache = AudioCache(os.path.join(workdir, 'cache'), budget, ffmpeg=args.ffmpeg)
+    start = time.perf_counter()
+    for path in media:
+        if cache.lookup(path):
+            problems.append(f"{path} was cached before its first play")
+        task = cache.fill(path, path, args.seconds)
+        if task is None:
+            problems.append(f"{path} was not downloaded")
+        else:
+            await task
+        if cache.total_bytes > budget or cached_bytes(cache) > budget:
+            problems.append("the cache grew past max_bytes")
+    fill_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    served = [cache.lookup(path) for path in media]
+    lookup_time = time.perf_counter() - start
+    recent = media[-(len(cache)):]
+    if not all(served[-len(recent):]) or any(path and not os.path.exists(path) for path in served):
+        problems.append("recently played tracks were not served from disk")
+    if cache.evictions == 0:
+        problems.append("the budget never forced an eviction")
+
+    # Livestreams report no duration and must not be recorded
+    if cache.fill('live', media[0], None) is not None:
+        problems.append("a track of unknown duration was recorded")
+
+    # Uncompressed audio outgrows the size cap derived from its duration
+    wav = os.path.join(workdir, 'large.wav')
+    make_tone(args.ffmpeg, wav, args.seconds, 440, 'pcm_s16le')
+    task = cache.fill('large', wav, args.seconds)
+    if task is not None:
+        await task
+    if 'large' in cache or any(name.endswith('.part') for name in os.listdir(cache.directory)):
+        problems.append("a copy larger than its size cap was kept")
+    await cache.close()
+
+    missing = AudioCache(os.path.join(workdir, 'missing'), budget, ffmpeg=os.path.join(workdir, 'no-ffmpeg'))
+    task = missing.fill(media[0], media[0], args.seconds)
+    if task is None or await task is not None or len(missing):
+        problems.append("a missing ffmpeg was not handled")
+    await missing.close()
+
+    stats = cache.stats()
+    print(
+        f"{args.tracks} tracks of {track_bytes} bytes, budget {budget} | "
+        f"filled in {fill_time:.2f}s | {len(media)} lookups in {lookup_time * 1e6:.0f}us | "
+        f"{stats['entries']} cached, {stats['evictions']} evicted, hit rate {stats['hit_rate']:.0%}"
+    )
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    return not problems
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tracks', type=int, default=8)
+    parser.add_argument('--seconds', type=int, default=5)
+    parser.add_argument('--ffmpeg', default='ffmpeg')
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as workdir:
+        ok = asyncio.run(run(args, workdir))
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
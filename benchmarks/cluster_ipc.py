@@ -0,0 +1,105 @@
+"""
+Exercise cluster IPC locally with fake shards and guilds.
+
+Spawns one process per cluster, each owning a shard range and serving
+ClusterNode requests for the fake guilds those shards would hold. The
+coordinator (cluster 0) then broadcasts the /servers summary and a fake
+global action the way the owner cog does, checks every guild is counted
+exactly once, and reports round-trip latency. No Discord token needed.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import secrets
+import statistics
+import time
+
+from utils.cluster import ClusterNode, shard_for_guild, shard_ranges
+
+ACTION_LATENCY = 0.001  # simulated REST call per guild
+
+def fake_guilds(count, shard_count, shard_ids):
+    """Deterministic snowflake-like guild IDs that land on the given shards"""
+    shards = set(shard_ids)
+    guild_ids = ((1000 + i) << 22 | i for i in range(count))
+    return [guild_id for guild_id in guild_ids if shard_for_guild(guild_id, shard_count) in shards]
+
+def make_node(cluster_id, ranges, shard_count, guild_count, secret):
+    node = ClusterNode(cluster_id, len(ranges), ranges[cluster_id], shard_count, secret=secret)
+    guilds = fake_guilds(guild_count, shard_count, ranges[cluster_id])
+
+    async def guild_summary(data):
+        return [{'id': guild_id, 'name': f"guild-{guild_id}", 'member_count': 10} for guild_id in guilds]
+
+    async def global_action(data):
+        await asyncio.sleep(ACTION_LATENCY * len(guilds))
+        return {'succeeded': [f"guild-{guild_id}" for guild_id in guilds], 'failed': [], 'total': len(guilds)}
+
+    node.register('guild_summary', guild_summary)
+    node.register('global_action', global_action)
+    return node
+
+def serve(cluster_id, ranges, shard_count, guild_count, secret):
+    async def main():
+        node = make_node(cluster_id, ranges, shard_count, guild_count, secret)
+        await node.start()
+        await asyncio.Event().wait()
+    asyncio.run(main())
+
+async def wait_for_clusters(node, attempts=50):
+    for _ in range(attempts):
+        results = await node.broadcast('guild_summary', timeout=1)
+        if not any(isinstance(result, BaseException) for result in results.values()):
+            return
+        await asyncio.sleep(0.1)
+    raise RuntimeError("Clusters did not come up")
+
+async def coordinate(ranges, shard_count, guild_count, secret, rounds):
+    node = make_node(0, ranges, shard_count, guild_count, secret)
+    await node.start()
+    await wait_for_clusters(node)
+
+    summary = await node.broadcast('guild_summary')
+    seen = [guild['id'] for guilds in summary.values() for guild in guilds]
+    assert len(seen) == len(set(seen)) == guild_count, (len(seen), len(set(seen)), guild_count)
+    for guild_id in seen[:100]:
+        assert node.cluster_for_guild(guild_id) in summary
+
+    for op, data in (('guild_summary', None), ('global_action', {'action': 'ban', 'user_id': 1, 'reason': 'test'})):
+        timings = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            results = await node.broadcast(op, data, timeout=60)
+            timings.append(time.perf_counter() - start)
+        assert not any(isinstance(result, BaseException) for result in results.values())
+        print(f"{op:<14} median {statistics.median(timings) * 1000:7.1f}ms   max {max(timings) * 1000:7.1f}ms")
+
+    print(f"{guild_count} guilds over {shard_count} shards in {len(ranges)} clusters: "
+          + ", ".join(f"cluster {cluster_id} {len(guilds)}" for cluster_id, guilds in summary.items()))
+    await node.close()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--shards', type=int, default=8)
+    parser.add_argument('--clusters', type=int, default=3)
+    parser.add_argument('--guilds', type=int, default=5000)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    ranges = shard_ranges(args.shards, args.clusters)
+    secret = secrets.token_hex(16)
+    context = multiprocessing.get_context('spawn')
+    workers = [
+        context.Process(target=serve, args=(cluster_id, ranges, args.shards, args.guilds, secret), daemon=True)
+        for cluster_id in range(1, len(ranges))
+    ]
+    for worker in workers:
+        worker.start()
+    try:
+        asyncio.run(coordinate(ranges, args.shards, args.guilds, secret, args.rounds))
+    finally:
+        for worker in workers:
+            worker.terminate()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Drive FanOut against a fake HTTP client that answers with 429s.
+
+The fake client enforces a small per-route bucket and, now and then, a
+global limit, replying the way Discord does (status 429 with
+Retry-After and X-RateLimit-Global headers). It records any request that
+arrives while its route or the whole client is still blocked. The run
+fails if a request broke a limit, a target was lost, or the pace went
+over the requests-per-second budget.
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+
+from utils.fanout import FanOut
+
+class FakeResponse:
+    def __init__(self, headers):
+        self.headers = headers
+
+class FakeRateLimit(Exception):
+    """Shaped like discord.HTTPException for a 429"""
+
+    def __init__(self, retry_after, is_global):
+        super().__init__(f"429 Too Many Requests (retry after {retry_after}s)")
+        self.status = 429
+        self.response = FakeResponse({
+            'Retry-After': str(retry_after),
+            'X-RateLimit-Global': 'true' if is_global else 'false'
+        })
+
+class FakeHTTPClient:
+    """Per-route buckets of `bucket_size` requests per `bucket_window` seconds"""
+
+    def __init__(self, bucket_size, bucket_window, global_chance, seed):
+        self.bucket_size = bucket_size
+        self.bucket_window = bucket_window
+        self.global_chance = global_chance
+        self.rng = random.Random(seed)
+        self.buckets = {}  # route -> (window start, requests in window)
+        self.route_blocked = {}  # route -> time a 429 told callers to wait until
+        self.global_blocked = 0.0
+        self.requests = 0
+        self.rate_limited = 0
+        self.violations = 0
+        self.done = set()
+
+    async def request(self, route, target):
+        now = time.monotonic()
+        self.requests += 1
+        # Small tolerance for timer jitter
+        if now + 0.005 < max(self.route_blocked.get(route, 0.0), self.global_blocked):
+            self.violations += 1
+
+        if self.rng.random() < self.global_chance:
+            self.rate_limited += 1
+            self.global_blocked = now + 0.05
+            raise FakeRateLimit(0.05, True)
+
+        start, count = self.buckets.get(route, (now, 0))
+        if now - start >= self.bucket_window:
+            start, count = now, 0
+        if count >= self.bucket_size:
+            retry = round(start + self.bucket_window - now, 3)
+            self.rate_limited += 1
+            self.route_blocked[route] = now + retry
+            raise FakeRateLimit(retry, False)
+        self.buckets[route] = (start, count + 1)
+        await asyncio.sleep(0.001)
+        self.done.add(target)
+        return True
+
+async def run(args):
+    client = FakeHTTPClient(args.bucket_size, args.bucket_window, args.global_chance, args.seed)
+    fanout = FanOut(concurrency=args.concurrency, requests_per_second=args.rps, max_retries=args.max_retries)
+    targets = list(range(args.targets))
+
+    start = time.perf_counter()
+    results = await fanout.run(
+        targets,
+        lambda target: client.request(('channel', target % args.routes), target),
+        route=lambda target: ('channel', target % args.routes)
+    )
+    elapsed = time.perf_counter() - start
+
+    failed = [result for result in results if not result.ok]
+    retries = sum(result.attempts - 1 for result in results)
+    rate = client.requests / elapsed
+    print(
+        f"{len(targets)} targets over {args.routes} routes in {elapsed:.2f}s | "
+        f"{client.requests} requests ({rate:.0f}/s, budget {args.rps}/s) | "
+        f"{client.rate_limited} answered 429 | {retries} retries | {len(failed)} failed | "
+        f"{client.violations} requests inside a blocked window"
+    )
+
+    problems = []
+    if client.violations:
+        problems.append("requests were sent while a 429 was still in effect")
+    if failed or len(client.done) != len(targets):
+        problems.append(f"{len(targets) - len(client.done)} targets never succeeded")
+    if rate > args.rps * 1.1:
+        problems.append("the request rate exceeded the budget")
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    return not problems
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--targets', type=int, default=400)
+    parser.add_argument('--routes', type=int, default=20)
+    parser.add_argument('--rps', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--bucket-size', type=int, default=5)
+    parser.add_argument('--bucket-window', type=float, default=0.5)
+    parser.add_argument('--global-chance', type=float, default=0.01)
+    parser.add_argument('--max-retries', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=1)
+    ok = asyncio.run(run(parser.parse_args()))
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Compare per-mutation commits with group commit for the JSON backend.
+
+Per-mutation mode atomically rewrites and fsyncs after every change, the
+way a naive durable store would. Group-commit mode issues the same
+changes from concurrent coroutines through AsyncDatabase and lets the
+backend coalesce them into shared commits.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from utils.database import AsyncDatabase, Database
+from utils.storage import JSONBackend
+
+def per_mutation(mutations):
+    backend = JSONBackend(group_commit=False)
+    database = Database(backend)
+    start = time.perf_counter()
+    for i in range(mutations):
+        database.add_warning(i % 20, i, 1, "benchmark")
+        database.flush()
+    elapsed = time.perf_counter() - start
+    database.close()
+    return elapsed, backend.commits
+
+async def group_commit(mutations, concurrency, window):
+    backend = JSONBackend(group_commit=True, commit_window=window)
+    db = AsyncDatabase(Database(backend))
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def mutate(i):
+        async with semaphore:
+            await db.add_warning(i % 20, i, 1, "benchmark")
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(mutate(i) for i in range(mutations)))
+    elapsed = time.perf_counter() - start
+    await db.close()
+    return elapsed, backend.commits
+
+def report(label, mutations, elapsed, commits):
+    print(f"{label:>13}: {mutations / elapsed:8.0f} mutations/s | {commits} commits for {mutations} mutations")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--mutations', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=100, help="commands in flight at once")
+    parser.add_argument('--window', type=float, default=0.02, help="group commit window in seconds")
+    args = parser.parse_args()
+    
+    root = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.makedirs(os.path.join(tmp, 'data'))
+        os.chdir(tmp)
+        try:
+            report("per-mutation", args.mutations, *per_mutation(args.mutations))
+        finally:
+            os.chdir(root)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        os.makedirs(os.path.join(tmp, 'data'))
+        os.chdir(tmp)
+        try:
+            result = asyncio.run(group_commit(args.mutations, args.concurrency, args.window))
+            report("group commit", args.mutations, *result)
+        finally:
+            os.chdir(root)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Measure what the slash command cooldown check costs per invocation.
+
+Runs CommandLimiter.check for synthetic interactions spread over many
+guilds and users, with some guilds overriding cooldowns, and reports the
+time per check and how many buckets are held. Guild settings come from
+an in-memory table since they are only read once per guild anyway.
+"""
+import argparse
+import asyncio
+import random
+import time
+from types import SimpleNamespace
+
+from discord import app_commands
+from utils.cooldowns import CommandLimiter
+
+COMMANDS = ('warnings', 'gbans', 'play', 'queue', 'warn')
+
+class SettingsTable:
+    """Server settings held in a dict, standing in for the database"""
+
+    def __init__(self, guilds, seed):
+        rng = random.Random(seed)
+        self.settings = {
+            guild_id: {'command_cooldowns': {rng.choice(COMMANDS): rng.choice((0, 1, 10))}}
+            for guild_id in range(guilds) if guild_id % 4 == 0
+        }
+
+    async def get_server_settings(self, guild_id):
+        return dict(self.settings.get(guild_id, {}))
+
+def interactions(count, users, guilds, seed):
+    rng = random.Random(seed)
+    commands = [SimpleNamespace(qualified_name=name) for name in COMMANDS]
+    members = [SimpleNamespace(id=user_id) for user_id in range(users)]
+    return [
+        SimpleNamespace(
+            command=rng.choice(commands),
+            guild_id=rng.randrange(guilds),
+            user=members[rng.randrange(users)]
+        )
+        for _ in range(count)
+    ]
+
+async def run(args):
+    limiter = CommandLimiter(SettingsTable(args.guilds, args.seed))
+    batch = interactions(args.checks, args.users, args.guilds, args.seed)
+
+    # Load every guild's overrides first so the loop measures the steady state
+    for guild_id in range(args.guilds):
+        await limiter.get_overrides(guild_id)
+
+    limited = 0
+    start = time.perf_counter()
+    for interaction in batch:
+        try:
+            await limiter.check(interaction)
+        except app_commands.CommandOnCooldown:
+            limited += 1
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"{len(batch)} checks in {elapsed:.2f}s: {elapsed / len(batch) * 1e6:.2f}us per check | "
+        f"{limited} on cooldown | {len(limiter.buckets)} buckets held"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--checks', type=int, default=1000000)
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--guilds', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=1)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
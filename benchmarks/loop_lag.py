@@ -0,0 +1,103 @@
+"""
+Measure event-loop lag while the database is hammered from coroutines.
+
+Compares calling Database directly inside coroutines (the old behaviour)
+with awaiting AsyncDatabase. The run fails if the async path's p99 or
+worst-case lag goes over --max-p99 or --max-lag milliseconds; the sync
+path is only reported, for comparison.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from utils.database import AsyncDatabase, Database
+from utils.storage import create_backend
+
+TICK = 0.005
+
+async def monitor_lag(samples, stop):
+    """Record how late the loop wakes a coroutine sleeping for TICK seconds"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        samples.append(time.perf_counter() - start - TICK)
+
+async def hammer(call, workers, operations):
+    """Issue moderation writes and reads from many concurrent coroutines"""
+    async def worker(worker_id):
+        for i in range(operations):
+            await call('add_warning', worker_id, i % 50, 1, "benchmark")
+            await call('log_moderation_action', worker_id, i % 50, 1, 'warn', "benchmark")
+            await call('get_warnings', worker_id, i % 50)
+    await asyncio.gather(*(worker(w) for w in range(workers)))
+
+async def run(mode, backend_name, workers, operations):
+    database = Database(create_backend(backend_name))
+    if mode == 'async':
+        db = AsyncDatabase(database)
+        
+        async def call(name, *args):
+            return await getattr(db, name)(*args)
+    else:
+        async def call(name, *args):
+            return getattr(database, name)(*args)
+    
+    samples = []
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(monitor_lag(samples, stop))
+    start = time.perf_counter()
+    await hammer(call, workers, operations)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await monitor
+    
+    if mode == 'async':
+        await db.close()
+    else:
+        database.close()
+    
+    samples.sort()
+    p99 = samples[int(len(samples) * 0.99) - 1] if samples else 0.0
+    print(
+        f"{mode:>5}: {workers * operations * 3} ops in {elapsed:.2f}s | "
+        f"lag samples={len(samples)} median={statistics.median(samples or [0]) * 1000:.2f}ms "
+        f"p99={p99 * 1000:.2f}ms max={max(samples or [0]) * 1000:.2f}ms"
+    )
+    return p99, max(samples or [0])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--backend', default='json', choices=['json', 'sqlite'])
+    parser.add_argument('--workers', type=int, default=20)
+    parser.add_argument('--operations', type=int, default=200)
+    parser.add_argument('--max-p99', type=float, default=50, help="milliseconds")
+    parser.add_argument('--max-lag', type=float, default=200, help="milliseconds")
+    args = parser.parse_args()
+    
+    root = os.getcwd()
+    lag = {}
+    for mode in ('sync', 'async'):
+        with tempfile.TemporaryDirectory() as tmp:
+            os.makedirs(os.path.join(tmp, 'data'))
+            os.chdir(tmp)
+            try:
+                lag[mode] = asyncio.run(run(mode, args.backend, args.workers, args.operations))
+            finally:
+                os.chdir(root)
+    
+    p99, worst = lag['async']
+    problems = []
+    if p99 * 1000 > args.max_p99:
+        problems.append(f"async p99 lag {p99 * 1000:.2f}ms is over {args.max_p99}ms")
+    if worst * 1000 > args.max_lag:
+        problems.append(f"async max lag {worst * 1000:.2f}ms is over {args.max_lag}ms")
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    sys.exit(1 if problems else 0)
+
+if __name__ == "__main__":
+    main()
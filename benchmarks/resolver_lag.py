@@ -0,0 +1,70 @@
+"""
+Measure event-loop lag while many track resolutions run concurrently.
+
+Uses a stub extractor that burns CPU like yt-dlp's extraction does, and
+compares calling it inline in the coroutine (the old /play behaviour)
+with TrackResolver's process pool.
+"""
+import argparse
+import asyncio
+import time
+
+from utils.resolver import TrackResolver
+
+TICK = 0.005
+WORK_SECONDS = 0.2
+
+def stub_extract(query):
+    """Spin the CPU for WORK_SECONDS and return a fake info dict"""
+    deadline = time.perf_counter() + WORK_SECONDS
+    while time.perf_counter() < deadline:
+        pass
+    return {'title': query, 'url': f"https://example.invalid/{query}"}
+
+async def monitor_lag(samples, stop):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        samples.append(time.perf_counter() - start - TICK)
+
+async def run(mode, resolutions, workers):
+    if mode == 'pool':
+        resolver = TrackResolver(extractor=stub_extract, workers=workers, timeout=60)
+        # Let the spawned workers start before measuring
+        await asyncio.gather(*(resolver.resolve(f"warmup-{i}") for i in range(workers)))
+        resolve = resolver.resolve
+    else:
+        async def resolve(query):
+            return stub_extract(query)
+    
+    samples = []
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(monitor_lag(samples, stop))
+    await asyncio.sleep(TICK * 2)
+    start = time.perf_counter()
+    await asyncio.gather(*(resolve(f"track-{i}") for i in range(resolutions)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await monitor
+    
+    if mode == 'pool':
+        resolver.close()
+    
+    samples.sort()
+    p99 = samples[max(int(len(samples) * 0.99) - 1, 0)]
+    print(
+        f"{mode:>6}: {resolutions} resolutions in {elapsed:.2f}s | lag p99={p99 * 1000:.1f}ms "
+        f"max={samples[-1] * 1000:.1f}ms over {len(samples)} ticks"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--resolutions', type=int, default=16)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+    
+    for mode in ('inline', 'pool'):
+        asyncio.run(run(mode, args.resolutions, args.workers))
+
+if __name__ == "__main__":
+    main()
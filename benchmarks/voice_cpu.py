@@ -0,0 +1,84 @@
+"""
+Measure CPU spent per second of audio by each voice playback path.
+
+Reads a local media file through each audio source as fast as possible,
+doing the same per-frame work discord.py's voice player does (including
+Opus encoding for PCM sources), and reports bot-process and ffmpeg CPU
+per second of audio. Requires ffmpeg and libopus.
+"""
+import argparse
+import os
+import resource
+import subprocess
+import tempfile
+import time
+
+import discord
+
+FRAME_SECONDS = 0.02
+
+def make_test_file(directory, seconds):
+    """Render a stereo test tone to an Opus/WebM file like YouTube serves"""
+    path = os.path.join(directory, 'tone.webm')
+    subprocess.run(
+        ['ffmpeg', '-loglevel', 'error', '-f', 'lavfi', '-i', f'sine=frequency=440:duration={seconds}',
+         '-ac', '2', '-ar', '48000', '-c:a', 'libopus', '-b:a', '128k', path],
+        check=True
+    )
+    return path
+
+def build_sources(path):
+    """The legacy path and the new playback modes, keyed by label"""
+    return {
+        'pcm + PCMVolumeTransformer (legacy)': lambda: discord.PCMVolumeTransformer(
+            discord.FFmpegPCMAudio(path, options='-vn'), volume=0.5
+        ),
+        'pcm + ffmpeg volume filter': lambda: discord.FFmpegPCMAudio(
+            path, options='-vn -filter:a volume=0.50'
+        ),
+        'opus encoded by ffmpeg (volume != 100%)': lambda: discord.FFmpegOpusAudio(
+            path, codec=None, options='-vn -filter:a volume=0.50'
+        ),
+        'opus passthrough (volume 100%)': lambda: discord.FFmpegOpusAudio(
+            path, codec='copy', options='-vn'
+        )
+    }
+
+def measure(factory):
+    encoder = discord.opus.Encoder()
+    children_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu_before = time.process_time()
+    
+    source = factory()
+    frames = 0
+    while True:
+        data = source.read()
+        if not data:
+            break
+        if not source.is_opus():
+            encoder.encode(data, encoder.SAMPLES_PER_FRAME)
+        frames += 1
+    source.cleanup()
+    
+    cpu = time.process_time() - cpu_before
+    children_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    ffmpeg_cpu = (children_after.ru_utime + children_after.ru_stime) - (children_before.ru_utime + children_before.ru_stime)
+    return frames * FRAME_SECONDS, cpu, ffmpeg_cpu
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--file', help="local media file (default: a generated Opus/WebM tone)")
+    parser.add_argument('--seconds', type=int, default=60, help="length of the generated tone")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.file or make_test_file(tmp, args.seconds)
+        for label, factory in build_sources(path).items():
+            audio_seconds, cpu, ffmpeg_cpu = measure(factory)
+            print(
+                f"{label:>40}: bot {cpu / audio_seconds * 1000:6.2f} ms/s audio | "
+                f"ffmpeg {ffmpeg_cpu / audio_seconds * 1000:6.2f} ms/s audio"
+            )
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,35 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
+import argparse
 import asyncio
+import contextvars
 import logging
 import os
 import json
-from config import BOT_CONFIG
+import pkgutil
+import time
+import cogs
+from config import BOT_CONFIG, FANOUT_CONFIG
+from utils.cluster import ClusterNode
+from utils.command_sync import CommandSyncState, tree_hash
+from utils.cooldowns import CommandLimiter
+from utils.database import AsyncDatabase
+from utils.fanout import FanOut
+from utils.logging_setup import setup_logging
+from utils.scheduler import TimerScheduler
+from utils.storage.migrate import needs_migration
+from utils.users import UserResolver
 
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('bot.log'),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
+# Extension currently being loaded in this task, so add_cog can attribute setup time
+loading_extension = contextvars.ContextVar('loading_extension', default=None)
+
+def discover_extensions():
+    """Every module in the cogs package, in name order"""
+    return sorted(f"cogs.{module.name}" for module in pkgutil.iter_modules(cogs.__path__))
+
 # Bot intents
 intents = discord.Intents.default()
 intents.message_content = True
@@ -25,38 +37,161 @@ intents.voice_states = True
 intents.guilds = True
 intents.members = True
 
-class MusicBot(commands.Bot):
-    def __init__(self):
+class MusicBot(commands.AutoShardedBot):
+    def __init__(self, force_sync=False, dev_guild_id=None, cluster=None):
+        # Standalone the library picks the shard count; a cluster runs only its range
+        self.cluster = cluster or ClusterNode.standalone()
+        shard_options = {}
+        if self.cluster.shard_ids is not None:
+            shard_options = {'shard_ids': self.cluster.shard_ids, 'shard_count': self.cluster.shard_count}
         super().__init__(
             command_prefix=BOT_CONFIG['prefix'],
             intents=intents,
-            help_command=None
+            help_command=None,
+            # Long route limits come back as RateLimited so FanOut can move on to other routes
+            max_ratelimit_timeout=FANOUT_CONFIG['max_ratelimit_timeout'],
+            **shard_options
         )
         self.owner_id = BOT_CONFIG['owner_id']
+        # Shared by every cog so they all see the same resident stores
+        self.db = AsyncDatabase()
+        self.scheduler = TimerScheduler(self.db, owns=self.owns_timer if self.cluster.is_clustered else None)
+        self.user_resolver = UserResolver(self)
+        # One request budget for every cog's fan-outs, so together they stay under Discord's global limit
+        self.fanout = FanOut()
+        self.command_limiter = CommandLimiter(self.db)
+        self.tree.on_error = self.on_app_command_error
+        self.force_sync = force_sync
+        self.dev_guild = discord.Object(id=dev_guild_id) if dev_guild_id else None
+        self.startup_timings = {}  # phase -> seconds
+        self.extension_timings = {}  # extension -> {'total', 'setup'} seconds
+        self._started_at = time.perf_counter()
+    
+    async def login(self, token):
+        """Time the REST login separately from setup_hook, which it calls"""
+        start = time.perf_counter()
+        await super().login(token)
+        elapsed = time.perf_counter() - start
+        self.startup_timings['login'] = elapsed - self.startup_timings.get('cogs', 0) - self.startup_timings.get('sync', 0)
         
     async def setup_hook(self):
         """Load all cogs when bot starts"""
+        # Timed actions need the guild cache, so start firing them once ready
+        self.loop.create_task(self.start_scheduler())
+        
+        start = time.perf_counter()
+        await self.load_extensions(discover_extensions())
+        self.startup_timings['cogs'] = time.perf_counter() - start
+        await self.cluster.start()
+        
+        # Commands are global to the application, so one cluster syncs them
+        if self.cluster.is_primary:
+            start = time.perf_counter()
+            await self.sync_commands()
+            self.startup_timings['sync'] = time.perf_counter() - start
+    
+    def owns_timer(self, timer):
+        """Whether this cluster loads a persisted timer"""
+        return timer['guild_id'] is None or self.cluster.owns_guild(timer['guild_id'])
+    
+    async def load_extensions(self, extensions):
+        """Load extensions concurrently so one failing cog doesn't stop the others
+        
+        Each extension's time is split into setup (add_cog, which runs
+        cog_load and registers commands) and import (the rest, mostly module
+        execution), and logged as a per-extension report.
+        """
+        results = await asyncio.gather(
+            *(self._load_timed(extension) for extension in extensions),
+            return_exceptions=True
+        )
+        
+        failed = []
+        for extension, result in zip(extensions, results):
+            if isinstance(result, BaseException):
+                failed.append(extension)
+                logger.error(f"Failed to load {extension}", exc_info=result)
+                continue
+            timing = self.extension_timings[extension]
+            logger.info(
+                f"Loaded {extension} in {timing['total'] * 1000:.1f}ms "
+                f"(import {(timing['total'] - timing['setup']) * 1000:.1f}ms, setup {timing['setup'] * 1000:.1f}ms)"
+            )
+        
+        if failed:
+            logger.warning(f"Loaded {len(extensions) - len(failed)}/{len(extensions)} cogs; failed: {', '.join(failed)}")
+        else:
+            logger.info(f"All {len(extensions)} cogs loaded successfully")
+    
+    async def _load_timed(self, extension):
+        loading_extension.set(extension)
+        self.extension_timings[extension] = {'total': 0.0, 'setup': 0.0}
+        start = time.perf_counter()
+        await self.load_extension(extension)
+        self.extension_timings[extension]['total'] = time.perf_counter() - start
+    
+    async def add_cog(self, cog, /, **kwargs):
+        """Attribute add_cog time to the extension being loaded"""
+        start = time.perf_counter()
         try:
-            await self.load_extension('cogs.music')
-            await self.load_extension('cogs.moderation')
-            await self.load_extension('cogs.owner')
-            logger.info("All cogs loaded successfully")
-            
-            # Sync slash commands
-            try:
-                synced = await self.tree.sync()
-                logger.info(f"Synced {len(synced)} slash commands")
-            except Exception as e:
-                logger.error(f"Failed to sync commands: {e}")
-                
+            await super().add_cog(cog, **kwargs)
+        finally:
+            extension = loading_extension.get()
+            if extension in self.extension_timings:
+                self.extension_timings[extension]['setup'] += time.perf_counter() - start
+    
+    async def sync_commands(self):
+        """Sync slash commands only when the tree differs from the last sync
+        
+        Global syncs are rate limited and slow restarts down, so the hash of
+        the serialized tree is persisted and compared on startup. With a dev
+        guild the global commands are copied to it and synced there instead,
+        which takes effect immediately.
+        """
+        if self.dev_guild:
+            self.tree.copy_global_to(guild=self.dev_guild)
+        scope = f"guild {self.dev_guild.id}" if self.dev_guild else "global"
+        
+        state = CommandSyncState(BOT_CONFIG['command_sync_state'])
+        digest = tree_hash(self.tree, guild=self.dev_guild)
+        if not self.force_sync and state.is_current(self.application_id, self.dev_guild, digest):
+            logger.info(f"Slash commands unchanged ({scope}), skipping sync")
+            return
+        
+        try:
+            synced = await self.tree.sync(guild=self.dev_guild)
         except Exception as e:
-            logger.error(f"Failed to load cogs: {e}")
+            logger.error(f"Failed to sync commands: {e}")
+            return
+        state.mark_synced(self.application_id, self.dev_guild, digest)
+        logger.info(f"Synced {len(synced)} slash commands ({scope})")
+    
+    async def start_scheduler(self):
+        """Start the timer scheduler after the first READY"""
+        await self.wait_until_ready()
+        await self.scheduler.start()
+        logger.info(f"Timer scheduler started with {self.scheduler.pending} pending timers")
+    
+    async def close(self):
+        """Flush pending database writes before shutting down"""
+        self.scheduler.stop()
+        try:
+            await self.cluster.close()
+            await super().close()
+        finally:
+            await self.db.close()
     
     async def on_ready(self):
         """Called when bot is ready"""
         logger.info(f'{self.user} has connected to Discord!')
         logger.info(f'Bot is in {len(self.guilds)} guilds')
         
+        if 'ready' not in self.startup_timings:
+            self.startup_timings['ready'] = time.perf_counter() - self._started_at
+            logger.info("Startup timings: " + ", ".join(
+                f"{phase} {seconds:.2f}s" for phase, seconds in self.startup_timings.items()
+            ))
+        
         # Set bot status
         activity = discord.Activity(
             type=discord.ActivityType.listening,
@@ -80,6 +215,23 @@ class MusicBot(commands.Bot):
             logger.error(f"Unhandled error: {error}")
             await ctx.send("❌ An unexpected error occurred!")
     
+    async def on_app_command_error(self, interaction, error):
+        """Error handler for slash commands"""
+        if isinstance(error, app_commands.CommandOnCooldown):
+            message = f"❌ Command on cooldown! Try again in {error.retry_after:.2f} seconds"
+        else:
+            command = interaction.command.qualified_name if interaction.command else None
+            logger.error(f"Unhandled error in /{command}: {error}", exc_info=error)
+            message = "❌ An unexpected error occurred!"
+        
+        try:
+            if interaction.response.is_done():
+                await interaction.followup.send(message, ephemeral=True)
+            else:
+                await interaction.response.send_message(message, ephemeral=True)
+        except discord.HTTPException:
+            pass
+    
     def is_owner_check(self, user_id):
         """Check if user is the bot owner"""
         return user_id == self.owner_id
@@ -115,11 +267,15 @@ async def help_command(interaction: discord.Interaction):
     mod_commands = [
         "`/kick <user> [reason]` - Kick a user",
         "`/ban <user> [reason]` - Ban a user",
-        "`/unban <user>` - Unban a user",
+        "`/unban <user>` - Unban a user by ID or name",
         "`/mute <user> [time] [reason]` - Mute a user",
         "`/unmute <user>` - Unmute a user",
         "`/warn <user> <reason>` - Warn a user",
-        "`/warnings <user>` - Check user warnings"
+        "`/warnings <user>` - Check user warnings",
+        "`/delwarn <user> <id>` - Delete a warning",
+        "`/escalation` - Automatic actions for repeat warnings",
+        "`/lockdown <on|off> [time]` - Kick new members during a raid",
+        "`/cooldown` - Per-command cooldowns for this server"
     ]
     embed.add_field(
         name="🔨 Moderation Commands",
@@ -138,6 +294,7 @@ async def help_command(interaction: discord.Interaction):
             "`/gbans` - List all global bans",
             "`/reload <cog>` - Reload a cog",
             "`/servers` - List all servers",
+            "`/musicstats` - Show voice session stats",
             "`/leave <server_id>` - Leave a server"
         ]
         embed.add_field(
@@ -149,8 +306,19 @@ async def help_command(interaction: discord.Interaction):
     embed.set_footer(text="All commands are slash commands - type / to see them!")
     await interaction.response.send_message(embed=embed)
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the music & moderation bot")
+    parser.add_argument('--sync', action='store_true',
+                        help="sync slash commands even if the command tree is unchanged")
+    parser.add_argument('--dev-guild', type=int, metavar='GUILD_ID',
+                        help="sync commands to this guild only (instant, for development)")
+    return parser.parse_args()
+
 def main():
     """Main function to run the bot"""
+    args = parse_args()
+    setup_logging()
+    
     # Create data directories if they don't exist
     os.makedirs('data', exist_ok=True)
     
@@ -163,22 +331,36 @@ def main():
         with open('data/server_settings.json', 'w') as f:
             json.dump({}, f)
     
-    # Get bot token from environment
+    if needs_migration():
+        logger.error("The JSON store has data the SQLite database lacks; run `python -m utils.storage.migrate` first")
+        return
+    
+    run(MusicBot(force_sync=args.sync, dev_guild_id=args.dev_guild))
+
+def run(bot):
+    """Run a bot with the token from the environment"""
     token = os.getenv('DISCORD_TOKEN')
     if not token:
         logger.error("DISCORD_TOKEN environment variable not found!")
         return
     
-    # Create and run bot
-    bot = MusicBot()
     bot.tree.add_command(help_command)
     
     try:
-        bot.run(token)
+        # Logging is already set up; don't let discord.py add its own handler
+        bot.run(token, log_handler=None)
     except discord.LoginFailure:
         logger.error("Invalid bot token!")
     except Exception as e:
         logger.error(f"Error running bot: {e}")
 
+def run_cluster(cluster_id, cluster_count, shard_ids, shard_count, secret, force_sync=False):
+    """Entry point for one launcher worker process"""
+    setup_logging(f"cluster{cluster_id}")
+    os.makedirs('data', exist_ok=True)
+    cluster = ClusterNode(cluster_id, cluster_count, shard_ids, shard_count, secret=secret)
+    logger.info(f"Starting cluster {cluster_id}/{cluster_count} with shards {shard_ids[0]}-{shard_ids[-1]} of {shard_count}")
+    run(MusicBot(force_sync=force_sync, cluster=cluster))
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,138 @@
+import discord
+from discord.ext import commands
+from discord import app_commands
+import logging
+import time as clock
+from typing import Literal
+from config import AUTOMOD_CONFIG, BOT_CONFIG, COLORS
+from utils.antispam import SpamDetector
+from utils.helpers import parse_time
+from utils.ratelimit import TokenBuckets
+
+logger = logging.getLogger(__name__)
+
+class AutoMod(commands.Cog):
+    REASONS = {
+        'flood': "sending messages too fast",
+        'duplicate': "repeating the same message"
+    }
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.db = bot.db
+        self.detector = SpamDetector()
+        # At most one automatic action per member per cooldown, even while their messages keep arriving
+        self.actions = TokenBuckets(1 / AUTOMOD_CONFIG['action_cooldown'], 1, AUTOMOD_CONFIG['max_tracked_users'])
+        self.lockdowns = {}  # guild id -> monotonic time the lockdown ends
+
+    def is_exempt(self, member):
+        if member.id in (BOT_CONFIG['owner_id'], member.guild.owner_id):
+            return True
+        return member.guild_permissions.manage_messages
+
+    async def notify(self, guild, message):
+        """Post to the server's log channel, if it has one"""
+        channel = discord.utils.get(guild.text_channels, name=BOT_CONFIG['log_channel_name'])
+        if not channel:
+            return
+        try:
+            await channel.send(message)
+        except discord.HTTPException:
+            pass
+
+    @commands.Cog.listener()
+    async def on_message(self, message):
+        if not AUTOMOD_CONFIG['enabled'] or message.guild is None or message.author.bot:
+            return
+        verdict = self.detector.check_message(message.guild.id, message.author.id, message.content)
+        if verdict:
+            await self.punish(message.author, verdict)
+
+    async def punish(self, member, verdict):
+        """Apply the configured action through the moderation cog's logic"""
+        guild = member.guild
+        if self.actions.hit((guild.id, member.id)) or self.is_exempt(member):
+            return
+
+        action = AUTOMOD_CONFIG['action']
+        reason = f"Automod: {self.REASONS[verdict]}"
+        moderation = self.bot.get_cog('Moderation')
+        try:
+            if action == 'kick':
+                await member.kick(reason=reason)
+            elif moderation:
+                await moderation.apply_mute(guild, member, parse_time(AUTOMOD_CONFIG['mute_duration']), reason=reason)
+            else:
+                return
+        except discord.HTTPException as e:
+            logger.warning(f"Automod could not {action} {member.id} in {guild.id}: {e}")
+            return
+
+        self.detector.forget(guild.id, member.id)
+        await self.db.log_moderation_action(guild.id, member.id, self.bot.user.id, action, reason)
+        await self.notify(guild, f"🛡️ {'Kicked' if action == 'kick' else 'Muted'} {member.mention} for {self.REASONS[verdict]}")
+
+    def in_lockdown(self, guild_id, now=None):
+        until = self.lockdowns.get(guild_id)
+        if until is None:
+            return False
+        if until <= (now or clock.monotonic()):
+            del self.lockdowns[guild_id]
+            return False
+        return True
+
+    def start_lockdown(self, guild_id, duration=None):
+        self.lockdowns[guild_id] = clock.monotonic() + (duration or AUTOMOD_CONFIG['lockdown_duration'])
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        if not AUTOMOD_CONFIG['enabled'] or member.bot:
+            return
+        guild = member.guild
+        now = clock.monotonic()
+        if not self.in_lockdown(guild.id, now):
+            if not self.detector.check_join(guild.id, now):
+                return
+            self.start_lockdown(guild.id)
+            logger.warning(f"Join raid detected in {guild.id}; locking down")
+            minutes = AUTOMOD_CONFIG['lockdown_duration'] // 60
+            await self.notify(guild, f"🚨 Join raid detected! New members will be kicked for the next {minutes} minutes. Use `/lockdown off` to end it early.")
+
+        if not guild.me.guild_permissions.kick_members:
+            return
+        try:
+            await member.kick(reason="Automod: server is in lockdown")
+        except discord.HTTPException as e:
+            logger.warning(f"Automod could not kick {member.id} during lockdown in {guild.id}: {e}")
+
+    @app_commands.command(name="lockdown", description="Kick new members while a raid is going on")
+    @app_commands.describe(state="Turn lockdown on or off", time="Duration (e.g., 10m, 1h)")
+    @app_commands.default_permissions(manage_guild=True)
+    async def lockdown(self, interaction: discord.Interaction, state: Literal['on', 'off'], time: str = None):
+        """Start or end a lockdown"""
+        guild_id = interaction.guild.id
+        if state == 'off':
+            if not self.in_lockdown(guild_id):
+                await interaction.response.send_message("❌ This server is not in lockdown!")
+                return
+            del self.lockdowns[guild_id]
+            await interaction.response.send_message("✅ Lockdown ended, new members can join again")
+            return
+
+        duration = parse_time(time) if time else None
+        if time and not duration:
+            await interaction.response.send_message("❌ Invalid time format! Use 10m, 1h, etc.")
+            return
+        self.start_lockdown(guild_id, duration)
+
+        embed = discord.Embed(
+            title="🔒 Lockdown Started",
+            description="New members will be kicked until the lockdown ends",
+            color=COLORS['moderation']
+        )
+        embed.add_field(name="Duration", value=time or f"{AUTOMOD_CONFIG['lockdown_duration'] // 60}m", inline=True)
+        embed.add_field(name="Moderator", value=interaction.user.mention, inline=True)
+        await interaction.response.send_message(embed=embed)
+
+async def setup(bot):
+    await bot.add_cog(AutoMod(bot))
@@ -3,15 +3,37 @@ from discord.ext import commands
 from discord import app_commands
 import asyncio
 import json
+import logging
+import time as clock
 from datetime import datetime, timedelta
+from typing import Literal
 from config import BOT_CONFIG, COLORS
-from utils.database import Database
-from utils.helpers import parse_time
+from utils.ban_index import BanIndex
+from utils.cooldowns import command_cooldown, has_cooldown
+from utils.escalation import EscalationPolicy, WarningCounter
+from utils.helpers import parse_time, truncate_string
+
+logger = logging.getLogger(__name__)
 
 class Moderation(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.db = Database()
+        self.db = bot.db
+        self.fanout = bot.fanout
+        self.mute_roles = {}    # guild id -> mute role id
+        self.provisioning = {}  # guild id -> task applying mute role overwrites
+        self.role_locks = {}    # guild id -> lock serialising mute role creation
+        self.ban_index = BanIndex()
+        self.warning_counts = WarningCounter()
+        self.policies = {}      # guild id -> EscalationPolicy
+    
+    async def cog_load(self):
+        self.bot.scheduler.register('unmute', self.expire_mute)
+    
+    async def cog_unload(self):
+        self.bot.scheduler.unregister('unmute')
+        for task in self.provisioning.values():
+            task.cancel()
     
     async def protect_owner(self, interaction, target):
         """Protect bot owner from moderation actions"""
@@ -20,27 +42,108 @@ class Moderation(commands.Cog):
             return False
         return True
 
-    async def create_mute_role(self, guild):
-        """Create mute role if it doesn't exist"""
-        mute_role = discord.utils.get(guild.roles, name=BOT_CONFIG['mute_role_name'])
+    async def get_mute_role(self, guild, create=True):
+        """Return the guild's mute role, creating and provisioning it if needed"""
+        role_id = self.mute_roles.get(guild.id)
+        if role_id is None:
+            settings = await self.db.get_server_settings(guild.id)
+            role_id = settings.get('mute_role_id')
         
-        if not mute_role:
-            mute_role = await guild.create_role(
-                name=BOT_CONFIG['mute_role_name'],
-                permissions=discord.Permissions(send_messages=False, speak=False),
-                reason="Mute role for moderation"
-            )
+        mute_role = guild.get_role(role_id) if role_id else None
+        if mute_role:
+            self.mute_roles[guild.id] = mute_role.id
+            return mute_role
+        if not create:
+            return discord.utils.get(guild.roles, name=BOT_CONFIG['mute_role_name'])
+        
+        lock = self.role_locks.setdefault(guild.id, asyncio.Lock())
+        async with lock:
+            # Another command may have created the role while we waited
+            mute_role = guild.get_role(self.mute_roles.get(guild.id, 0))
+            if mute_role:
+                return mute_role
             
-            # Update channel permissions
-            for channel in guild.channels:
-                await channel.set_permissions(
-                    mute_role,
-                    send_messages=False,
-                    speak=False,
-                    add_reactions=False
+            # Adopt a role created before IDs were cached, otherwise make one
+            mute_role = discord.utils.get(guild.roles, name=BOT_CONFIG['mute_role_name'])
+            if not mute_role:
+                mute_role = await guild.create_role(
+                    name=BOT_CONFIG['mute_role_name'],
+                    permissions=discord.Permissions(send_messages=False, speak=False),
+                    reason="Mute role for moderation"
                 )
-        
+                self.start_provisioning(guild, mute_role)
+            
+            await self.remember_mute_role(guild.id, mute_role.id)
         return mute_role
+    
+    async def remember_mute_role(self, guild_id, role_id):
+        """Cache and persist the mute role ID for a guild"""
+        self.mute_roles[guild_id] = role_id
+        await self.db.update_server_setting(guild_id, 'mute_role_id', lambda _: role_id)
+    
+    def start_provisioning(self, guild, mute_role):
+        """Apply mute role overwrites to every channel in the background"""
+        task = self.provisioning.get(guild.id)
+        if task and not task.done():
+            return task
+        task = asyncio.create_task(self.provision_mute_role(guild, mute_role))
+        self.provisioning[guild.id] = task
+        task.add_done_callback(lambda _: self.provisioning.pop(guild.id, None))
+        return task
+    
+    async def provision_mute_role(self, guild, mute_role):
+        """Set the mute role's overwrites on all channels concurrently"""
+        async def apply(channel):
+            await self.apply_mute_overwrite(channel, mute_role)
+        
+        async def report(done, total):
+            logger.info(f"Mute role overwrites for {guild.name} ({guild.id}): {done}/{total} channels")
+        
+        results = await self.fanout.run(guild.channels, apply, route=lambda channel: ('channel', channel.id), on_progress=report)
+        failed = [result.target for result in results if not result.ok]
+        if failed:
+            logger.warning(f"Could not set mute role overwrites on {len(failed)} channels in {guild.name} ({guild.id})")
+    
+    async def apply_mute_overwrite(self, channel, mute_role):
+        await channel.set_permissions(
+            mute_role,
+            send_messages=False,
+            speak=False,
+            add_reactions=False,
+            reason="Mute role for moderation"
+        )
+    
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel):
+        """Cover new channels with the mute role's overwrites incrementally"""
+        mute_role = await self.get_mute_role(channel.guild, create=False)
+        if not mute_role:
+            return
+        try:
+            await self.apply_mute_overwrite(channel, mute_role)
+        except (discord.Forbidden, discord.HTTPException) as e:
+            logger.warning(f"Could not set mute role overwrite on new channel {channel.id}: {e}")
+    
+    @commands.Cog.listener()
+    async def on_member_ban(self, guild, user):
+        self.ban_index.add(guild.id, user)
+    
+    @commands.Cog.listener()
+    async def on_member_unban(self, guild, user):
+        self.ban_index.remove(guild.id, user.id)
+    
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        self.ban_index.forget(guild.id)
+    
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role):
+        """Forget a cached mute role once it is deleted"""
+        if self.mute_roles.get(role.guild.id) == role.id:
+            del self.mute_roles[role.guild.id]
+            await self.db.update_server_setting(
+                role.guild.id, 'mute_role_id', lambda role_id: None if role_id == role.id else role_id
+            )
 
     @app_commands.command(name="kick", description="Kick a member from the server")
     @app_commands.describe(member="The member to kick", reason="Reason for the kick")
@@ -69,7 +172,7 @@ class Moderation(commands.Cog):
             await interaction.response.send_message(embed=embed)
             
             # Log the action
-            self.db.log_moderation_action(
+            await self.db.log_moderation_action(
                 interaction.guild.id, member.id, interaction.user.id, 'kick', reason
             )
             
@@ -105,7 +208,7 @@ class Moderation(commands.Cog):
             await interaction.response.send_message(embed=embed)
             
             # Log the action
-            self.db.log_moderation_action(
+            await self.db.log_moderation_action(
                 interaction.guild.id, member.id, interaction.user.id, 'ban', reason
             )
             
@@ -115,32 +218,76 @@ class Moderation(commands.Cog):
             await interaction.response.send_message(f"❌ Error banning member: {e}")
 
     @app_commands.command(name="unban", description="Unban a member from the server")
-    @app_commands.describe(user="The user to unban (format: username#1234)")
+    @app_commands.describe(user="The user ID, or the banned user's name")
     @app_commands.default_permissions(ban_members=True)
     async def unban(self, interaction: discord.Interaction, user: str):
         """Unban a member from the server"""
-        banned_users = [entry async for entry in interaction.guild.bans()]
+        # Looking a name up may have to wait for the ban list to be indexed
+        await interaction.response.defer()
         
-        member_name, member_discriminator = user.split('#')
-        
-        for ban_entry in banned_users:
-            banned_user = ban_entry.user
-            
-            if (banned_user.name, banned_user.discriminator) == (member_name, member_discriminator):
-                await interaction.guild.unban(banned_user)
-                
-                embed = discord.Embed(
-                    title="✅ Member Unbanned",
-                    color=COLORS['success']
-                )
-                embed.add_field(name="Member", value=f"{banned_user.mention} ({banned_user})", inline=False)
-                embed.add_field(name="Moderator", value=interaction.user.mention, inline=True)
-                embed.timestamp = datetime.utcnow()
-                
-                await interaction.response.send_message(embed=embed)
+        user = user.strip()
+        if user.isdigit():
+            user_id = int(user)
+        else:
+            if not await self.ban_index.wait_ready(interaction.guild):
+                await interaction.followup.send("❌ Couldn't read the ban list, try unbanning by user ID!")
+                return
+            user_id = self.ban_index.find(interaction.guild.id, user)
+            if user_id is None:
+                await interaction.followup.send("❌ Member not found in ban list!")
                 return
         
-        await interaction.response.send_message("❌ Member not found in ban list!")
+        try:
+            await interaction.guild.unban(discord.Object(id=user_id))
+        except discord.NotFound:
+            await interaction.followup.send("❌ Member not found in ban list!")
+            return
+        
+        bans = self.ban_index.guilds.get(interaction.guild.id)
+        name = bans.names.get(user_id) if bans else None
+        self.ban_index.remove(interaction.guild.id, user_id)
+        
+        embed = discord.Embed(
+            title="✅ Member Unbanned",
+            color=COLORS['success']
+        )
+        embed.add_field(name="Member", value=f"<@{user_id}> ({name or user_id})", inline=False)
+        embed.add_field(name="Moderator", value=interaction.user.mention, inline=True)
+        embed.timestamp = datetime.utcnow()
+        
+        await interaction.followup.send(embed=embed)
+    
+    @unban.autocomplete('user')
+    async def unban_autocomplete(self, interaction: discord.Interaction, current: str):
+        """Suggest banned users from the guild's ban index"""
+        self.ban_index.ensure(interaction.guild)
+        return [
+            app_commands.Choice(name=truncate_string(f"{name} ({user_id})", 100), value=str(user_id))
+            for user_id, name in self.ban_index.search(interaction.guild.id, current)
+        ]
+
+    async def apply_mute(self, guild, member, duration=None, reason=None):
+        """Give a member the mute role and schedule its removal if timed
+
+        A mute never shortens one already in place: a member muted
+        permanently, or until later than this mute would end, keeps that.
+        Otherwise the pending unmute is replaced.
+        """
+        mute_role = await self.get_mute_role(guild)
+        pending = self.bot.scheduler.find('unmute', guild.id, member.id)
+        if mute_role in member.roles:
+            if not pending:
+                return mute_role  # Already muted permanently
+            if duration and max(timer['expires_at'] for timer in pending) >= clock.time() + duration:
+                return mute_role
+        else:
+            await member.add_roles(mute_role, reason=reason)
+        
+        if pending:
+            await self.bot.scheduler.cancel('unmute', guild.id, member.id)
+        if duration:
+            await self.bot.scheduler.schedule('unmute', guild.id, member.id, duration, {'role_id': mute_role.id})
+        return mute_role
 
     @app_commands.command(name="mute", description="Mute a member")
     @app_commands.describe(member="The member to mute", time="Duration (e.g., 10m, 1h, 1d)", reason="Reason for the mute")
@@ -154,22 +301,15 @@ class Moderation(commands.Cog):
             await interaction.response.send_message("❌ You cannot mute someone with equal or higher roles!")
             return
         
-        mute_role = await self.create_mute_role(interaction.guild)
+        mute_role = await self.get_mute_role(interaction.guild)
         
         if mute_role in member.roles:
             await interaction.response.send_message("❌ Member is already muted!")
             return
         
         try:
-            await member.add_roles(mute_role, reason=f"Muted by {interaction.user}: {reason}")
-            
-            # Parse time
-            duration = None
-            if time:
-                duration = parse_time(time)
-                if duration:
-                    # Schedule unmute
-                    asyncio.create_task(self.scheduled_unmute(member, mute_role, duration))
+            duration = parse_time(time) if time else None
+            await self.apply_mute(interaction.guild, member, duration, reason=f"Muted by {interaction.user}: {reason}")
             
             embed = discord.Embed(
                 title="🔇 Member Muted",
@@ -179,12 +319,14 @@ class Moderation(commands.Cog):
             embed.add_field(name="Moderator", value=interaction.user.mention, inline=True)
             embed.add_field(name="Duration", value=time or "Permanent", inline=True)
             embed.add_field(name="Reason", value=reason, inline=False)
+            if interaction.guild.id in self.provisioning:
+                embed.set_footer(text="Mute role permissions are still being applied to channels")
             embed.timestamp = datetime.utcnow()
             
             await interaction.response.send_message(embed=embed)
             
             # Log the action
-            self.db.log_moderation_action(
+            await self.db.log_moderation_action(
                 interaction.guild.id, member.id, interaction.user.id, 'mute', reason
             )
             
@@ -193,13 +335,21 @@ class Moderation(commands.Cog):
         except Exception as e:
             await interaction.response.send_message(f"❌ Error muting member: {e}")
 
-    async def scheduled_unmute(self, member, mute_role, duration):
-        """Automatically unmute member after duration"""
-        await asyncio.sleep(duration)
+    async def expire_mute(self, timer):
+        """Automatically unmute member once their mute timer fires"""
+        guild = self.bot.get_guild(timer['guild_id'])
+        if not guild:
+            return
+        
+        mute_role = guild.get_role(timer['data'].get('role_id'))
+        if not mute_role:
+            return
+        
         try:
+            member = guild.get_member(timer['user_id']) or await guild.fetch_member(timer['user_id'])
             if mute_role in member.roles:
                 await member.remove_roles(mute_role, reason="Automatic unmute")
-        except:
+        except (discord.NotFound, discord.Forbidden):
             pass  # Member might have left the server
 
     @app_commands.command(name="unmute", description="Unmute a member")
@@ -207,7 +357,7 @@ class Moderation(commands.Cog):
     @app_commands.default_permissions(moderate_members=True)
     async def unmute(self, interaction: discord.Interaction, member: discord.Member):
         """Unmute a member"""
-        mute_role = discord.utils.get(interaction.guild.roles, name=BOT_CONFIG['mute_role_name'])
+        mute_role = await self.get_mute_role(interaction.guild, create=False)
         
         if not mute_role or mute_role not in member.roles:
             await interaction.response.send_message("❌ Member is not muted!")
@@ -215,6 +365,7 @@ class Moderation(commands.Cog):
         
         try:
             await member.remove_roles(mute_role, reason=f"Unmuted by {interaction.user}")
+            await self.bot.scheduler.cancel('unmute', interaction.guild.id, member.id)
             
             embed = discord.Embed(
                 title="🔊 Member Unmuted",
@@ -231,7 +382,43 @@ class Moderation(commands.Cog):
         except Exception as e:
             await interaction.response.send_message(f"❌ Error unmuting member: {e}")
 
+    async def get_policy(self, guild_id):
+        """The guild's escalation policy, cached after the first read"""
+        policy = self.policies.get(guild_id)
+        if policy is None:
+            settings = await self.db.get_server_settings(guild_id)
+            policy = self.policies[guild_id] = EscalationPolicy.from_settings(settings)
+        return policy
+    
+    async def save_policy(self, guild_id, policy):
+        self.policies[guild_id] = policy
+        stored = policy.to_settings()
+        await self.db.update_server_setting(guild_id, 'escalation', lambda _: stored)
+    
+    async def load_warning_counts(self, guild_id, user_id, warnings=None):
+        """Make sure a member's warning times are in memory"""
+        if not self.warning_counts.is_loaded(guild_id, user_id):
+            if warnings is None:
+                warnings = await self.db.get_warnings(guild_id, user_id)
+            self.warning_counts.load(guild_id, user_id, warnings)
+    
+    async def escalate(self, interaction, member, step, count):
+        """Carry out an escalation step and describe what happened"""
+        reason = f"Automatic escalation: {count} active warnings"
+        action = step['action']
+        if action == 'mute':
+            await self.apply_mute(interaction.guild, member, EscalationPolicy.mute_duration(step), reason=reason)
+        elif action == 'kick':
+            await member.kick(reason=reason)
+        elif action == 'ban':
+            await interaction.guild.ban(member, reason=reason)
+        
+        if action != 'notify':
+            await self.db.log_moderation_action(interaction.guild.id, member.id, interaction.user.id, action, reason)
+        return f"🚨 {member.mention} has reached {count} active warnings: **{EscalationPolicy.describe(step)}**"
+    
     @app_commands.command(name="warn", description="Warn a member")
+    @command_cooldown()
     @app_commands.describe(member="The member to warn", reason="Reason for the warning")
     @app_commands.default_permissions(kick_members=True)
     async def warn(self, interaction: discord.Interaction, member: discord.Member, reason: str):
@@ -239,8 +426,15 @@ class Moderation(commands.Cog):
         if not await self.protect_owner(interaction, member):
             return
         
+        # Counts come from memory; storage is only read the first time a member is seen
+        guild_id = interaction.guild.id
+        await self.load_warning_counts(guild_id, member.id)
+        policy = await self.get_policy(guild_id)
+        
         # Add warning to database
-        warning_id = self.db.add_warning(interaction.guild.id, member.id, interaction.user.id, reason)
+        warning_id = await self.db.add_warning(guild_id, member.id, interaction.user.id, reason)
+        self.warning_counts.add(guild_id, member.id, warning_id, clock.time())
+        active = self.warning_counts.count(guild_id, member.id, policy.window)
         
         embed = discord.Embed(
             title="⚠️ Member Warned",
@@ -249,34 +443,59 @@ class Moderation(commands.Cog):
         embed.add_field(name="Member", value=f"{member.mention} ({member})", inline=False)
         embed.add_field(name="Moderator", value=interaction.user.mention, inline=True)
         embed.add_field(name="Warning ID", value=warning_id, inline=True)
+        embed.add_field(name="Active Warnings", value=active, inline=True)
         embed.add_field(name="Reason", value=reason, inline=False)
         embed.timestamp = datetime.utcnow()
         
         await interaction.response.send_message(embed=embed)
         
-        # Check if member has too many warnings
-        warnings = self.db.get_warnings(interaction.guild.id, member.id)
-        if len(warnings) >= BOT_CONFIG['max_warnings']:
-            await interaction.followup.send(f"⚠️ {member.mention} has reached the maximum number of warnings!")
+        step = policy.step_for(active)
+        if step:
+            try:
+                await interaction.followup.send(await self.escalate(interaction, member, step, active))
+            except discord.Forbidden:
+                await interaction.followup.send(f"❌ I don't have permission to escalate ({EscalationPolicy.describe(step)})!")
+
+    @app_commands.command(name="delwarn", description="Delete one of a member's warnings")
+    @command_cooldown()
+    @app_commands.describe(member="The member the warning belongs to", warning_id="The warning ID shown by /warnings")
+    @app_commands.default_permissions(kick_members=True)
+    async def delwarn(self, interaction: discord.Interaction, member: discord.Member, warning_id: int):
+        """Delete a single warning"""
+        if not await self.db.remove_warning(interaction.guild.id, member.id, warning_id):
+            await interaction.response.send_message(f"❌ {member.mention} has no warning #{warning_id}!")
+            return
+        
+        self.warning_counts.remove(interaction.guild.id, member.id, warning_id)
+        await self.db.log_moderation_action(
+            interaction.guild.id, member.id, interaction.user.id, 'delwarn', f"Deleted warning #{warning_id}"
+        )
+        await interaction.response.send_message(f"🗑️ Deleted warning #{warning_id} for {member.mention}")
 
     @app_commands.command(name="warnings", description="Check a member's warnings")
+    @command_cooldown()
     @app_commands.describe(member="The member to check warnings for")
     @app_commands.default_permissions(kick_members=True)
     async def warnings(self, interaction: discord.Interaction, member: discord.Member):
         """Check member's warnings"""
-        warnings = self.db.get_warnings(interaction.guild.id, member.id)
+        warnings = await self.db.get_warnings(interaction.guild.id, member.id)
         
         if not warnings:
             await interaction.response.send_message(f"✅ {member.mention} has no warnings!")
             return
         
+        # Moderators outside the gateway cache are fetched, so don't race the deadline
+        await interaction.response.defer()
+        recent = warnings[-5:]  # Show last 5 warnings
+        moderators = await self.bot.user_resolver.resolve_many(warning['moderator_id'] for warning in recent)
+        
         embed = discord.Embed(
             title=f"⚠️ Warnings for {member}",
             color=COLORS['warning']
         )
         
-        for warning in warnings[-5:]:  # Show last 5 warnings
-            moderator = self.bot.get_user(warning['moderator_id'])
+        for warning in recent:
+            moderator = moderators.get(warning['moderator_id'])
             mod_name = moderator.name if moderator else "Unknown"
             
             embed.add_field(
@@ -285,8 +504,102 @@ class Moderation(commands.Cog):
                 inline=False
             )
         
-        embed.set_footer(text=f"Total warnings: {len(warnings)}")
+        await self.load_warning_counts(interaction.guild.id, member.id, warnings)
+        policy = await self.get_policy(interaction.guild.id)
+        footer = f"Total warnings: {len(warnings)}"
+        if policy.window:
+            active = self.warning_counts.count(interaction.guild.id, member.id, policy.window)
+            footer += f" • Active (last {policy.window // 86400} days): {active}"
+        embed.set_footer(text=footer)
+        await interaction.followup.send(embed=embed)
+
+    escalation = app_commands.Group(
+        name="escalation",
+        description="Automatic actions for repeat warnings",
+        default_permissions=discord.Permissions(manage_guild=True)
+    )
+
+    def policy_embed(self, policy):
+        embed = discord.Embed(title="🚨 Warning Escalation", color=COLORS['warning'])
+        steps = [
+            f"**{count}+** warnings → {EscalationPolicy.describe(policy.steps[count])}"
+            for count in sorted(policy.steps)
+        ]
+        embed.description = "\n".join(steps) or "No automatic actions"
+        window = f"last {policy.window // 86400} days" if policy.window else "all time"
+        embed.set_footer(text=f"Warnings counted over: {window}")
+        return embed
+
+    @escalation.command(name="show", description="Show this server's escalation policy")
+    async def escalation_show(self, interaction: discord.Interaction):
+        await interaction.response.send_message(embed=self.policy_embed(await self.get_policy(interaction.guild.id)))
+
+    @escalation.command(name="set", description="Take an action when a member reaches a number of warnings")
+    @app_commands.describe(warnings="Active warning count that triggers the action", action="What to do", duration="Mute duration (e.g., 1h, 1d)")
+    async def escalation_set(self, interaction: discord.Interaction, warnings: app_commands.Range[int, 1, 100],
+                             action: Literal['notify', 'mute', 'kick', 'ban'], duration: str = None):
+        if duration and (action != 'mute' or not parse_time(duration)):
+            await interaction.response.send_message("❌ Duration only applies to mutes and must look like 10m, 1h or 1d!")
+            return
+        
+        policy = await self.get_policy(interaction.guild.id)
+        policy.set_step(warnings, action, duration)
+        await self.save_policy(interaction.guild.id, policy)
+        await interaction.response.send_message(embed=self.policy_embed(policy))
+
+    @escalation.command(name="remove", description="Remove the action for a warning count")
+    @app_commands.describe(warnings="The warning count to clear")
+    async def escalation_remove(self, interaction: discord.Interaction, warnings: int):
+        policy = await self.get_policy(interaction.guild.id)
+        if not policy.remove_step(warnings):
+            await interaction.response.send_message(f"❌ Nothing happens at {warnings} warnings!")
+            return
+        await self.save_policy(interaction.guild.id, policy)
+        await interaction.response.send_message(embed=self.policy_embed(policy))
+
+    @escalation.command(name="window", description="Only count warnings from the last N days (0 for all time)")
+    @app_commands.describe(days="Days a warning stays active")
+    async def escalation_window(self, interaction: discord.Interaction, days: app_commands.Range[int, 0, 3650]):
+        policy = await self.get_policy(interaction.guild.id)
+        policy.window = days * 86400 or None
+        await self.save_policy(interaction.guild.id, policy)
+        await interaction.response.send_message(embed=self.policy_embed(policy))
+
+    cooldown = app_commands.Group(
+        name="cooldown",
+        description="How often members can use each command",
+        default_permissions=discord.Permissions(manage_guild=True)
+    )
+
+    @cooldown.command(name="show", description="Show this server's command cooldowns")
+    async def cooldown_show(self, interaction: discord.Interaction):
+        overrides = await self.bot.command_limiter.get_overrides(interaction.guild.id)
+        embed = discord.Embed(title="⏱️ Command Cooldowns", color=COLORS['info'])
+        lines = [
+            f"`/{command}` → {seconds}s" if command != '*' else f"All commands → {seconds}s"
+            for command, seconds in sorted(overrides.items())
+        ]
+        embed.description = "\n".join(lines) or "No overrides"
+        embed.set_footer(text=f"Default: {self.bot.command_limiter.default}s per command per member")
         await interaction.response.send_message(embed=embed)
 
+    @cooldown.command(name="set", description="Set the cooldown for a command, or * for all of them")
+    @app_commands.describe(command="Command name, or * for every command", seconds="Seconds between uses (0 for none)")
+    async def cooldown_set(self, interaction: discord.Interaction, command: str, seconds: app_commands.Range[int, 0, 3600]):
+        command = command.strip().lstrip('/')
+        if command != '*' and not has_cooldown(self.bot.tree.get_command(command)):
+            await interaction.response.send_message(f"❌ `/{command}` doesn't have a cooldown to change!")
+            return
+        await self.bot.command_limiter.set_override(interaction.guild.id, command, seconds)
+        target = "every command" if command == '*' else f"`/{command}`"
+        await interaction.response.send_message(f"✅ Cooldown for {target} set to {seconds}s")
+
+    @cooldown.command(name="reset", description="Go back to the default cooldown for a command")
+    @app_commands.describe(command="Command name, or * for every command")
+    async def cooldown_reset(self, interaction: discord.Interaction, command: str):
+        command = command.strip().lstrip('/')
+        await self.bot.command_limiter.set_override(interaction.guild.id, command, None)
+        await interaction.response.send_message(f"✅ `/{command}` uses the default cooldown again" if command != '*' else "✅ Removed the server-wide cooldown")
+
 async def setup(bot):
     await bot.add_cog(Moderation(bot))
@@ -1,59 +1,273 @@
+import logging
 import discord
 from discord.ext import commands
-import yt_dlp
-import asyncio
-
-intents = discord.Intents.default()
-intents.message_content = True
-
-bot = commands.Bot(command_prefix='!', intents=intents)
-
-# Configure yt-dlp options
-YDL_OPTIONS = {'format': 'bestaudio'}
-FFMPEG_OPTIONS = {
-    'before_options': '-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5',
-    'options': '-vn'
-}
-
-@bot.event
-async def on_ready():
-    print(f'Bot is ready. Logged in as {bot.user}')
-
-@bot.command(name='join')
-async def join(ctx):
-    if ctx.author.voice:
-        channel = ctx.author.voice.channel
-        await channel.connect()
-    else:
-        await ctx.send("You are not in a voice channel.")
-
-@bot.command(name='leave')
-async def leave(ctx):
-    if ctx.voice_client:
-        await ctx.voice_client.disconnect()
-    else:
-        await ctx.send("I'm not in a voice channel.")
-
-@bot.command(name='play')
-async def play(ctx, url):
-    if not ctx.voice_client:
-        await ctx.invoke(join)
-
-    vc = ctx.voice_client
-
-    with yt_dlp.YoutubeDL(YDL_OPTIONS) as ydl:
-        info = ydl.extract_info(url, download=False)
-        audio_url = info['url']
-
-    vc.stop()
-    vc.play(discord.FFmpegPCMAudio(audio_url, **FFMPEG_OPTIONS))
-    await ctx.send(f'Now playing: {info["title"]}')
-
-@bot.command(name='stop')
-async def stop(ctx):
-    if ctx.voice_client:
-        ctx.voice_client.stop()
-        await ctx.send("Playback stopped.")
-
-# Replace 'YOUR_TOKEN_HERE' with your bot's token
-bot.run('YOUR_TOKEN_HERE')
+from discord import app_commands
+from config import BOT_CONFIG, COLORS
+from utils.audio_cache import AudioCache
+from utils.cooldowns import command_cooldown
+from utils.helpers import time_format, truncate_string
+from utils.player import GuildPlayer, PlaylistSource, QueueFull, Track
+from utils.resolver import ResolverTimeout, TrackResolver, is_playlist_url
+from utils.voice_sessions import SessionLimitReached, VoiceSessionManager
+
+logger = logging.getLogger(__name__)
+
+class Music(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.players = {}  # guild id -> GuildPlayer
+        self.resolver = TrackResolver()
+        cluster = bot.cluster
+        self.audio_cache = AudioCache.from_config(f"cluster-{cluster.cluster_id}" if cluster.is_clustered else None)
+        self.sessions = VoiceSessionManager()
+
+    async def cog_load(self):
+        self.sessions.start(self.is_active, self.reclaim)
+
+    async def cog_unload(self):
+        self.sessions.stop()
+        for player in list(self.players.values()):
+            await player.stop()
+        self.players.clear()
+        self.resolver.close()
+        if self.audio_cache:
+            await self.audio_cache.close()
+
+    async def resolve(self, query):
+        """Resolve a query in the resolver's process pool"""
+        return await self.resolver.resolve(query)
+
+    def is_active(self, guild_id):
+        """Whether a guild's voice session is playing to at least one listener"""
+        guild = self.bot.get_guild(guild_id)
+        voice_client = guild.voice_client if guild else None
+        if not voice_client or not voice_client.is_connected() or not voice_client.is_playing():
+            return False
+        return any(not member.bot for member in voice_client.channel.members)
+
+    async def reclaim(self, guild_id):
+        """Tear down an idle voice session"""
+        logger.info(f"Disconnecting idle voice session in guild {guild_id}")
+        player = self.players.pop(guild_id, None)
+        if player:
+            await player.stop()
+            return
+        guild = self.bot.get_guild(guild_id)
+        if guild and guild.voice_client:
+            await guild.voice_client.disconnect()
+
+    @commands.Cog.listener()
+    async def on_voice_state_update(self, member, before, after):
+        """Keep sessions in step when the bot is moved or disconnected externally"""
+        if member.id != self.bot.user.id:
+            return
+        if after.channel is None:
+            self.sessions.close(member.guild.id)
+            player = self.players.pop(member.guild.id, None)
+            if player:
+                await player.stop()
+        elif member.guild.id in self.sessions:
+            self.sessions.open(member.guild.id, after.channel.id)
+
+    def get_player(self, guild):
+        """Get or create the player for a guild"""
+        player = self.players.get(guild.id)
+        if not player:
+            player = GuildPlayer(guild, self.resolve, cache=self.audio_cache)
+            self.players[guild.id] = player
+        return player
+
+    def track_embed(self, title, track):
+        """Build an embed describing a track"""
+        embed = discord.Embed(
+            title=title,
+            description=f"[{track.title}]({track.webpage_url})" if track.webpage_url else track.title,
+            color=COLORS['music']
+        )
+        embed.add_field(name="Duration", value=time_format(track.duration), inline=True)
+        if track.requester:
+            embed.add_field(name="Requested by", value=track.requester.mention, inline=True)
+        if track.thumbnail:
+            embed.set_thumbnail(url=track.thumbnail)
+        return embed
+
+    @app_commands.command(name="play", description="Play a song from YouTube")
+    @command_cooldown()
+    @app_commands.describe(song="A URL or search query")
+    async def play(self, interaction: discord.Interaction, song: str):
+        """Queue a song and start playback if idle"""
+        if not interaction.user.voice:
+            await interaction.response.send_message("❌ You are not in a voice channel!")
+            return
+
+        # Extraction can take a few seconds
+        await interaction.response.defer()
+
+        channel = interaction.user.voice.channel
+        voice_client = interaction.guild.voice_client
+        try:
+            self.sessions.open(interaction.guild.id, channel.id)
+        except SessionLimitReached:
+            await interaction.followup.send("❌ Too many servers are playing music right now, try again later!")
+            return
+        if not voice_client:
+            try:
+                await channel.connect()
+            except Exception:
+                self.sessions.close(interaction.guild.id)
+                raise
+        elif voice_client.channel != channel:
+            await voice_client.move_to(channel)
+
+        player = self.get_player(interaction.guild)
+        was_idle = player.current is None and not player.queue
+
+        if is_playlist_url(song):
+            await self.queue_playlist(interaction, player, song)
+            return
+
+        track = Track(song, interaction.user)
+        try:
+            await track.prepare(self.resolve)
+        except ResolverTimeout:
+            await interaction.followup.send("❌ Timed out loading that song, try again later!")
+            return
+        except Exception as e:
+            await interaction.followup.send(f"❌ Could not load that song: {e}")
+            return
+
+        try:
+            position = player.enqueue(track)
+        except QueueFull:
+            await interaction.followup.send(f"❌ The queue is full! ({BOT_CONFIG['max_queue_size']} songs max)")
+            return
+
+        if was_idle:
+            embed = self.track_embed("🎵 Now Playing", track)
+        else:
+            embed = self.track_embed("📝 Added to Queue", track)
+            embed.add_field(name="Position", value=position, inline=True)
+        await interaction.followup.send(embed=embed)
+
+    async def queue_playlist(self, interaction, player, url):
+        """Queue a playlist, loading only its first page up front"""
+        if len(player.queue) >= player.max_size:
+            await interaction.followup.send(f"❌ The queue is full! ({BOT_CONFIG['max_queue_size']} songs max)")
+            return
+
+        playlist = PlaylistSource(url, self.resolver.playlist_page, interaction.user)
+        await player.add_playlist(playlist)
+
+        if not playlist.taken:
+            await interaction.followup.send("❌ Could not load any songs from that playlist!")
+            return
+
+        more = "" if playlist.exhausted else " (more will load as the queue plays)"
+        title = playlist.title or "playlist"
+        await interaction.followup.send(f"📃 Queued {playlist.taken} songs from **{truncate_string(title, 100)}**{more}")
+
+    @app_commands.command(name="pause", description="Pause current song")
+    async def pause(self, interaction: discord.Interaction):
+        """Pause playback"""
+        player = self.players.get(interaction.guild.id)
+        if not player or not player.pause():
+            await interaction.response.send_message("❌ Nothing is playing!")
+            return
+
+        await interaction.response.send_message("⏸️ Paused")
+
+    @app_commands.command(name="resume", description="Resume paused song")
+    async def resume(self, interaction: discord.Interaction):
+        """Resume playback"""
+        player = self.players.get(interaction.guild.id)
+        if not player or not player.resume():
+            await interaction.response.send_message("❌ Nothing is paused!")
+            return
+
+        await interaction.response.send_message("▶️ Resumed")
+
+    @app_commands.command(name="stop", description="Stop music and disconnect")
+    async def stop(self, interaction: discord.Interaction):
+        """Stop playback, clear the queue and disconnect"""
+        player = self.players.pop(interaction.guild.id, None)
+        self.sessions.close(interaction.guild.id)
+        if player:
+            await player.stop()
+        elif interaction.guild.voice_client:
+            await interaction.guild.voice_client.disconnect()
+        else:
+            await interaction.response.send_message("❌ I'm not in a voice channel!")
+            return
+
+        await interaction.response.send_message("⏹️ Stopped playback and disconnected")
+
+    @app_commands.command(name="skip", description="Skip current song")
+    @command_cooldown()
+    async def skip(self, interaction: discord.Interaction):
+        """Skip to the next song in the queue"""
+        player = self.players.get(interaction.guild.id)
+        if not player or not player.current:
+            await interaction.response.send_message("❌ Nothing is playing!")
+            return
+
+        skipped = player.current
+        player.skip()
+        await interaction.response.send_message(f"⏭️ Skipped **{skipped.title}**")
+
+    @app_commands.command(name="queue", description="Show current queue")
+    @command_cooldown()
+    async def queue(self, interaction: discord.Interaction):
+        """Show the current song and upcoming queue"""
+        player = self.players.get(interaction.guild.id)
+        if not player or (not player.current and not player.queue):
+            await interaction.response.send_message("📭 The queue is empty!")
+            return
+
+        embed = discord.Embed(title="🎶 Queue", color=COLORS['music'])
+        if player.current:
+            embed.add_field(name="Now Playing", value=truncate_string(player.current.title), inline=False)
+
+        upcoming = [
+            f"`{i}.` {truncate_string(track.title, 80)}"
+            for i, track in enumerate(list(player.queue)[:10], start=1)
+        ]
+        if upcoming:
+            embed.add_field(name="Up Next", value="\n".join(upcoming), inline=False)
+
+        footer = f"{len(player.queue)} songs in queue"
+        if player.playlists:
+            footer += f" • {len(player.playlists)} playlist(s) still loading"
+        embed.set_footer(text=footer)
+        await interaction.response.send_message(embed=embed)
+
+    @app_commands.command(name="volume", description="Set volume")
+    @command_cooldown()
+    @app_commands.describe(volume="Volume from 1 to 100 (100 plays Opus streams without re-encoding)")
+    async def volume(self, interaction: discord.Interaction, volume: app_commands.Range[int, 1, 100]):
+        """Set the playback volume
+        
+        Any volume but 100% runs the stream through ffmpeg's volume filter and
+        re-encodes it, so Opus passthrough only happens at 100%.
+        """
+        player = self.players.get(interaction.guild.id)
+        if not player:
+            await interaction.response.send_message("❌ Nothing is playing!")
+            return
+
+        player.set_volume(volume)
+        await interaction.response.send_message(f"🔊 Volume set to {volume}%")
+
+    @app_commands.command(name="nowplaying", description="Show current song")
+    async def nowplaying(self, interaction: discord.Interaction):
+        """Show the song currently playing"""
+        player = self.players.get(interaction.guild.id)
+        if not player or not player.current:
+            await interaction.response.send_message("❌ Nothing is playing!")
+            return
+
+        embed = self.track_embed("🎵 Now Playing", player.current)
+        embed.add_field(name="Volume", value=f"{int(player.volume * 100)}%", inline=True)
+        await interaction.response.send_message(embed=embed)
+
+async def setup(bot):
+    await bot.add_cog(Music(bot))
@@ -1,15 +1,202 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
+import asyncio
 import json
+import logging
 import os
-from config import BOT_CONFIG, COLORS
-from utils.database import Database
+from config import BOT_CONFIG, CLUSTER_CONFIG, COLORS
+from utils.cooldowns import command_cooldown
+from utils.helpers import chunk_list, parse_time
+from utils.pagination import Paginator
+
+logger = logging.getLogger(__name__)
+
+BULK_BAN_LIMIT = 200  # Most users Guild.bulk_ban accepts per request
 
 class Owner(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.db = Database()
+        self.db = bot.db
+        self.fanout = bot.fanout
+
+    async def cog_load(self):
+        self.bot.scheduler.register('global_unmute', self.expire_global_mute)
+        self.bot.cluster.register('global_action', self.handle_global_action)
+        self.bot.cluster.register('guild_summary', self.handle_guild_summary)
+        self.bot.cluster.register('leave_guild', self.handle_leave_guild)
+        self.bot.cluster.register('refresh_global_bans', self.handle_refresh_global_bans)
+
+    async def cog_unload(self):
+        self.bot.scheduler.unregister('global_unmute')
+        for op in ('global_action', 'guild_summary', 'leave_guild', 'refresh_global_bans'):
+            self.bot.cluster.unregister(op)
+
+    async def get_mute_role(self, guild, create=True):
+        """Resolve a guild's mute role through the moderation cog's cache"""
+        moderation = self.bot.get_cog('Moderation')
+        if moderation:
+            return await moderation.get_mute_role(guild, create=create)
+
+        mute_role = discord.utils.get(guild.roles, name=BOT_CONFIG['mute_role_name'])
+        if not mute_role and create:
+            mute_role = await guild.create_role(
+                name=BOT_CONFIG['mute_role_name'],
+                permissions=discord.Permissions(send_messages=False, speak=False)
+            )
+        return mute_role
+
+    # Per-guild steps of the global commands. They only take IPC-safe
+    # arguments so any cluster can run them on the guilds it holds.
+    async def ban_in_guild(self, guild, user_id, reason):
+        await guild.ban(discord.Object(id=user_id), reason=f"Global ban by owner: {reason}")
+        return True
+
+    async def kick_in_guild(self, guild, user_id, reason):
+        member = guild.get_member(user_id)
+        if not member:
+            return False
+        await member.kick(reason=f"Global kick by owner: {reason}")
+        return True
+
+    async def mute_in_guild(self, guild, user_id, reason):
+        member = guild.get_member(user_id)
+        if not member:
+            return False
+
+        # Create or get mute role
+        mute_role = await self.get_mute_role(guild)
+        await member.add_roles(mute_role, reason=f"Global mute by owner: {reason}")
+        return True
+
+    async def unmute_in_guild(self, guild, user_id, reason):
+        member = guild.get_member(user_id)
+        mute_role = await self.get_mute_role(guild, create=False)
+        if not member or not mute_role or mute_role not in member.roles:
+            return False
+        await member.remove_roles(mute_role, reason=reason)
+        return True
+
+    async def run_local_action(self, action, user_id, reason, on_progress=None):
+        """Run a global action on this cluster's servers"""
+        guild_action, route = {
+            'ban': (self.ban_in_guild, 'ban'),
+            'kick': (self.kick_in_guild, 'kick'),
+            'mute': (self.mute_in_guild, 'member'),
+            'unmute': (self.unmute_in_guild, 'member')
+        }[action]
+
+        results = await self.fanout.run(
+            list(self.bot.guilds),
+            lambda guild: guild_action(guild, user_id, reason),
+            route=lambda guild: (route, guild.id),
+            on_progress=on_progress
+        )
+        return {
+            'succeeded': [result.target.name for result in results if result.ok and result.value],
+            'failed': [result.target.name for result in results if not result.ok],
+            'total': len(results)
+        }
+
+    async def handle_global_action(self, data):
+        return await self.run_local_action(data['action'], data['user_id'], data['reason'])
+
+    async def run_global_action(self, action, user_id, reason, on_progress=None):
+        """Run a global action on every cluster and merge the outcomes"""
+        cluster = self.bot.cluster
+        data = {'action': action, 'user_id': user_id, 'reason': reason}
+        outcomes = await asyncio.gather(*(
+            self.run_local_action(action, user_id, reason, on_progress)
+            if cluster_id == cluster.cluster_id
+            else cluster.request(cluster_id, 'global_action', data, timeout=CLUSTER_CONFIG['action_timeout'])
+            for cluster_id in range(cluster.cluster_count)
+        ), return_exceptions=True)
+
+        merged = {'succeeded': [], 'failed': [], 'total': 0, 'unreachable': []}
+        for cluster_id, outcome in enumerate(outcomes):
+            if isinstance(outcome, BaseException):
+                merged['unreachable'].append(cluster_id)
+                continue
+            merged['succeeded'].extend(outcome['succeeded'])
+            merged['failed'].extend(outcome['failed'])
+            merged['total'] += outcome['total']
+        return merged
+
+    async def run_fanout(self, interaction, title, action, user_id, reason):
+        """Run a global action on every server, editing a progress message"""
+        cluster = self.bot.cluster
+        scope = f" on this cluster (1 of {cluster.cluster_count})" if cluster.is_clustered else ""
+        progress = await interaction.followup.send(f"⏳ {title}: 0/{len(self.bot.guilds)} servers{scope}", wait=True)
+
+        async def on_progress(done, total):
+            try:
+                await progress.edit(content=f"⏳ {title}: {done}/{total} servers{scope}")
+            except discord.HTTPException:
+                pass
+
+        outcome = await self.run_global_action(action, user_id, reason, on_progress)
+        return outcome, progress
+
+    def add_unreachable_field(self, embed, outcome):
+        if outcome['unreachable']:
+            embed.add_field(
+                name="Unreachable clusters",
+                value=", ".join(str(cluster_id) for cluster_id in outcome['unreachable']),
+                inline=False
+            )
+
+    # Enforcement for users who arrive after their global ban. The ban set
+    # lives in memory, so a join costs one set lookup even during a raid.
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        if not await self.db.is_globally_banned(member.id):
+            return
+        if not member.guild.me.guild_permissions.ban_members:
+            return
+        try:
+            await member.ban(reason="Global ban: joined while globally banned")
+        except discord.HTTPException as e:
+            logger.warning(f"Could not ban globally banned {member.id} in {member.guild.id}: {e}")
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild):
+        """Apply every global ban to a newly joined server in bulk"""
+        permissions = guild.me.guild_permissions
+        if not (permissions.ban_members and permissions.manage_guild):
+            return
+
+        user_ids = sorted(await self.db.get_global_ban_ids() - {guild.owner_id})
+        banned = failed = 0
+        for chunk in chunk_list(user_ids, BULK_BAN_LIMIT):
+            try:
+                result = await guild.bulk_ban(
+                    [discord.Object(id=user_id) for user_id in chunk],
+                    reason="Global ban: applied on join"
+                )
+            except discord.HTTPException as e:
+                logger.warning(f"Bulk ban failed in {guild.id}: {e}")
+                failed += len(chunk)
+                continue
+            banned += len(result.banned)
+            failed += len(result.failed)
+
+        if user_ids:
+            logger.info(f"Applied global bans to {guild.id}: {banned} banned, {failed} failed")
+
+    async def handle_refresh_global_bans(self, data):
+        await self.db.refresh_global_bans()
+        return True
+
+    async def refresh_other_clusters(self):
+        """Make other clusters reload the ban set after it changed here"""
+        cluster = self.bot.cluster
+        if not cluster.is_clustered:
+            return
+        await asyncio.gather(*(
+            cluster.request(cluster_id, 'refresh_global_bans')
+            for cluster_id in range(cluster.cluster_count)
+            if cluster_id != cluster.cluster_id
+        ), return_exceptions=True)
 
     @app_commands.command(name="gban", description="Globally ban a user across all servers")
     @app_commands.describe(user_id="The user ID to ban", reason="Reason for the global ban")
@@ -34,18 +221,13 @@ class Owner(commands.Cog):
         await interaction.response.defer()
 
         # Add to global ban list
-        self.db.add_global_ban(user.id, reason, interaction.user.id)
+        await self.db.add_global_ban(user.id, reason, interaction.user.id, str(user))
+        await self.refresh_other_clusters()
 
         # Ban from all servers where bot has permission
-        banned_servers = []
-        failed_servers = []
-
-        for guild in self.bot.guilds:
-            try:
-                await guild.ban(user, reason=f"Global ban by owner: {reason}")
-                banned_servers.append(guild.name)
-            except (discord.Forbidden, discord.HTTPException):
-                failed_servers.append(guild.name)
+        outcome, progress = await self.run_fanout(interaction, "Global ban", 'ban', user.id, reason)
+        banned_servers = outcome['succeeded']
+        failed_servers = outcome['failed']
 
         embed = discord.Embed(
             title="🌍 Global Ban Executed",
@@ -58,8 +240,9 @@ class Owner(commands.Cog):
 
         if failed_servers and len(failed_servers) <= 5:
             embed.add_field(name="Failed servers", value="\n".join(failed_servers), inline=False)
+        self.add_unreachable_field(embed, outcome)
 
-        await interaction.followup.send(embed=embed)
+        await progress.edit(content=None, embed=embed)
 
     @app_commands.command(name="gunban", description="Remove a user from global ban list")
     @app_commands.describe(user_id="The user ID to unban")
@@ -77,7 +260,8 @@ class Owner(commands.Cog):
             return
 
         # Remove from global ban list
-        if self.db.remove_global_ban(user.id):
+        if await self.db.remove_global_ban(user.id):
+            await self.refresh_other_clusters()
             embed = discord.Embed(
                 title="✅ Global Ban Removed",
                 description=f"Removed {user.mention} ({user}) from global ban list",
@@ -110,17 +294,9 @@ class Owner(commands.Cog):
         await interaction.response.defer()
 
         # Kick from all servers
-        kicked_servers = []
-        failed_servers = []
-
-        for guild in self.bot.guilds:
-            try:
-                member = guild.get_member(user.id)
-                if member:
-                    await member.kick(reason=f"Global kick by owner: {reason}")
-                    kicked_servers.append(guild.name)
-            except (discord.Forbidden, discord.HTTPException):
-                failed_servers.append(guild.name)
+        outcome, progress = await self.run_fanout(interaction, "Global kick", 'kick', user.id, reason)
+        kicked_servers = outcome['succeeded']
+        failed_servers = outcome['failed']
 
         embed = discord.Embed(
             title="🌍 Global Kick Executed",
@@ -130,8 +306,9 @@ class Owner(commands.Cog):
         embed.add_field(name="Reason", value=reason, inline=False)
         embed.add_field(name="Kicked from", value=f"{len(kicked_servers)} servers", inline=True)
         embed.add_field(name="Failed", value=f"{len(failed_servers)} servers", inline=True)
+        self.add_unreachable_field(embed, outcome)
 
-        await interaction.followup.send(embed=embed)
+        await progress.edit(content=None, embed=embed)
 
     @app_commands.command(name="gmute", description="Globally mute a user across all servers")
     @app_commands.describe(user_id="The user ID to mute", time="Duration (e.g., 10m, 1h, 1d)", reason="Reason for the global mute")
@@ -155,29 +332,17 @@ class Owner(commands.Cog):
         # Defer response since this might take time
         await interaction.response.defer()
 
-        # Add to global mute list
-        self.db.add_global_mute(user.id, reason, interaction.user.id, time)
+        # Add to global mute list and schedule its expiry
+        duration = parse_time(time)
+        await self.db.add_global_mute(user.id, reason, interaction.user.id, duration)
+        await self.bot.scheduler.cancel('global_unmute', None, user.id)
+        if duration:
+            await self.bot.scheduler.schedule('global_unmute', None, user.id, duration)
 
         # Mute in all servers
-        muted_servers = []
-        failed_servers = []
-
-        for guild in self.bot.guilds:
-            try:
-                member = guild.get_member(user.id)
-                if member:
-                    # Create or get mute role
-                    mute_role = discord.utils.get(guild.roles, name=BOT_CONFIG['mute_role_name'])
-                    if not mute_role:
-                        mute_role = await guild.create_role(
-                            name=BOT_CONFIG['mute_role_name'],
-                            permissions=discord.Permissions(send_messages=False, speak=False)
-                        )
-
-                    await member.add_roles(mute_role, reason=f"Global mute by owner: {reason}")
-                    muted_servers.append(guild.name)
-            except (discord.Forbidden, discord.HTTPException):
-                failed_servers.append(guild.name)
+        outcome, progress = await self.run_fanout(interaction, "Global mute", 'mute', user.id, reason)
+        muted_servers = outcome['succeeded']
+        failed_servers = outcome['failed']
 
         embed = discord.Embed(
             title="🌍 Global Mute Executed",
@@ -188,42 +353,56 @@ class Owner(commands.Cog):
         embed.add_field(name="Reason", value=reason, inline=False)
         embed.add_field(name="Muted in", value=f"{len(muted_servers)} servers", inline=True)
         embed.add_field(name="Failed", value=f"{len(failed_servers)} servers", inline=True)
+        self.add_unreachable_field(embed, outcome)
 
-        await interaction.followup.send(embed=embed)
+        await progress.edit(content=None, embed=embed)
+
+    async def expire_global_mute(self, timer):
+        """Lift an expired global mute in every server"""
+        user_id = timer['user_id']
+        await self.db.remove_global_mute(user_id)
+        await self.run_global_action('unmute', user_id, "Global mute expired")
 
     @app_commands.command(name="gbans", description="List all globally banned users")
+    @command_cooldown()
     async def global_bans(self, interaction: discord.Interaction):
         """List all globally banned users"""
         if interaction.user.id != BOT_CONFIG['owner_id']:
             await interaction.response.send_message("❌ Only the bot owner can use this command!")
             return
-            
-        global_bans = self.db.get_global_bans()
 
-        if not global_bans:
-            await interaction.response.send_message("✅ No global bans found!")
+        await interaction.response.defer()
+        total = await self.db.count_global_bans()
+        if not total:
+            await interaction.followup.send("✅ No global bans found!")
             return
 
-        embed = discord.Embed(
-            title="🌍 Global Bans",
-            color=COLORS['moderation']
-        )
-
-        for ban in global_bans[-10:]:  # Show last 10 bans
-            try:
-                user = await self.bot.fetch_user(ban['user_id'])
-                user_info = f"{user.name}#{user.discriminator}"
-            except:
-                user_info = f"Unknown User ({ban['user_id']})"
+        per_page = 10
+        page_count = (total + per_page - 1) // per_page
 
-            embed.add_field(
-                name=user_info,
-                value=f"**Reason:** {ban['reason']}\n**Date:** {ban['timestamp']}",
-                inline=False
+        async def render(page):
+            bans = await self.db.get_global_bans_page(page * per_page, per_page)
+            # Bans recorded before names were stored fall back to a (cached) lookup
+            users = await self.bot.user_resolver.resolve_many(
+                ban['user_id'] for ban in bans if not ban.get('user_name')
             )
 
-        embed.set_footer(text=f"Total global bans: {len(global_bans)}")
-        await interaction.response.send_message(embed=embed)
+            embed = discord.Embed(
+                title="🌍 Global Bans",
+                color=COLORS['moderation']
+            )
+            for ban in bans:
+                user = users.get(ban['user_id'])
+                user_info = ban.get('user_name') or (str(user) if user else f"Unknown User ({ban['user_id']})")
+                embed.add_field(
+                    name=user_info,
+                    value=f"**ID:** {ban['user_id']}\n**Reason:** {ban['reason']}\n**Date:** {ban['timestamp']}",
+                    inline=False
+                )
+            embed.set_footer(text=f"Page {page + 1}/{page_count} • Total global bans: {total}")
+            return embed
+
+        await Paginator(render, page_count, interaction.user.id).send(interaction)
 
     @app_commands.command(name="reload", description="Reload a specific cog")
     @app_commands.describe(cog_name="The name of the cog to reload")
@@ -243,21 +422,39 @@ class Owner(commands.Cog):
         except Exception as e:
             await interaction.response.send_message(f"❌ Error reloading cog: {e}")
 
+    async def handle_guild_summary(self, data):
+        return [
+            {'id': guild.id, 'name': guild.name, 'member_count': guild.member_count}
+            for guild in self.bot.guilds
+        ]
+
     @app_commands.command(name="servers", description="List all servers the bot is in")
+    @command_cooldown()
     async def list_servers(self, interaction: discord.Interaction):
         """List all servers the bot is in"""
         if interaction.user.id != BOT_CONFIG['owner_id']:
             await interaction.response.send_message("❌ Only the bot owner can use this command!")
             return
-            
+
+        # Other clusters may take a moment to answer
+        await interaction.response.defer()
+
+        guilds = []
+        unreachable = []
+        for cluster_id, summary in (await self.bot.cluster.broadcast('guild_summary')).items():
+            if isinstance(summary, BaseException):
+                unreachable.append(str(cluster_id))
+            else:
+                guilds.extend(summary)
+
         embed = discord.Embed(
             title="🌍 Bot Servers",
             color=COLORS['info']
         )
 
         server_list = []
-        for guild in self.bot.guilds:
-            server_list.append(f"**{guild.name}** ({guild.id}) - {guild.member_count} members")
+        for guild in guilds:
+            server_list.append(f"**{guild['name']}** ({guild['id']}) - {guild['member_count']} members")
 
         # Split into chunks if too long
         for i in range(0, len(server_list), 10):
@@ -268,9 +465,62 @@ class Owner(commands.Cog):
                 inline=False
             )
 
-        embed.set_footer(text=f"Total servers: {len(self.bot.guilds)}")
+        footer = f"Total servers: {len(guilds)}"
+        if self.bot.cluster.is_clustered:
+            footer += f" across {self.bot.cluster.cluster_count} clusters"
+        if unreachable:
+            footer += f" (clusters {', '.join(unreachable)} unreachable)"
+        embed.set_footer(text=footer)
+        await interaction.followup.send(embed=embed)
+
+    @app_commands.command(name="musicstats", description="Show voice session and resolver stats")
+    async def music_stats(self, interaction: discord.Interaction):
+        """Show voice session counts and resolver/cache stats for this process"""
+        if interaction.user.id != BOT_CONFIG['owner_id']:
+            await interaction.response.send_message("❌ Only the bot owner can use this command!")
+            return
+
+        music = self.bot.get_cog('Music')
+        if not music:
+            await interaction.response.send_message("❌ The music cog is not loaded!")
+            return
+
+        embed = discord.Embed(title="🎧 Music Stats", color=COLORS['music'])
+        sessions = music.sessions.stats()
+        embed.add_field(
+            name="Voice Sessions",
+            value=(
+                f"{sessions['sessions']}/{sessions['max_sessions']} connected\n"
+                f"{sessions['active']} playing, {sessions['idle']} idle\n"
+                f"{sessions['reclaimed']} reclaimed"
+            ),
+            inline=True
+        )
+        embed.add_field(
+            name="Resolver",
+            value="\n".join(f"{key}: {value:.2f}" if isinstance(value, float) else f"{key}: {value}"
+                            for key, value in music.resolver.stats().items()),
+            inline=True
+        )
+        if music.audio_cache:
+            cache = music.audio_cache.stats()
+            embed.add_field(
+                name="Audio Cache",
+                value=(
+                    f"{cache['entries']} files, {cache['bytes'] / 1024 ** 2:.1f}/{cache['max_bytes'] / 1024 ** 2:.0f} MiB\n"
+                    f"Hit rate {cache['hit_rate']:.0%}, {cache['evictions']} evictions"
+                ),
+                inline=True
+            )
         await interaction.response.send_message(embed=embed)
 
+    async def handle_leave_guild(self, data):
+        guild = self.bot.get_guild(data['guild_id'])
+        if not guild:
+            return None
+        await guild.leave()
+        return guild.name
+
     @app_commands.command(name="leave", description="Leave a specific server")
     @app_commands.describe(guild_id="The server ID to leave")
     async def leave_server(self, interaction: discord.Interaction, guild_id: str):
@@ -281,17 +531,22 @@ class Owner(commands.Cog):
             
         try:
             guild_id_int = int(guild_id)
-            guild = self.bot.get_guild(guild_id_int)
         except ValueError:
             await interaction.response.send_message("❌ Invalid server ID!")
             return
-            
-        if not guild:
+
+        # The server may belong to another cluster's shards
+        cluster = self.bot.cluster
+        try:
+            guild_name = await cluster.request(cluster.cluster_for_guild(guild_id_int), 'leave_guild', {'guild_id': guild_id_int})
+        except Exception as e:
+            await interaction.response.send_message(f"❌ Could not reach the server's cluster: {e}")
+            return
+
+        if not guild_name:
             await interaction.response.send_message("❌ Server not found!")
             return
 
-        guild_name = guild.name
-        await guild.leave()
         await interaction.response.send_message(f"✅ Left server: **{guild_name}**")
 
 async def setup(bot):
@@ -7,12 +7,136 @@ BOT_CONFIG = {
     'owner_id': 1342772842424438806,
     'owner_username': 'nikutemporary_1',
     'max_queue_size': 50,
-    'default_volume': 50,
+    'default_volume': 100,  # percent; only 100 passes Opus streams through without re-encoding
     'command_cooldown': 3,  # seconds
     'music_timeout': 300,   # seconds (5 minutes)
     'max_warnings': 5,
     'mute_role_name': 'Muted',
-    'log_channel_name': 'bot-logs'
+    'log_channel_name': 'bot-logs',
+    'command_sync_state': 'data/command_sync.json'  # hash of the last synced command tree
+}
+
+# Automatic actions when a member collects warnings. Guilds can override
+# this with /escalation. Each warning applies the highest step at or below
+# the member's count, so the default notifies on every warning from
+# max_warnings on.
+ESCALATION_CONFIG = {
+    'default': {
+        'window_days': None,  # only warnings this recent count (None for all)
+        'steps': [{'count': BOT_CONFIG['max_warnings'], 'action': 'notify'}]
+    },
+    'max_tracked_members': 10000  # members whose warning times stay in memory
+}
+
+# Automatic spam and raid handling (cogs/automod.py)
+AUTOMOD_CONFIG = {
+    'enabled': True,
+    'message_limit': 6,        # messages a member may send in message_window...
+    'message_window': 5,       # ...seconds before it counts as a flood
+    'duplicate_limit': 3,      # identical messages within duplicate_window seconds
+    'duplicate_window': 30,
+    'action': 'mute',          # 'mute' or 'kick' for flooding members
+    'mute_duration': '10m',
+    'action_cooldown': 60,     # seconds before the same member is acted on again
+    'raid_joins': 10,          # joins within raid_window seconds that start a lockdown
+    'raid_window': 10,
+    'lockdown_duration': 600,  # seconds new members are kicked after a raid
+    'max_tracked_users': 50000,  # counters kept in memory, least recently active dropped first
+    'max_tracked_guilds': 10000
+}
+
+# Slash command cooldowns (BOT_CONFIG['command_cooldown'] seconds unless a guild overrides it).
+# /kick, /ban, /unban, /mute and /unmute have none so moderators aren't slowed down during a raid.
+COOLDOWN_CONFIG = {
+    'max_tracked_keys': 50000  # (guild, user, command) buckets kept, least recently used dropped first
+}
+
+# Logging (see utils/logging_setup.py); writes happen on a background thread
+LOGGING_CONFIG = {
+    'level': 'INFO',
+    'levels': {            # per-module overrides, e.g. {'discord.gateway': 'WARNING'}
+        'discord.http': 'WARNING'
+    },
+    'file': 'bot.log',     # clusters write bot-cluster<N>.log
+    'json': False,         # one JSON object per line in the file instead of text
+    'max_bytes': 10 * 1024 * 1024,  # rotate past this size...
+    'rotate_when': None,   # ...or on a schedule instead ('midnight', 'h', ...)
+    'backup_count': 7,     # rotated files kept
+    'compress': True       # gzip rotated files
+}
+
+# Database persistence
+DATABASE_CONFIG = {
+    'backend': 'json',     # 'json' or 'sqlite'
+    'sqlite_path': 'data/bot.db',
+    'io_workers': 4,       # threads serving the async database API
+    'moderation_log_dir': 'data/moderation_logs',
+    'log_segment_size': 1024 * 1024,  # bytes per moderation log segment (JSON backend)
+    'group_commit': True,  # JSON backend: await fsync of each change, batched per window
+    'commit_window': 0.02, # seconds of changes coalesced into one group commit
+    'flush_delay': 2,      # without group commit: seconds of quiet before dirty stores are written
+    'max_staleness': 10    # without group commit: max seconds a change may stay unwritten
+}
+
+# Per-guild fan-out for global moderation commands
+FANOUT_CONFIG = {
+    'concurrency': 10,          # guilds processed at once
+    'requests_per_second': 40,  # stays under Discord's global limit of 50/s
+    'max_retries': 3,           # retries of a request answered with 429
+    'progress_interval': 2,     # seconds between progress updates
+    'max_ratelimit_timeout': 30  # per-route waits longer than this raise to FanOut (discord.py's minimum)
+}
+
+# Track resolution for music
+RESOLVER_CONFIG = {
+    'workers': 2,   # yt-dlp extraction processes
+    'timeout': 20,  # seconds before an extraction is abandoned
+    'playlist_page_size': 25  # playlist entries enumerated per extraction
+}
+
+# Cache of resolved tracks shared by every guild
+TRACK_CACHE_CONFIG = {
+    'max_entries': 1000,
+    'default_ttl': 3600,    # seconds for stream URLs without an embedded expiry
+    'refresh_margin': 600   # revalidate entries this many seconds before they expire
+}
+
+# Voice playback
+AUDIO_CONFIG = {
+    'mode': 'opus',  # 'opus': pass Opus through / encode in ffmpeg, 'pcm': encode in the bot process
+    'bitrate': 128   # kbps when ffmpeg has to encode
+}
+
+# Voice connection limits (idle sessions disconnect after BOT_CONFIG['music_timeout'])
+VOICE_CONFIG = {
+    'max_sessions': 100,   # concurrent voice connections per process
+    'check_interval': 30   # seconds between idle sweeps
+}
+
+# Users fetched over REST (e.g. for /gbans and /warnings)
+USER_CACHE_CONFIG = {
+    'ttl': 3600,          # seconds a fetched user (or a missing one) is reused
+    'max_entries': 5000,
+    'concurrency': 5      # parallel fetch_user calls
+}
+
+# Multi-process cluster mode (see launcher.py)
+CLUSTER_CONFIG = {
+    'shards_per_cluster': 4,     # used when --clusters isn't given
+    'ipc_host': '127.0.0.1',
+    'ipc_base_port': 47800,      # cluster N listens on ipc_base_port + N
+    'ipc_timeout': 10,           # seconds for quick cross-cluster queries
+    'action_timeout': 900,       # seconds for a cluster's share of /gban, /gkick, /gmute
+    'max_message_size': 16 * 1024 * 1024,
+    'restart_delay': 5           # seconds before restarting a crashed cluster
+}
+
+# Local copies of played tracks so repeat plays skip the network
+AUDIO_CACHE_CONFIG = {
+    'enabled': False,
+    'directory': 'data/audio_cache',
+    'max_bytes': 2 * 1024 ** 3,  # Least recently played files are evicted past this
+    'max_duration': 1800         # Don't cache tracks longer than this (seconds)
 }
 
 # YouTube DL options for music
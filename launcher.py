@@ -0,0 +1,129 @@
+"""Run the bot as several processes, each owning a contiguous range of shards
+
+    python launcher.py                       # recommended shard count, CLUSTER_CONFIG sizing
+    python launcher.py --shards 8 --clusters 2
+    python launcher.py --shards 8 --clusters 2 --dry-run
+
+Clusters share state through the SQLite backend and answer each other's
+owner commands over local TCP (see utils/cluster.py). A cluster that exits
+is restarted after CLUSTER_CONFIG['restart_delay'] seconds.
+"""
+import argparse
+import asyncio
+import logging
+import math
+import multiprocessing
+import os
+import secrets
+import signal
+import time
+import aiohttp
+import bot
+from config import CLUSTER_CONFIG, DATABASE_CONFIG
+from utils.cluster import shard_ranges
+from utils.logging_setup import setup_logging
+from utils.storage.migrate import needs_migration
+
+logger = logging.getLogger('launcher')
+
+async def recommended_shards(token):
+    """Ask Discord how many shards the bot should run"""
+    async with aiohttp.ClientSession() as session:
+        async with session.get(
+            'https://discord.com/api/v10/gateway/bot',
+            headers={'Authorization': f"Bot {token}"}
+        ) as response:
+            response.raise_for_status()
+            return (await response.json())['shards']
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the bot as a multi-process cluster")
+    parser.add_argument('--shards', type=int, help="total shard count (default: Discord's recommendation)")
+    parser.add_argument('--clusters', type=int, help="number of processes (default: shards / shards_per_cluster)")
+    parser.add_argument('--sync', action='store_true', help="force a slash command sync on the primary cluster")
+    parser.add_argument('--dry-run', action='store_true', help="print the shard layout and exit")
+    return parser.parse_args()
+
+class Launcher:
+    """Starts one process per shard range and restarts the ones that die"""
+
+    def __init__(self, ranges, shard_count, force_sync=False):
+        self.ranges = ranges
+        self.shard_count = shard_count
+        self.force_sync = force_sync
+        self.secret = secrets.token_hex(16)
+        self.context = multiprocessing.get_context('spawn')
+        self.processes = {}  # cluster id -> Process
+        self.restart_at = {}  # cluster id -> monotonic time
+        self.stopping = False
+
+    def spawn(self, cluster_id):
+        process = self.context.Process(
+            target=bot.run_cluster,
+            name=f"cluster-{cluster_id}",
+            args=(cluster_id, len(self.ranges), self.ranges[cluster_id], self.shard_count, self.secret),
+            kwargs={'force_sync': self.force_sync and cluster_id == 0}
+        )
+        process.start()
+        self.processes[cluster_id] = process
+        logger.info(f"Cluster {cluster_id} started (pid {process.pid}, shards {self.ranges[cluster_id]})")
+
+    def stop(self, *_):
+        self.stopping = True
+
+    def run(self):
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+        for cluster_id in range(len(self.ranges)):
+            self.spawn(cluster_id)
+
+        while not self.stopping:
+            time.sleep(1)
+            now = time.monotonic()
+            for cluster_id, process in list(self.processes.items()):
+                if process.is_alive():
+                    continue
+                if cluster_id not in self.restart_at:
+                    logger.warning(f"Cluster {cluster_id} exited with code {process.exitcode}; restarting")
+                    self.restart_at[cluster_id] = now + CLUSTER_CONFIG['restart_delay']
+                elif now >= self.restart_at[cluster_id]:
+                    del self.restart_at[cluster_id]
+                    self.spawn(cluster_id)
+
+        logger.info("Stopping clusters")
+        for process in self.processes.values():
+            if process.is_alive():
+                process.terminate()
+        for process in self.processes.values():
+            process.join(timeout=30)
+
+def main():
+    args = parse_args()
+    setup_logging('launcher')
+    token = os.getenv('DISCORD_TOKEN')
+    if not token and not (args.dry_run and args.shards):
+        logger.error("DISCORD_TOKEN environment variable not found!")
+        return
+
+    shard_count = args.shards or asyncio.run(recommended_shards(token))
+    cluster_count = args.clusters or math.ceil(shard_count / CLUSTER_CONFIG['shards_per_cluster'])
+    ranges = shard_ranges(shard_count, cluster_count)
+
+    for cluster_id, shard_ids in enumerate(ranges):
+        logger.info(f"Cluster {cluster_id}: shards {shard_ids[0]}-{shard_ids[-1]}")
+    if args.dry_run:
+        return
+
+    # JSON files are per-process write-back caches; only SQLite is safe to share
+    if len(ranges) > 1 and DATABASE_CONFIG['backend'] != 'sqlite':
+        logger.error("Running more than one cluster needs DATABASE_CONFIG['backend'] = 'sqlite'")
+        return
+    if needs_migration():
+        logger.error("The JSON store has data the SQLite database lacks; run `python -m utils.storage.migrate` first")
+        return
+
+    os.makedirs('data', exist_ok=True)
+    Launcher(ranges, shard_count, force_sync=args.sync).run()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import time
+from config import AUTOMOD_CONFIG
+from utils.ratelimit import SlidingWindows, TokenBuckets
+
+class SpamDetector:
+    """Flags message floods, repeated messages and join raids
+
+    Everything is kept in bounded in-memory counters, so a check is a
+    couple of dict operations and memory stays flat no matter how many
+    users are active:
+
+    - message rate: a token bucket per (guild, member)
+    - duplicates: a sliding window per (guild, member, content hash)
+    - joins: a sliding window per guild
+    """
+
+    def __init__(self, config=None):
+        config = config or AUTOMOD_CONFIG
+        max_keys = config['max_tracked_users']
+        self.messages = TokenBuckets(
+            config['message_limit'] / config['message_window'],
+            config['message_limit'],
+            max_keys
+        )
+        self.duplicates = SlidingWindows(config['duplicate_limit'], config['duplicate_window'], max_keys)
+        self.joins = SlidingWindows(config['raid_joins'], config['raid_window'], config['max_tracked_guilds'])
+
+    def check_message(self, guild_id, user_id, content, now=None):
+        """Return 'flood', 'duplicate' or None for a new message"""
+        now = time.monotonic() if now is None else now
+        if self.messages.hit((guild_id, user_id), now):
+            return 'flood'
+        if content and self.duplicates.hit((guild_id, user_id, hash(content)), now):
+            return 'duplicate'
+        return None
+
+    def check_join(self, guild_id, now=None):
+        """True when this join pushes the guild over the raid threshold"""
+        return self.joins.hit(guild_id, now)
+
+    def forget(self, guild_id, user_id):
+        """Give a member a clean message rate once they have been dealt with"""
+        self.messages.reset((guild_id, user_id))
+
+    def stats(self):
+        return {
+            'members': len(self.messages),
+            'duplicate_keys': len(self.duplicates),
+            'guilds': len(self.joins)
+        }
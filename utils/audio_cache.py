@@ -0,0 +1,259 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from config import AUDIO_CACHE_CONFIG, FFMPEG_OPTS
+from utils.storage.files import atomic_write
+
+logger = logging.getLogger(__name__)
+
+class AudioCache:
+    """Disk cache of audio streams bounded by a byte budget
+
+    The first play of a track is copied to disk by a background ffmpeg
+    (audio stream copy, no re-encode) while it streams. This is a second
+    fetch of the upstream URL rather than a tee of the player's ffmpeg,
+    which is restarted at an offset on every volume change. Repeat plays
+    are then served from the local file.
+
+    Only tracks of known duration are copied, and each download is capped
+    with ffmpeg's -fs at duration * MAX_BYTES_PER_SECOND. Running downloads
+    together never reserve more than max_bytes. Files are tracked in an
+    index kept in least-recently-used order, and the oldest entries are
+    evicted once the total size exceeds max_bytes. Index writes are
+    batched over SAVE_DELAY seconds and done on a worker thread.
+    """
+
+    EXTENSION = '.mka'  # Matroska holds any audio codec, so Opus stays Opus
+    SAVE_DELAY = 5
+    MAX_BYTES_PER_SECOND = 320 * 1000 // 8  # 320 kbps, above any bestaudio stream
+
+    def __init__(self, directory, max_bytes, max_duration=None, ffmpeg='ffmpeg'):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_duration = max_duration
+        self.ffmpeg = ffmpeg
+        self.index_path = os.path.join(directory, 'index.json')
+        self._entries = OrderedDict()  # key -> {'file', 'size', 'last_used'}
+        self._downloads = {}  # key -> Task
+        self._reserved = 0  # bytes the running downloads may still write
+        self._save_task = None
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    @classmethod
+    def from_config(cls, namespace=None):
+        """Build the cache from AUDIO_CACHE_CONFIG, or None when disabled
+
+        Processes must not share an index, so each cluster passes its own
+        namespace and gets a subdirectory.
+        """
+        if not AUDIO_CACHE_CONFIG['enabled']:
+            return None
+        directory = AUDIO_CACHE_CONFIG['directory']
+        if namespace is not None:
+            directory = os.path.join(directory, str(namespace))
+        return cls(
+            directory,
+            AUDIO_CACHE_CONFIG['max_bytes'],
+            AUDIO_CACHE_CONFIG['max_duration']
+        )
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def _load_index(self):
+        """Load the index, dropping entries whose files are gone and stray files"""
+        try:
+            with open(self.index_path, 'r') as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            entries = {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Discarding unreadable audio cache index: {e}")
+            entries = {}
+
+        for key, entry in sorted(entries.items(), key=lambda item: item[1]['last_used']):
+            if os.path.exists(os.path.join(self.directory, entry['file'])):
+                self._entries[key] = entry
+                self.total_bytes += entry['size']
+
+        # Partial downloads and files evicted before the index was saved
+        known = {entry['file'] for entry in self._entries.values()}
+        for name in os.listdir(self.directory):
+            if name != 'index.json' and name not in known:
+                self._remove_file(name)
+
+        self._evict()
+
+    def _schedule_save(self):
+        """Write the index SAVE_DELAY seconds from now unless a write is already pending"""
+        if self._save_task is None or self._save_task.done():
+            self._save_task = asyncio.create_task(self._save_later())
+
+    async def _save_later(self):
+        await asyncio.sleep(self.SAVE_DELAY)
+        await self._save_index()
+
+    async def _save_index(self):
+        # Serialize on the loop so the thread never sees the index mid-update
+        data = json.dumps(self._entries)
+        try:
+            await asyncio.to_thread(atomic_write, self.index_path, data)
+        except OSError as e:
+            logger.warning(f"Could not save audio cache index: {e}")
+
+    def _remove_file(self, name):
+        try:
+            os.unlink(os.path.join(self.directory, name))
+        except OSError:
+            pass
+
+    def _evict(self):
+        """Drop least recently used files until the cache fits its budget"""
+        evicted = False
+        while self._entries and self.total_bytes > self.max_bytes:
+            _, entry = self._entries.popitem(last=False)
+            self.total_bytes -= entry['size']
+            self._remove_file(entry['file'])
+            self.evictions += 1
+            evicted = True
+        return evicted
+
+    def file_name(self, key):
+        return hashlib.sha1(key.encode()).hexdigest() + self.EXTENSION
+
+    def lookup(self, key, record=True):
+        """Return the local path for a cached track, or None on a miss
+
+        Pass record=False when reopening a track that is already playing
+        so hits and misses count plays rather than lookups.
+        """
+        entry = self._entries.get(key)
+        path = entry and os.path.join(self.directory, entry['file'])
+        if entry and not os.path.exists(path):
+            del self._entries[key]
+            self.total_bytes -= entry['size']
+            self._schedule_save()
+            entry = None
+        if entry is None:
+            if record:
+                self.misses += 1
+            return None
+
+        if record:
+            entry['last_used'] = time.time()
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self._schedule_save()
+        return path
+
+    def add(self, key, path):
+        """Move a finished file into the cache and evict to stay within budget"""
+        size = os.path.getsize(path)
+        if size > self.max_bytes:
+            os.unlink(path)
+            return None
+
+        name = self.file_name(key)
+        os.replace(path, os.path.join(self.directory, name))
+        old = self._entries.pop(key, None)
+        if old:
+            self.total_bytes -= old['size']
+        self._entries[key] = {'file': name, 'size': size, 'last_used': time.time()}
+        self.total_bytes += size
+        self._evict()
+        self._schedule_save()
+        return os.path.join(self.directory, name)
+
+    def fill(self, key, source, duration=None):
+        """Start copying source to disk in the background unless it is cached"""
+        if key in self._entries or key in self._downloads:
+            return self._downloads.get(key)
+        if not duration or (self.max_duration and duration > self.max_duration):
+            return None  # Unknown lengths (livestreams) would record forever
+        limit = min(self.max_bytes, int(duration * self.MAX_BYTES_PER_SECOND))
+        if self._reserved + limit > self.max_bytes:
+            return None  # Other downloads hold the budget; a later play can fill it
+
+        self._reserved += limit
+        task = asyncio.create_task(self._download(key, source, limit))
+        self._downloads[key] = task
+        task.add_done_callback(lambda task: self._download_done(key, limit, task))
+        return task
+
+    def _download_done(self, key, limit, task):
+        self._downloads.pop(key, None)
+        self._reserved -= limit
+        if not task.cancelled() and task.exception():
+            logger.warning(f"Could not cache {key!r}: {task.exception()}")
+
+    async def _download(self, key, source, limit):
+        temp_path = os.path.join(self.directory, f"{self.file_name(key)}.part")
+        args = [self.ffmpeg, '-nostdin', '-loglevel', 'error', '-y']
+        if '://' in source:
+            args.extend(FFMPEG_OPTS['before_options'].split())
+        args.extend([
+            '-i', source, '-vn', '-map', '0:a:0', '-c:a', 'copy',
+            '-fs', str(limit), '-f', 'matroska', temp_path
+        ])
+
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *args, stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE
+            )
+        except OSError as e:
+            logger.warning(f"Could not start {self.ffmpeg!r} to cache {key!r}: {e}")
+            return None
+        try:
+            _, stderr = await process.communicate()
+        except asyncio.CancelledError:
+            process.kill()
+            await process.wait()
+            self._remove_file(os.path.basename(temp_path))
+            raise
+
+        if process.returncode != 0:
+            logger.warning(f"Could not cache {key!r}: {stderr.decode(errors='replace').strip()[-200:]}")
+            self._remove_file(os.path.basename(temp_path))
+            return None
+        if os.path.getsize(temp_path) >= limit:
+            # -fs stopped the copy early, so the file is truncated
+            logger.warning(f"Not caching {key!r}: larger than its {limit} byte limit")
+            self._remove_file(os.path.basename(temp_path))
+            return None
+        return self.add(key, temp_path)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self.total_bytes,
+            'max_bytes': self.max_bytes,
+            'downloads': len(self._downloads),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+    async def close(self):
+        """Cancel in-flight downloads, removing their partial files, and save the index"""
+        tasks = list(self._downloads.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._save_task and not self._save_task.done():
+            self._save_task.cancel()
+            await self._save_index()
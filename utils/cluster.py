@@ -0,0 +1,195 @@
+import asyncio
+import hmac
+import itertools
+import json
+import logging
+from config import CLUSTER_CONFIG
+
+logger = logging.getLogger(__name__)
+
+class ClusterError(Exception):
+    """Raised when a remote cluster fails or doesn't answer an IPC request"""
+
+def shard_for_guild(guild_id, shard_count):
+    """The shard Discord routes a guild's events to"""
+    return (guild_id >> 22) % shard_count
+
+def shard_ranges(shard_count, cluster_count):
+    """Split shard IDs into cluster_count contiguous, near-equal ranges"""
+    cluster_count = max(1, min(cluster_count, shard_count))
+    base, extra = divmod(shard_count, cluster_count)
+    ranges = []
+    start = 0
+    for cluster_id in range(cluster_count):
+        size = base + (1 if cluster_id < extra else 0)
+        ranges.append(list(range(start, start + size)))
+        start += size
+    return ranges
+
+class ClusterNode:
+    """One bot process's view of the cluster, plus its local IPC endpoint
+
+    Every cluster process owns a contiguous range of shards and listens on
+    127.0.0.1 at base_port + cluster_id. Requests are single JSON lines
+    carrying an op name, its data and the shared secret; handlers are
+    registered per op by cogs. A standalone bot is a cluster of one whose
+    broadcasts just call the local handler, so callers don't need to care
+    which mode they run in.
+    """
+
+    def __init__(self, cluster_id=0, cluster_count=1, shard_ids=None, shard_count=None,
+                 host=None, base_port=None, secret=None):
+        self.cluster_id = cluster_id
+        self.cluster_count = cluster_count
+        self.shard_ids = shard_ids
+        self.shard_count = shard_count
+        self.host = host or CLUSTER_CONFIG['ipc_host']
+        self.base_port = base_port or CLUSTER_CONFIG['ipc_base_port']
+        self.secret = secret or ''
+        self._handlers = {}
+        self._server = None
+        self._ids = itertools.count(1)
+        self._shard_set = set(shard_ids) if shard_ids is not None else None
+
+    @classmethod
+    def standalone(cls):
+        return cls()
+
+    @property
+    def is_primary(self):
+        """Whether this cluster runs process-wide singletons (command sync, global timers)"""
+        return self.cluster_id == 0
+
+    @property
+    def is_clustered(self):
+        return self.cluster_count > 1
+
+    def owns_guild(self, guild_id):
+        if self._shard_set is None or not self.shard_count:
+            return True
+        return shard_for_guild(guild_id, self.shard_count) in self._shard_set
+
+    def cluster_for_guild(self, guild_id):
+        """The cluster whose shard range contains a guild"""
+        if not self.is_clustered:
+            return self.cluster_id
+        shard_id = shard_for_guild(guild_id, self.shard_count)
+        for cluster_id, shards in enumerate(shard_ranges(self.shard_count, self.cluster_count)):
+            if shard_id in shards:
+                return cluster_id
+        return self.cluster_id
+
+    def register(self, op, handler):
+        """Serve op with async handler(data) returning JSON-serializable data"""
+        self._handlers[op] = handler
+
+    def unregister(self, op):
+        self._handlers.pop(op, None)
+
+    async def start(self):
+        """Listen for requests from the other clusters"""
+        if not self.is_clustered or self._server:
+            return
+        self._server = await asyncio.start_server(
+            self._serve, self.host, self.base_port + self.cluster_id,
+            limit=CLUSTER_CONFIG['max_message_size']
+        )
+        logger.info(f"Cluster {self.cluster_id} listening on {self.host}:{self.base_port + self.cluster_id}")
+
+    async def close(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _serve(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                except ValueError as e:
+                    request = None
+                    error = f"Malformed request: invalid JSON ({e})"
+                else:
+                    error = None
+                if not isinstance(request, dict):
+                    request = {}
+                response = {'id': request.get('id')}
+                secret = request.get('secret', '')
+                op = request.get('op')
+                if error:
+                    response['error'] = error
+                elif not isinstance(secret, str) or not hmac.compare_digest(secret, self.secret):
+                    response['error'] = "Invalid cluster secret"
+                elif not isinstance(op, str):
+                    response['error'] = "Malformed request: missing op"
+                else:
+                    try:
+                        response['result'] = await self.dispatch(op, request.get('data'))
+                    except Exception as e:
+                        logger.error(f"IPC op {op!r} failed: {e}")
+                        response['error'] = f"{type(e).__name__}: {e}"
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+        except (ConnectionError, ValueError) as e:
+            # ValueError here is a line over max_message_size, which leaves the stream unusable
+            logger.warning(f"Dropping IPC connection: {e}")
+        finally:
+            writer.close()
+
+    async def dispatch(self, op, data=None):
+        """Run a registered handler in this process"""
+        handler = self._handlers.get(op)
+        if not handler:
+            raise ClusterError(f"No handler for IPC op {op!r} on cluster {self.cluster_id}")
+        return await handler(data)
+
+    async def request(self, cluster_id, op, data=None, timeout=None):
+        """Run op on one cluster and return its result"""
+        if cluster_id == self.cluster_id:
+            return await self.dispatch(op, data)
+        try:
+            return await asyncio.wait_for(
+                self._remote(cluster_id, op, data),
+                timeout or CLUSTER_CONFIG['ipc_timeout']
+            )
+        except asyncio.TimeoutError:
+            raise ClusterError(f"Cluster {cluster_id} timed out on {op!r}") from None
+        except OSError as e:
+            raise ClusterError(f"Cluster {cluster_id} is unreachable: {e}") from None
+
+    async def _remote(self, cluster_id, op, data):
+        reader, writer = await asyncio.open_connection(
+            self.host, self.base_port + cluster_id,
+            limit=CLUSTER_CONFIG['max_message_size']
+        )
+        try:
+            request = {'id': next(self._ids), 'op': op, 'data': data, 'secret': self.secret}
+            writer.write(json.dumps(request).encode() + b'\n')
+            await writer.drain()
+            line = await reader.readline()
+        finally:
+            writer.close()
+
+        if not line:
+            raise ClusterError(f"Cluster {cluster_id} closed the connection")
+        response = json.loads(line)
+        if 'error' in response:
+            raise ClusterError(f"Cluster {cluster_id}: {response['error']}")
+        return response['result']
+
+    async def broadcast(self, op, data=None, timeout=None):
+        """Run op on every cluster concurrently
+
+        Returns {cluster_id: result}; clusters that failed map to their
+        exception instead, so one dead process doesn't sink the command.
+        """
+        cluster_ids = list(range(self.cluster_count))
+        results = await asyncio.gather(
+            *(self.request(cluster_id, op, data, timeout=timeout) for cluster_id in cluster_ids),
+            return_exceptions=True
+        )
+        return dict(zip(cluster_ids, results))
@@ -0,0 +1,42 @@
+import hashlib
+import json
+import logging
+import os
+from utils.storage.files import atomic_write
+
+logger = logging.getLogger(__name__)
+
+def tree_hash(tree, guild=None):
+    """Stable hash of the commands a sync would upload for a scope"""
+    payload = sorted(
+        (command.to_dict(tree) for command in tree.get_commands(guild=guild)),
+        key=lambda command: (command.get('type', 1), command['name'])
+    )
+    encoded = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+class CommandSyncState:
+    """Remembers the tree hash last synced per application and scope"""
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            with open(path, 'r') as f:
+                self.hashes = json.load(f)
+        except FileNotFoundError:
+            self.hashes = {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable command sync state: {e}")
+            self.hashes = {}
+
+    @staticmethod
+    def scope_key(application_id, guild=None):
+        return f"{application_id}:{guild.id if guild else 'global'}"
+
+    def is_current(self, application_id, guild, digest):
+        return self.hashes.get(self.scope_key(application_id, guild)) == digest
+
+    def mark_synced(self, application_id, guild, digest):
+        self.hashes[self.scope_key(application_id, guild)] = digest
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        atomic_write(self.path, json.dumps(self.hashes, indent=2))
@@ -0,0 +1,72 @@
+import discord
+from discord import app_commands
+from config import BOT_CONFIG, COOLDOWN_CONFIG
+from utils.ratelimit import TokenBuckets
+
+class CommandLimiter:
+    """Per-user slash command cooldowns with per-guild overrides
+
+    Each (guild, user, command) gets a one-token bucket that refills
+    after the command's cooldown. Guilds can override cooldowns in their
+    server settings under 'command_cooldowns' ({command name or '*':
+    seconds}, 0 to disable); those are read once per guild and cached.
+    """
+
+    def __init__(self, db, default=None, max_keys=None):
+        self.db = db
+        self.default = default or BOT_CONFIG['command_cooldown']
+        self.buckets = TokenBuckets(1 / self.default, 1, max_keys or COOLDOWN_CONFIG['max_tracked_keys'])
+        self.overrides = {}  # guild id -> {command name or '*': seconds}
+
+    async def get_overrides(self, guild_id):
+        overrides = self.overrides.get(guild_id)
+        if overrides is None:
+            settings = await self.db.get_server_settings(guild_id)
+            overrides = self.overrides[guild_id] = settings.get('command_cooldowns', {})
+        return overrides
+
+    async def set_override(self, guild_id, command, seconds):
+        """Store a guild's cooldown for a command ('*' for all); None removes it"""
+        def change(overrides):
+            overrides = dict(overrides or {})
+            if seconds is None:
+                overrides.pop(command, None)
+            else:
+                overrides[command] = seconds
+            return overrides
+
+        self.overrides[guild_id] = await self.db.update_server_setting(guild_id, 'command_cooldowns', change)
+
+    async def cooldown_for(self, guild_id, command, default=None):
+        """Seconds between uses of a command in a guild"""
+        seconds = default or self.default
+        if guild_id is not None:
+            overrides = await self.get_overrides(guild_id)
+            seconds = overrides.get(command, overrides.get('*', seconds))
+        return seconds
+
+    async def check(self, interaction, default=None):
+        """Spend the user's token for the command or raise CommandOnCooldown"""
+        command = interaction.command.qualified_name
+        seconds = await self.cooldown_for(interaction.guild_id, command, default)
+        if not seconds:
+            return True
+        retry_after = self.buckets.hit((interaction.guild_id, interaction.user.id, command), rate=1 / seconds)
+        if retry_after:
+            raise app_commands.CommandOnCooldown(app_commands.Cooldown(1, seconds), retry_after)
+        return True
+
+def command_cooldown(seconds=None):
+    """Rate limit an app command per user with the bot's CommandLimiter
+
+    seconds is the command's default cooldown (BOT_CONFIG['command_cooldown']
+    if omitted); guild overrides take precedence.
+    """
+    async def predicate(interaction: discord.Interaction):
+        return await interaction.client.command_limiter.check(interaction, seconds)
+    predicate.command_cooldown = True
+    return app_commands.check(predicate)
+
+def has_cooldown(command):
+    """Whether a command is rate limited by command_cooldown"""
+    return any(getattr(check, 'command_cooldown', False) for check in getattr(command, 'checks', ()))
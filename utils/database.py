@@ -1,160 +1,214 @@
-import json
-import os
-from datetime import datetime
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from config import DATABASE_CONFIG
+from utils.storage import create_backend
+
+def mutation(method):
+    """Mark a Database method whose change AsyncDatabase waits to be durable"""
+    method.mutation = True
+    return method
+
+def resident(method):
+    """Mark a Database method answered from memory, which AsyncDatabase runs inline"""
+    method.resident = True
+    return method
 
 class Database:
-    def __init__(self):
-        self.global_bans_file = 'data/global_bans.json'
-        self.server_settings_file = 'data/server_settings.json'
-        self.warnings_file = 'data/warnings.json'
-        self.moderation_logs_file = 'data/moderation_logs.json'
-        
-        # Initialize files if they don't exist
-        self._init_file(self.global_bans_file, {})
-        self._init_file(self.server_settings_file, {})
-        self._init_file(self.warnings_file, {})
-        self._init_file(self.moderation_logs_file, {})
-    
-    def _init_file(self, filename, default_data):
-        """Initialize a file with default data if it doesn't exist"""
-        if not os.path.exists(filename):
-            with open(filename, 'w') as f:
-                json.dump(default_data, f, indent=2)
-    
-    def _load_json(self, filename):
-        """Load JSON data from file"""
-        try:
-            with open(filename, 'r') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return {}
-    
-    def _save_json(self, filename, data):
-        """Save JSON data to file"""
-        with open(filename, 'w') as f:
-            json.dump(data, f, indent=2)
+    def __init__(self, backend=None):
+        # The storage engine is chosen in config.py; every method below keeps
+        # the same signature whichever backend is active.
+        self.backend = backend or create_backend(DATABASE_CONFIG['backend'])
+        # Checked on every member join, so kept in memory and updated on writes
+        self.global_ban_ids = set()
+        self.refresh_global_bans()
+    
+    def commit_future(self):
+        """Return a future resolved once every change made so far is durable"""
+        return self.backend.commit_future()
+    
+    def flush(self):
+        """Persist any buffered changes"""
+        self.backend.flush()
+    
+    def close(self):
+        """Flush pending changes and release the storage backend"""
+        self.backend.close()
     
     # Global Bans
-    def add_global_ban(self, user_id, reason, moderator_id):
-        """Add a user to global ban list"""
-        data = self._load_json(self.global_bans_file)
-        data[str(user_id)] = {
-            'user_id': user_id,
-            'reason': reason,
-            'moderator_id': moderator_id,
-            'timestamp': datetime.utcnow().isoformat()
-        }
-        self._save_json(self.global_bans_file, data)
+    @mutation
+    def add_global_ban(self, user_id, reason, moderator_id, user_name=None):
+        """Add a user to global ban list, remembering their name for listings"""
+        self.backend.add_global_ban(user_id, reason, moderator_id, user_name)
+        self.global_ban_ids.add(user_id)
     
+    @mutation
     def remove_global_ban(self, user_id):
         """Remove a user from global ban list"""
-        data = self._load_json(self.global_bans_file)
-        if str(user_id) in data:
-            del data[str(user_id)]
-            self._save_json(self.global_bans_file, data)
-            return True
-        return False
+        self.global_ban_ids.discard(user_id)
+        return self.backend.remove_global_ban(user_id)
     
+    @resident
     def is_globally_banned(self, user_id):
         """Check if a user is globally banned"""
-        data = self._load_json(self.global_bans_file)
-        return str(user_id) in data
+        return user_id in self.global_ban_ids
+    
+    @resident
+    def get_global_ban_ids(self):
+        """Snapshot of every globally banned user ID"""
+        return frozenset(self.global_ban_ids)
+    
+    def refresh_global_bans(self):
+        """Reload the in-memory ban set, e.g. after another process changed it"""
+        self.global_ban_ids = {ban['user_id'] for ban in self.backend.get_global_bans()}
     
     def get_global_bans(self):
         """Get all global bans"""
-        data = self._load_json(self.global_bans_file)
-        return list(data.values())
+        return self.backend.get_global_bans()
+    
+    def count_global_bans(self):
+        """Number of globally banned users"""
+        return self.backend.count_global_bans()
+    
+    def get_global_bans_page(self, offset, limit):
+        """Get up to limit global bans, newest first, skipping offset"""
+        return self.backend.get_global_bans_page(offset, limit)
     
     # Global Mutes
+    @mutation
     def add_global_mute(self, user_id, reason, moderator_id, duration=None):
-        """Add a user to global mute list"""
-        # For simplicity, storing in the same structure as bans
-        # In a real implementation, you might want a separate file
-        pass
+        """Add a user to global mute list, optionally expiring after duration seconds"""
+        self.backend.add_global_mute(user_id, reason, moderator_id, duration)
+    
+    @mutation
+    def remove_global_mute(self, user_id):
+        """Remove a user from global mute list"""
+        return self.backend.remove_global_mute(user_id)
+    
+    def get_global_mutes(self):
+        """Get all global mutes"""
+        return self.backend.get_global_mutes()
+    
+    # Timers
+    @mutation
+    def add_timer(self, action, guild_id, user_id, expires_at, data=None):
+        """Persist a timed action due at the unix timestamp expires_at"""
+        return self.backend.add_timer(action, guild_id, user_id, expires_at, data)
+    
+    @mutation
+    def remove_timer(self, timer_id):
+        """Delete a timed action"""
+        return self.backend.remove_timer(timer_id)
+    
+    @mutation
+    def remove_timers(self, action, guild_id, user_id):
+        """Delete every timed action of a kind for a user and return their IDs"""
+        return self.backend.remove_timers(action, guild_id, user_id)
+    
+    def get_timers(self):
+        """Get every pending timed action"""
+        return self.backend.get_timers()
     
     # Warnings
+    @mutation
     def add_warning(self, guild_id, user_id, moderator_id, reason):
-        """Add a warning to a user"""
-        data = self._load_json(self.warnings_file)
-        guild_key = str(guild_id)
-        user_key = str(user_id)
-        
-        if guild_key not in data:
-            data[guild_key] = {}
-        if user_key not in data[guild_key]:
-            data[guild_key][user_key] = []
-        
-        warning_id = len(data[guild_key][user_key]) + 1
-        warning = {
-            'id': warning_id,
-            'reason': reason,
-            'moderator_id': moderator_id,
-            'timestamp': datetime.utcnow().isoformat()
-        }
-        
-        data[guild_key][user_key].append(warning)
-        self._save_json(self.warnings_file, data)
-        return warning_id
+        """Add a warning to a user and return its ID (unique within the guild)"""
+        return self.backend.add_warning(guild_id, user_id, moderator_id, reason)
     
     def get_warnings(self, guild_id, user_id):
         """Get all warnings for a user in a guild"""
-        data = self._load_json(self.warnings_file)
-        guild_key = str(guild_id)
-        user_key = str(user_id)
-        
-        if guild_key in data and user_key in data[guild_key]:
-            return data[guild_key][user_key]
-        return []
+        return self.backend.get_warnings(guild_id, user_id)
     
+    @mutation
+    def remove_warning(self, guild_id, user_id, warning_id):
+        """Delete one warning; the IDs of the others don't change"""
+        return self.backend.remove_warning(guild_id, user_id, warning_id)
+    
+    @mutation
     def clear_warnings(self, guild_id, user_id):
         """Clear all warnings for a user"""
-        data = self._load_json(self.warnings_file)
-        guild_key = str(guild_id)
-        user_key = str(user_id)
-        
-        if guild_key in data and user_key in data[guild_key]:
-            data[guild_key][user_key] = []
-            self._save_json(self.warnings_file, data)
-            return True
-        return False
+        return self.backend.clear_warnings(guild_id, user_id)
     
     # Moderation Logs
+    @mutation
     def log_moderation_action(self, guild_id, target_id, moderator_id, action, reason):
         """Log a moderation action"""
-        data = self._load_json(self.moderation_logs_file)
-        guild_key = str(guild_id)
-        
-        if guild_key not in data:
-            data[guild_key] = []
-        
-        log_entry = {
-            'target_id': target_id,
-            'moderator_id': moderator_id,
-            'action': action,
-            'reason': reason,
-            'timestamp': datetime.utcnow().isoformat()
-        }
-        
-        data[guild_key].append(log_entry)
-        self._save_json(self.moderation_logs_file, data)
+        self.backend.log_moderation_action(guild_id, target_id, moderator_id, action, reason)
     
     def get_moderation_logs(self, guild_id, limit=50):
         """Get recent moderation logs for a guild"""
-        data = self._load_json(self.moderation_logs_file)
-        guild_key = str(guild_id)
-        
-        if guild_key in data:
-            return data[guild_key][-limit:]
-        return []
+        return self.backend.get_moderation_logs(guild_id, limit)
     
     # Server Settings
     def get_server_settings(self, guild_id):
         """Get settings for a server"""
-        data = self._load_json(self.server_settings_file)
-        return data.get(str(guild_id), {})
+        return self.backend.get_server_settings(guild_id)
     
+    @mutation
     def update_server_settings(self, guild_id, settings):
         """Update settings for a server"""
-        data = self._load_json(self.server_settings_file)
-        data[str(guild_id)] = settings
-        self._save_json(self.server_settings_file, data)
+        self.backend.update_server_settings(guild_id, settings)
+    
+    @mutation
+    def update_server_setting(self, guild_id, key, update):
+        """Set one setting to update(current value) in a single step and return it
+
+        The read and write happen together in the backend, so concurrent
+        changes to other keys (or the same one) are not lost. None removes
+        the key.
+        """
+        return self.backend.update_server_setting(guild_id, key, update)
+
+
+class AsyncDatabase:
+    """Awaitable view of Database that keeps storage I/O off the event loop
+    
+    Every public Database method is exposed as a coroutine with the same
+    signature, executed on a dedicated thread pool so a slow disk never
+    blocks the gateway heartbeat or other guilds' interactions. Mutations
+    return once the backend's commit_future() resolves (with JSON group
+    commit, once the change is fsynced); the wait happens on the event
+    loop, so concurrent commands share a commit.
+    Resident methods only touch memory and run inline without a thread hop.
+    """
+    
+    def __init__(self, database=None, max_workers=None):
+        self.sync = database or Database()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or DATABASE_CONFIG['io_workers'],
+            thread_name_prefix="database-io"
+        )
+    
+    def __getattr__(self, name):
+        method = getattr(self.sync, name)
+        if name.startswith('_') or not callable(method):
+            return method
+        
+        if getattr(method, 'resident', False):
+            @functools.wraps(method)
+            async def run_inline(*args, **kwargs):
+                return method(*args, **kwargs)
+            return run_inline
+        
+        is_mutation = getattr(method, 'mutation', False)
+        
+        def call(*args, **kwargs):
+            result = method(*args, **kwargs)
+            return result, self.sync.commit_future() if is_mutation else None
+        
+        @functools.wraps(method)
+        async def run_in_executor(*args, **kwargs):
+            loop = asyncio.get_running_loop()
+            result, committed = await loop.run_in_executor(self._executor, functools.partial(call, *args, **kwargs))
+            if committed is not None:
+                # A batch that already failed must still raise here
+                await asyncio.wrap_future(committed)
+            return result
+        
+        return run_in_executor
+    
+    async def close(self):
+        """Flush the underlying database and stop the I/O threads"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self.sync.close)
+        self._executor.shutdown(wait=True)
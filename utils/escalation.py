@@ -0,0 +1,127 @@
+import bisect
+from collections import OrderedDict
+from datetime import datetime, timezone
+from config import ESCALATION_CONFIG
+from utils.helpers import parse_time
+
+ACTIONS = ('notify', 'mute', 'kick', 'ban')
+
+def warning_time(warning):
+    """Unix time of a stored warning (timestamps are naive UTC ISO strings)"""
+    return datetime.fromisoformat(warning['timestamp']).replace(tzinfo=timezone.utc).timestamp()
+
+class WarningCounter:
+    """Per-member warning times kept in memory so counts need no storage reads
+
+    A member's warnings are read from storage once, the first time they
+    are needed, and then updated as warnings are added or removed. Counts
+    over a trailing window are a binary search over the member's sorted
+    times. The least recently used members are dropped past max_members
+    and simply reloaded if they come up again.
+    """
+
+    def __init__(self, max_members=None):
+        self.max_members = max_members or ESCALATION_CONFIG['max_tracked_members']
+        self._members = OrderedDict()  # (guild id, user id) -> (sorted times, warning ids)
+
+    def is_loaded(self, guild_id, user_id):
+        return (guild_id, user_id) in self._members
+
+    def load(self, guild_id, user_id, warnings):
+        """Seed a member from storage; an already loaded member is kept"""
+        key = (guild_id, user_id)
+        if key not in self._members:
+            entries = sorted((warning_time(warning), warning['id']) for warning in warnings)
+            self._members[key] = ([time for time, _ in entries], [warning_id for _, warning_id in entries])
+        self._touch(key)
+
+    def _touch(self, key):
+        self._members.move_to_end(key)
+        while len(self._members) > self.max_members:
+            self._members.popitem(last=False)
+
+    def add(self, guild_id, user_id, warning_id, timestamp):
+        key = (guild_id, user_id)
+        times, ids = self._members.setdefault(key, ([], []))
+        index = bisect.bisect_right(times, timestamp)
+        times.insert(index, timestamp)
+        ids.insert(index, warning_id)
+        self._touch(key)
+
+    def remove(self, guild_id, user_id, warning_id):
+        entry = self._members.get((guild_id, user_id))
+        if entry and warning_id in entry[1]:
+            index = entry[1].index(warning_id)
+            del entry[0][index]
+            del entry[1][index]
+
+    def clear(self, guild_id, user_id):
+        self._members.pop((guild_id, user_id), None)
+
+    def count(self, guild_id, user_id, window=None, now=None):
+        """Warnings in the last window seconds, or all of them"""
+        entry = self._members.get((guild_id, user_id))
+        if not entry:
+            return 0
+        times = entry[0]
+        if not window:
+            return len(times)
+        since = (now or datetime.now(timezone.utc).timestamp()) - window
+        return len(times) - bisect.bisect_left(times, since)
+
+class EscalationPolicy:
+    """What happens automatically when a member reaches N active warnings
+
+    Each warning applies the step with the highest count at or below the
+    member's active warnings, so a member past the last step keeps getting
+    it (the default notifies on every warning from max_warnings on). That
+    step is a binary search over the sorted counts. Only warnings within
+    window seconds count as active (None counts every warning).
+    """
+
+    def __init__(self, steps, window=None):
+        self.steps = {step['count']: step for step in steps}
+        self._counts = sorted(self.steps)
+        self.window = window
+
+    @classmethod
+    def from_settings(cls, settings):
+        """Build a guild's policy from its server settings, or the default"""
+        policy = settings.get('escalation') or ESCALATION_CONFIG['default']
+        window_days = policy.get('window_days')
+        return cls(policy['steps'], window_days * 86400 if window_days else None)
+
+    def to_settings(self):
+        return {
+            'window_days': self.window // 86400 if self.window else None,
+            'steps': [self.steps[count] for count in self._counts]
+        }
+
+    def step_for(self, count):
+        """The step for a member with count active warnings, or None below the first"""
+        index = bisect.bisect_right(self._counts, count)
+        return self.steps[self._counts[index - 1]] if index else None
+
+    def set_step(self, count, action, duration=None):
+        step = {'count': count, 'action': action}
+        if duration:
+            step['duration'] = duration
+        if count not in self.steps:
+            bisect.insort(self._counts, count)
+        self.steps[count] = step
+
+    def remove_step(self, count):
+        if self.steps.pop(count, None) is None:
+            return False
+        self._counts.remove(count)
+        return True
+
+    @staticmethod
+    def describe(step):
+        if step['action'] == 'mute':
+            return f"Mute for {step['duration']}" if step.get('duration') else "Mute"
+        return {'notify': "Notify moderators", 'kick': "Kick", 'ban': "Ban"}[step['action']]
+
+    @staticmethod
+    def mute_duration(step):
+        return parse_time(step['duration']) if step.get('duration') else None
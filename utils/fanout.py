@@ -0,0 +1,131 @@
+import asyncio
+import time
+from config import FANOUT_CONFIG
+
+class FanOutResult:
+    """Outcome of running a fan-out action against one target"""
+    
+    def __init__(self, target, ok, value=None, error=None, attempts=1):
+        self.target = target
+        self.ok = ok
+        self.value = value
+        self.error = error
+        self.attempts = attempts
+    
+    def __repr__(self):
+        return f"<FanOutResult target={self.target!r} ok={self.ok} value={self.value!r} error={self.error!r}>"
+
+def retry_after(error):
+    """Return the delay requested by a rate-limit error, or None for other errors"""
+    delay = getattr(error, 'retry_after', None)
+    if delay is not None:
+        return float(delay)
+    
+    if getattr(error, 'status', None) == 429:
+        response = getattr(error, 'response', None)
+        headers = getattr(response, 'headers', None) or {}
+        try:
+            return float(headers.get('Retry-After', 1))
+        except (TypeError, ValueError):
+            return 1.0
+    return None
+
+def is_global_limit(error):
+    """Check whether a rate-limit error applies to every route"""
+    if getattr(error, 'is_global', False):
+        return True
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    return headers.get('X-RateLimit-Global') == 'true'
+
+class FanOut:
+    """Run one action per target with bounded concurrency and rate limits
+    
+    Requests are paced by this instance's requests-per-second budget, so
+    everything in a process that fans out must share one instance for the
+    budget to hold. A 429 for one route only blocks that route's bucket
+    (or every bucket for a global limit) before the action is retried.
+    Nothing here depends on discord.py; benchmarks/fanout_429.py drives it
+    against a fake HTTP client that answers with 429s.
+    """
+    
+    def __init__(self, concurrency=None, requests_per_second=None, max_retries=None, progress_interval=None):
+        self.concurrency = concurrency or FANOUT_CONFIG['concurrency']
+        self.requests_per_second = requests_per_second or FANOUT_CONFIG['requests_per_second']
+        self.max_retries = FANOUT_CONFIG['max_retries'] if max_retries is None else max_retries
+        self.progress_interval = FANOUT_CONFIG['progress_interval'] if progress_interval is None else progress_interval
+        self._next_request = 0.0
+        self._blocked_until = {}  # route -> monotonic time its bucket reopens
+        self._global_blocked_until = 0.0
+    
+    def _blocked_for(self, route):
+        return max(self._global_blocked_until, self._blocked_until.get(route, 0.0)) - time.monotonic()
+    
+    async def _acquire(self, route):
+        """Wait for the global pace, the global limit and the route's bucket"""
+        while True:
+            wait = self._blocked_for(route)
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            
+            now = time.monotonic()
+            slot = max(now, self._next_request)
+            self._next_request = slot + 1 / self.requests_per_second
+            if slot <= now:
+                return
+            await asyncio.sleep(slot - now)
+            # A 429 may have arrived while waiting for the slot
+            if self._blocked_for(route) <= 0:
+                return
+    
+    async def _run_one(self, target, action, route):
+        attempts = 0
+        while True:
+            attempts += 1
+            await self._acquire(route)
+            try:
+                value = await action(target)
+                return FanOutResult(target, True, value=value, attempts=attempts)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                delay = retry_after(e)
+                if delay is None or attempts > self.max_retries:
+                    return FanOutResult(target, False, error=e, attempts=attempts)
+                
+                reopen = time.monotonic() + delay
+                if is_global_limit(e):
+                    self._global_blocked_until = max(self._global_blocked_until, reopen)
+                else:
+                    self._blocked_until[route] = max(self._blocked_until.get(route, 0.0), reopen)
+    
+    async def run(self, targets, action, route=None, on_progress=None):
+        """Run action(target) for every target and return results in target order
+        
+        route(target) names the rate-limit bucket a target's request falls in
+        (defaults to one bucket per target). on_progress(done, total) is
+        awaited at most once per progress_interval and once at the end.
+        """
+        targets = list(targets)
+        route = route or (lambda target: target)
+        results = [None] * len(targets)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        done = 0
+        last_report = time.monotonic()
+        
+        async def worker(index, target):
+            nonlocal done, last_report
+            async with semaphore:
+                results[index] = await self._run_one(target, action, route(target))
+            done += 1
+            
+            now = time.monotonic()
+            if on_progress and done < len(targets) and now - last_report >= self.progress_interval:
+                last_report = now
+                await on_progress(done, len(targets))
+        
+        await asyncio.gather(*(worker(i, target) for i, target in enumerate(targets)))
+        if on_progress:
+            await on_progress(done, len(targets))
+        return results
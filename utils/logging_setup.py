@@ -0,0 +1,120 @@
+import atexit
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+from datetime import datetime, timezone
+from config import LOGGING_CONFIG
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_listener = None  # QueueListener started by setup_logging
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, for log shippers"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'process': record.processName,
+            'thread': record.threadName
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+class LocalQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler for a listener in the same process
+
+    The stock handler copies the record and formats all of it, traceback
+    included, in the logging thread so it can be pickled. Here the
+    message is merged in place and tracebacks are left to the listener
+    thread. Merging leaves the rendered message unchanged for any other
+    handler that sees the record.
+    """
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+def compressed_name(name):
+    return f"{name}.gz"
+
+def compress_rotated(source, dest):
+    """Rotator that gzips the finished log file instead of renaming it"""
+    with open(source, 'rb') as f_in, gzip.open(dest, 'wb') as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+def log_path(suffix=None):
+    """The configured log file, with e.g. '-cluster0' before the extension"""
+    path = LOGGING_CONFIG['file']
+    if suffix:
+        root, ext = os.path.splitext(path)
+        path = f"{root}-{suffix}{ext}"
+    return path
+
+def file_handler(path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if LOGGING_CONFIG['rotate_when']:
+        handler = logging.handlers.TimedRotatingFileHandler(
+            path, when=LOGGING_CONFIG['rotate_when'], backupCount=LOGGING_CONFIG['backup_count'],
+            encoding='utf-8', utc=True
+        )
+    else:
+        handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=LOGGING_CONFIG['max_bytes'], backupCount=LOGGING_CONFIG['backup_count'],
+            encoding='utf-8'
+        )
+    if LOGGING_CONFIG['compress']:
+        handler.namer = compressed_name
+        handler.rotator = compress_rotated
+    handler.setFormatter(JsonFormatter() if LOGGING_CONFIG['json'] else logging.Formatter(TEXT_FORMAT))
+    return handler
+
+def shutdown_logging():
+    """Stop the listener, writing out anything still queued"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def setup_logging(suffix=None):
+    """Route all logging through a queue drained by a background thread
+
+    Logging calls on the event loop only merge the message and put the
+    record on a queue; a QueueListener thread writes it to the console
+    and the rotating log file (compressing rotated files). Processes
+    sharing a working directory should pass a distinct suffix so each
+    rotates its own file. The listener is stopped at exit, flushing any
+    records still queued.
+    """
+    global _listener
+    shutdown_logging()
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter(TEXT_FORMAT))
+    handlers = [console, file_handler(log_path(suffix))]
+
+    records = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    root.addHandler(LocalQueueHandler(records))
+    root.setLevel(LOGGING_CONFIG['level'])
+    for name, level in LOGGING_CONFIG['levels'].items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,60 @@
+import discord
+
+class Paginator(discord.ui.View):
+    """Previous/next buttons over pages rendered on demand
+
+    render(page) is an async callable returning the embed for a zero-based
+    page, so only the page being shown is ever loaded. Only the user who
+    opened the listing can turn pages.
+    """
+
+    def __init__(self, render, page_count, author_id, timeout=180):
+        super().__init__(timeout=timeout)
+        self.render = render
+        self.page_count = max(page_count, 1)
+        self.author_id = author_id
+        self.page = 0
+        self.message = None
+        self._update_buttons()
+
+    def _update_buttons(self):
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = self.page >= self.page_count - 1
+
+    async def send(self, interaction):
+        """Send the first page as a followup to a deferred interaction"""
+        embed = await self.render(self.page)
+        if self.page_count == 1:
+            self.stop()
+            await interaction.followup.send(embed=embed)
+            return
+        self.message = await interaction.followup.send(embed=embed, view=self, wait=True)
+
+    async def interaction_check(self, interaction):
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("❌ Only the person who ran the command can change pages!", ephemeral=True)
+            return False
+        return True
+
+    async def show(self, interaction, page):
+        self.page = page
+        self._update_buttons()
+        # Acknowledge first; rendering may need to fetch users
+        await interaction.response.defer()
+        embed = await self.render(page)
+        await interaction.edit_original_response(embed=embed, view=self)
+
+    @discord.ui.button(label="Previous", emoji="◀️", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction, button):
+        await self.show(interaction, self.page - 1)
+
+    @discord.ui.button(label="Next", emoji="▶️", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction, button):
+        await self.show(interaction, self.page + 1)
+
+    async def on_timeout(self):
+        if self.message:
+            try:
+                await self.message.edit(view=None)
+            except discord.HTTPException:
+                pass
@@ -0,0 +1,372 @@
+import asyncio
+import logging
+import time
+from collections import deque
+import discord
+from config import AUDIO_CONFIG, BOT_CONFIG, FFMPEG_OPTS, RESOLVER_CONFIG
+from utils.track_cache import normalize_query
+
+logger = logging.getLogger(__name__)
+
+class QueueFull(Exception):
+    """Raised when a guild's queue already holds max_queue_size tracks"""
+
+class Track:
+    """A requested song whose stream info is resolved lazily"""
+    
+    def __init__(self, query, requester=None, title=None):
+        self.query = query
+        self.requester = requester
+        self.info = None
+        self._title = title
+        self._resolving = None
+    
+    @property
+    def title(self):
+        if self.info and self.info.get('title'):
+            return self.info['title']
+        return self._title or self.query
+    
+    @property
+    def stream_url(self):
+        return self.info['url'] if self.info else None
+    
+    @property
+    def webpage_url(self):
+        return self.info.get('webpage_url') if self.info else None
+    
+    @property
+    def duration(self):
+        return self.info.get('duration') if self.info else None
+    
+    @property
+    def thumbnail(self):
+        return self.info.get('thumbnail') if self.info else None
+    
+    @property
+    def cache_key(self):
+        return normalize_query(self.webpage_url or self.query)
+    
+    @property
+    def is_opus(self):
+        """Whether the upstream stream is already Opus encoded"""
+        return bool(self.info) and self.info.get('acodec') == 'opus'
+    
+    async def prepare(self, resolve):
+        """Resolve stream info once, sharing the work between concurrent callers"""
+        if self.info:
+            return self
+        if self._resolving is None:
+            self._resolving = asyncio.ensure_future(resolve(self.query))
+        try:
+            self.info = await asyncio.shield(self._resolving)
+        except Exception:
+            self._resolving = None  # Allow a later retry
+            raise
+        return self
+
+class PlaylistSource:
+    """Lazily enumerates a playlist one page of flat entries at a time
+    
+    Only the current page is held in memory; entries become unresolved
+    Tracks as the queue has room for them, and their stream info is only
+    extracted when they come up for playback.
+    """
+    
+    def __init__(self, url, fetch_page, requester=None, page_size=None):
+        self.url = url
+        self.fetch_page = fetch_page
+        self.requester = requester
+        self.page_size = page_size or RESOLVER_CONFIG['playlist_page_size']
+        self.title = None
+        self.taken = 0
+        self._next_index = 1
+        self._buffer = deque()
+        self._exhausted = False
+    
+    @property
+    def exhausted(self):
+        return self._exhausted and not self._buffer
+    
+    async def take(self, count):
+        """Return up to count more tracks, fetching pages as needed"""
+        tracks = []
+        while len(tracks) < count:
+            if not self._buffer:
+                if self._exhausted:
+                    break
+                start = self._next_index
+                page = await self.fetch_page(self.url, start, start + self.page_size - 1)
+                self.title = self.title or page.get('title')
+                self._next_index += self.page_size
+                self._exhausted = page['count'] < self.page_size
+                self._buffer.extend(page['entries'])
+                continue
+            
+            entry = self._buffer.popleft()
+            tracks.append(Track(entry['url'], self.requester, title=entry.get('title')))
+        self.taken += len(tracks)
+        return tracks
+
+class HandoffSource(discord.AudioSource):
+    """Plays `original` and cleans up the source it replaced on the first read
+    
+    The player thread may still be inside the replaced source's read() when
+    VoiceClient.source is reassigned; by the time it reads from this one,
+    the old ffmpeg process is no longer in use and can be killed.
+    """
+    
+    def __init__(self, original, replaced):
+        self.original = original
+        self._replaced = replaced
+    
+    def _cleanup_replaced(self):
+        replaced, self._replaced = self._replaced, None
+        if replaced:
+            replaced.cleanup()
+    
+    def read(self):
+        self._cleanup_replaced()
+        return self.original.read()
+    
+    def is_opus(self):
+        return self.original.is_opus()
+    
+    def cleanup(self):
+        self._cleanup_replaced()
+        self.original.cleanup()
+
+class GuildPlayer:
+    """Queue and playback loop for one guild's voice connection
+    
+    While a track plays, the next queued track's stream URL is resolved in
+    the background so the following transition does not wait on yt-dlp.
+    With an AudioCache, tracks played before are read from local files.
+    """
+    
+    def __init__(self, guild, resolve, max_size=None, volume=None, cache=None):
+        self.guild = guild
+        self.resolve = resolve
+        self.cache = cache
+        self.max_size = max_size or BOT_CONFIG['max_queue_size']
+        self.volume = (volume or BOT_CONFIG['default_volume']) / 100
+        self.queue = deque()
+        self.playlists = deque()
+        self.current = None
+        self.source = None
+        self._source_volume = None
+        self._started_at = None
+        self._paused_at = None
+        self._offset = 0.0
+        self._has_tracks = asyncio.Event()
+        self._track_done = asyncio.Event()
+        self._prefetch = None
+        self._refill = None
+        self._refill_lock = asyncio.Lock()
+        self._task = asyncio.create_task(self.player_loop())
+    
+    @property
+    def voice_client(self):
+        return self.guild.voice_client
+    
+    def enqueue(self, track):
+        """Add a track to the end of the queue and return its position"""
+        if len(self.queue) >= self.max_size:
+            raise QueueFull()
+        self.queue.append(track)
+        self._has_tracks.set()
+        if len(self.queue) == 1 and self.current:
+            self.prefetch_next()
+        return len(self.queue)
+    
+    async def add_playlist(self, playlist):
+        """Queue a playlist, loading its first page before returning"""
+        self.playlists.append(playlist)
+        await self.refill(limit=playlist.page_size)
+        self.schedule_refill()
+    
+    def schedule_refill(self):
+        """Top the queue up from pending playlists in the background"""
+        if self.playlists and (self._refill is None or self._refill.done()):
+            self._refill = asyncio.create_task(self.refill())
+    
+    async def refill(self, limit=None):
+        """Move tracks from pending playlists into the queue while it has room"""
+        async with self._refill_lock:
+            while self.playlists and len(self.queue) < self.max_size:
+                playlist = self.playlists[0]
+                room = self.max_size - len(self.queue)
+                try:
+                    tracks = await playlist.take(min(room, limit) if limit else room)
+                except Exception as e:
+                    logger.warning(f"Dropping playlist {playlist.url!r} in guild {self.guild.id}: {e}")
+                    tracks = []
+                    self.playlists.popleft()
+                
+                if tracks:
+                    self.queue.extend(tracks)
+                    self._has_tracks.set()
+                    if self.current:
+                        self.prefetch_next()
+                if playlist.exhausted and self.playlists and self.playlists[0] is playlist:
+                    self.playlists.popleft()
+                if limit:
+                    break
+    
+    def prefetch_next(self):
+        """Start resolving the next queued track while the current one plays"""
+        if not self.queue:
+            return
+        track = self.queue[0]
+        if track.info or (self._prefetch and not self._prefetch.done()):
+            return
+        self._prefetch = asyncio.create_task(self._warm(track))
+    
+    async def _warm(self, track):
+        try:
+            await track.prepare(self.resolve)
+        except Exception as e:
+            logger.warning(f"Prefetch failed for {track.query!r}: {e}")
+    
+    @property
+    def position(self):
+        """Seconds into the current track"""
+        if self._started_at is None:
+            return 0.0
+        return self._offset + (self._paused_at or time.monotonic()) - self._started_at
+    
+    def create_source(self, track, position=0.0, record=True):
+        """Build the audio source for a resolved track
+        
+        Opus upstreams at 100% volume (the default) are passed through
+        without re-encoding. At any other volume ffmpeg applies the volume
+        filter and encodes to Opus itself, so the bot process never scales
+        or encodes PCM frames. The 'pcm' mode keeps ffmpeg's volume filter
+        but leaves Opus encoding to discord.py.
+        """
+        source = self.cache.lookup(track.cache_key, record) if self.cache else None
+        if source:
+            before_options = ''  # Local file, the reconnect flags don't apply
+        else:
+            source = track.stream_url
+            before_options = FFMPEG_OPTS['before_options']
+            if self.cache:
+                self.cache.fill(track.cache_key, source, track.duration)
+        if position:
+            before_options = f"-ss {position:.2f} {before_options}".rstrip()
+        options = FFMPEG_OPTS['options']
+        if self.volume != 1.0:
+            options += f" -filter:a volume={self.volume:.2f}"
+        
+        if AUDIO_CONFIG['mode'] == 'pcm':
+            return discord.FFmpegPCMAudio(source, before_options=before_options, options=options)
+        
+        # discord.py treats 'opus'/'libopus' as stream copy; None makes ffmpeg encode
+        codec = 'copy' if track.is_opus and self.volume == 1.0 else None
+        return discord.FFmpegOpusAudio(
+            source,
+            bitrate=AUDIO_CONFIG['bitrate'],
+            codec=codec,
+            before_options=before_options,
+            options=options
+        )
+    
+    def _swap_source(self):
+        """Restart ffmpeg at the current position so a new volume takes effect"""
+        position = self.position
+        # The old source is cleaned up once the player thread has moved off it
+        self.source = HandoffSource(self.create_source(self.current, position, record=False), self.source)
+        self._source_volume = self.volume
+        self.voice_client.source = self.source
+        self._offset = position
+        self._started_at = time.monotonic()
+    
+    def set_volume(self, volume):
+        """Set playback volume from a 1-100 percentage"""
+        self.volume = volume / 100
+        # A paused track picks the new volume up when it resumes
+        if self.current and self.voice_client and self.voice_client.is_playing():
+            self._swap_source()
+    
+    def pause(self):
+        if self.voice_client and self.voice_client.is_playing():
+            self.voice_client.pause()
+            self._paused_at = time.monotonic()
+            return True
+        return False
+    
+    def resume(self):
+        if self.voice_client and self.voice_client.is_paused():
+            self._started_at += time.monotonic() - self._paused_at
+            self._paused_at = None
+            if self._source_volume != self.volume:
+                self._swap_source()
+            self.voice_client.resume()
+            return True
+        return False
+    
+    def skip(self):
+        """Stop the current track so the loop advances to the next one"""
+        if self.voice_client and (self.voice_client.is_playing() or self.voice_client.is_paused()):
+            self.voice_client.stop()
+    
+    async def player_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self.queue:
+                self._has_tracks.clear()
+                await self._has_tracks.wait()
+            
+            track = self.queue.popleft()
+            self.schedule_refill()
+            try:
+                await track.prepare(self.resolve)
+            except Exception as e:
+                logger.warning(f"Skipping {track.query!r} in guild {self.guild.id}: {e}")
+                continue
+            
+            if not self.voice_client:
+                self.queue.clear()
+                continue
+            
+            def after(error):
+                if error:
+                    logger.error(f"Player error in guild {self.guild.id}: {error}")
+                loop.call_soon_threadsafe(self._track_done.set)
+            
+            self._track_done.clear()
+            self.current = track
+            try:
+                self.source = self.create_source(track)
+                self._source_volume = self.volume
+                self._started_at = time.monotonic()
+                self._paused_at = None
+                self._offset = 0.0
+                self.voice_client.play(self.source, after=after)
+            except (discord.ClientException, OSError) as e:
+                # e.g. ffmpeg missing or the voice connection dropped; keep the loop alive
+                logger.error(f"Could not play {track.query!r} in guild {self.guild.id}: {e}")
+                if self.source:
+                    self.source.cleanup()
+                self.current = None
+                self.source = None
+                self._started_at = None
+                continue
+            self.prefetch_next()
+            await self._track_done.wait()
+            
+            self.current = None
+            self.source = None
+            self._started_at = None
+    
+    async def stop(self):
+        """Clear the queue, stop playback and disconnect"""
+        self.queue.clear()
+        self.playlists.clear()
+        self._task.cancel()
+        if self._prefetch:
+            self._prefetch.cancel()
+        if self._refill:
+            self._refill.cancel()
+        if self.voice_client:
+            await self.voice_client.disconnect()
@@ -0,0 +1,88 @@
+import time
+from collections import OrderedDict
+
+class TokenBuckets:
+    """One token bucket per key, with a fixed cap on the number of keys
+
+    A bucket holds up to capacity tokens and refills at rate tokens per
+    second; each hit spends one. Only (tokens, timestamp) is stored per
+    key. Keys are kept in least-recently-hit order and the oldest are
+    dropped past max_keys. Dropping a bucket that is still refilling (more
+    likely with slow per-key rates) forgives the rest of its wait, so
+    max_keys should comfortably exceed the keys active within the slowest
+    refill period.
+    """
+
+    def __init__(self, rate, capacity, max_keys):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> (tokens, last hit)
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def hit(self, key, now=None, rate=None):
+        """Spend a token; returns 0.0 if allowed, else seconds until one is available
+
+        rate overrides the refill rate for this key, e.g. a per-guild setting.
+        """
+        now = time.monotonic() if now is None else now
+        rate = rate or self.rate
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            tokens = self.capacity
+        else:
+            tokens = min(self.capacity, bucket[0] + (now - bucket[1]) * rate)
+            self._buckets.move_to_end(key)
+
+        if tokens >= 1:
+            self._buckets[key] = (tokens - 1, now)
+            retry_after = 0.0
+        else:
+            self._buckets[key] = (tokens, now)
+            retry_after = (1 - tokens) / rate
+
+        if bucket is None and len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+    def reset(self, key):
+        self._buckets.pop(key, None)
+
+class SlidingWindows:
+    """Detects limit events within window seconds, per key, in fixed memory
+
+    Each key keeps a ring buffer of its last limit event times. After an
+    event is written, the next slot holds the oldest of those times, so
+    the window is full exactly when that time is still inside it. Keys
+    are evicted least recently used first past max_keys.
+    """
+
+    def __init__(self, limit, window, max_keys):
+        self.limit = limit
+        self.window = window
+        self.max_keys = max_keys
+        self._rings = OrderedDict()  # key -> [next slot, time, time, ...]
+
+    def __len__(self):
+        return len(self._rings)
+
+    def hit(self, key, now=None):
+        """Record an event; True if it is the limit-th within the window"""
+        now = time.monotonic() if now is None else now
+        ring = self._rings.get(key)
+        if ring is None:
+            ring = self._rings[key] = [0] + [float('-inf')] * self.limit
+            if len(self._rings) > self.max_keys:
+                self._rings.popitem(last=False)
+        else:
+            self._rings.move_to_end(key)
+
+        slot = ring[0]
+        ring[slot + 1] = now
+        slot = ring[0] = (slot + 1) % self.limit
+        return ring[slot + 1] > now - self.window
+
+    def reset(self, key):
+        self._rings.pop(key, None)
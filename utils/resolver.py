@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import parse_qs, urlparse
+from config import RESOLVER_CONFIG, TRACK_CACHE_CONFIG, YTDL_OPTS
+from utils.track_cache import TrackCache, normalize_query
+
+logger = logging.getLogger(__name__)
+
+# Only these fields leave the worker; full yt-dlp info dicts run to hundreds of KB
+TRACK_FIELDS = (
+    'id', 'title', 'url', 'webpage_url', 'duration', 'thumbnail',
+    'acodec', 'ext', 'abr', 'asr', 'http_headers'
+)
+
+def extract_info(query):
+    """Resolve a URL or search query to a single track's yt-dlp info"""
+    import yt_dlp
+    
+    with yt_dlp.YoutubeDL(YTDL_OPTS) as ydl:
+        info = ydl.extract_info(query, download=False)
+    if 'entries' in info:
+        # Searches come back as a one-entry playlist
+        entries = [entry for entry in info['entries'] if entry]
+        if not entries:
+            raise ValueError(f"No results for {query!r}")
+        info = entries[0]
+    return {field: info.get(field) for field in TRACK_FIELDS}
+
+def extract_playlist_page(url, start, end):
+    """Enumerate entries start..end (1-based, inclusive) of a playlist without resolving them"""
+    import yt_dlp
+    
+    options = dict(YTDL_OPTS, noplaylist=False, extract_flat='in_playlist', playliststart=start, playlistend=end)
+    with yt_dlp.YoutubeDL(options) as ydl:
+        info = ydl.extract_info(url, download=False)
+    
+    raw_entries = list(info.get('entries') or [])
+    entries = [
+        {
+            'url': entry.get('url') or entry.get('webpage_url'),
+            'title': entry.get('title'),
+            'duration': entry.get('duration')
+        }
+        for entry in raw_entries
+        if entry and (entry.get('url') or entry.get('webpage_url'))
+    ]
+    # `count` is the raw page size so callers can tell the last page from gaps
+    return {'title': info.get('title'), 'entries': entries, 'count': len(raw_entries)}
+
+def is_playlist_url(query):
+    """Check whether a query is a playlist link rather than a single track"""
+    parsed = urlparse(query.strip())
+    if parsed.scheme not in ('http', 'https'):
+        return False
+    params = parse_qs(parsed.query)
+    return 'list' in params and (parsed.path.rstrip('/').endswith('/playlist') or 'v' not in params)
+
+def _warm_worker():
+    """Import yt-dlp once per worker so the first extraction does not pay for it"""
+    try:
+        import yt_dlp  # noqa: F401
+    except ImportError:
+        pass
+
+class ResolverTimeout(Exception):
+    """Raised when an extraction does not finish within the timeout"""
+
+class TrackResolver:
+    """Awaitable track resolution backed by a bounded process pool
+    
+    yt-dlp extraction is CPU-heavy Python that holds the GIL, so it runs in
+    worker processes rather than threads. At most `workers` extractions run
+    at once; further requests wait their turn without queueing inside the
+    pool, so a cancelled request that has not started costs nothing. A
+    request that exceeds its timeout recycles the pool, terminating the
+    worker that is stuck on it; other requests that were running in that
+    pool are retried once on the new one.
+    
+    Results are kept in a TrackCache shared by every guild, identical
+    concurrent requests share one extraction, and entries close to their
+    stream URL's expiry are served while being refreshed in the background.
+    """
+    
+    def __init__(self, extractor=extract_info, workers=None, timeout=None, cache=None,
+                 playlist_extractor=extract_playlist_page):
+        self.extractor = extractor
+        self.playlist_extractor = playlist_extractor
+        self.workers = workers or RESOLVER_CONFIG['workers']
+        self.timeout = timeout or RESOLVER_CONFIG['timeout']
+        self.cache = cache or TrackCache(
+            TRACK_CACHE_CONFIG['max_entries'],
+            TRACK_CACHE_CONFIG['default_ttl'],
+            TRACK_CACHE_CONFIG['refresh_margin']
+        )
+        self._inflight = {}  # cache key -> future shared by identical requests
+        self.extractions = 0
+        self._slots = asyncio.Semaphore(self.workers)
+        self._pool = self._create_pool()
+    
+    def _create_pool(self):
+        # Spawned workers avoid inheriting the bot's threads and sockets via fork
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_warm_worker
+        )
+    
+    def _recycle_pool(self):
+        """Replace the pool, killing workers stuck on timed out extractions"""
+        old_pool, self._pool = self._pool, self._create_pool()
+        processes = list(getattr(old_pool, '_processes', {}).values())
+        # Extractions still running there fail with BrokenProcessPool and are retried by _run
+        old_pool.shutdown(wait=False)
+        for process in processes:
+            process.terminate()
+    
+    async def resolve(self, query, timeout=None):
+        """Resolve query to track info, serving repeat requests from the cache"""
+        key = normalize_query(query)
+        cached = self.cache.get(key)
+        if cached:
+            info, needs_refresh = cached
+            if needs_refresh and key not in self._inflight:
+                self._start_extraction(key, query, timeout).add_done_callback(self._consume_refresh)
+            return info
+        
+        future = self._inflight.get(key) or self._start_extraction(key, query, timeout)
+        return await asyncio.shield(future)
+    
+    def _start_extraction(self, key, query, timeout):
+        """Extract in the background, caching the result and sharing it with duplicates"""
+        future = asyncio.ensure_future(self._run(self.extractor, query, timeout=timeout))
+        self._inflight[key] = future
+        self.extractions += 1
+        
+        def done(future):
+            self._inflight.pop(key, None)
+            if not future.cancelled() and not future.exception():
+                info = future.result()
+                self.cache.put(key, info)
+                if info.get('webpage_url'):
+                    # Let later requests by URL hit results found by search
+                    self.cache.put(normalize_query(info['webpage_url']), info)
+        
+        future.add_done_callback(done)
+        return future
+    
+    @staticmethod
+    def _consume_refresh(future):
+        if not future.cancelled() and future.exception():
+            logger.warning(f"Background revalidation failed: {future.exception()}")
+    
+    def stats(self):
+        """Cache hit/miss counters and the number of extractions actually run"""
+        return dict(self.cache.stats(), extractions=self.extractions)
+    
+    async def playlist_page(self, url, start, end, timeout=None):
+        """Flat-enumerate one page of a playlist in the pool"""
+        return await self._run(self.playlist_extractor, url, start, end, timeout=timeout)
+    
+    async def _run(self, function, query, *args, timeout=None):
+        """Run an extraction in the pool, raising ResolverTimeout if it takes too long"""
+        loop = asyncio.get_running_loop()
+        async with self._slots:
+            retried = False
+            while True:
+                pool = self._pool
+                future = loop.run_in_executor(pool, function, query, *args)
+                try:
+                    return await asyncio.wait_for(future, timeout or self.timeout)
+                except asyncio.TimeoutError:
+                    logger.warning(f"Extraction timed out for {query!r}; recycling resolver pool")
+                    if pool is self._pool:
+                        self._recycle_pool()
+                    raise ResolverTimeout(f"Timed out resolving {query!r}") from None
+                except BrokenProcessPool:
+                    if pool is self._pool:
+                        # A worker died under this extraction itself; don't leave the pool broken
+                        logger.warning(f"Resolver worker crashed on {query!r}; recycling resolver pool")
+                        self._recycle_pool()
+                        raise
+                    if retried:
+                        raise
+                    # Another request's timeout recycled the pool under this one
+                    logger.info(f"Retrying {query!r} on the recycled resolver pool")
+                    retried = True
+    
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
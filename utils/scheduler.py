@@ -0,0 +1,185 @@
+import asyncio
+import heapq
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+class TimerScheduler:
+    """Fires persisted timed actions (unmutes, expiring global mutes, ...)
+    
+    Timers are stored through the database so they survive restarts. A
+    single task sleeps until the earliest deadline in an in-memory heap,
+    and every timer already due when it wakes (including everything that
+    expired while the bot was offline) is handled as one concurrent batch.
+    
+    In cluster mode owns(timer) limits loading to this process's guilds.
+    Timers without a guild are loaded by every cluster and claimed by
+    deleting them before they run, so exactly one cluster handles each.
+    
+    A timer is only deleted once its handler succeeds. Failures are logged
+    and retried after RETRY_DELAY seconds, doubling up to MAX_RETRY_DELAY,
+    and dropped after MAX_ATTEMPTS.
+    """
+    
+    RETRY_DELAY = 30
+    MAX_RETRY_DELAY = 3600
+    MAX_ATTEMPTS = 8
+    
+    def __init__(self, db, owns=None):
+        self.db = db
+        self.owns = owns
+        self._handlers = {}
+        self._orphans = {}  # action -> timers that fired before a handler was registered
+        self._timers = {}  # timer id -> timer record
+        self._heap = []    # (expires_at, timer id); cancelled entries are skipped lazily
+        self._wakeup = asyncio.Event()
+        self._task = None
+    
+    def register(self, action, handler):
+        """Route timers of an action to handler(timer)"""
+        self._handlers[action] = handler
+        for timer in self._orphans.pop(action, []):
+            self._push(timer)
+            self._wakeup.set()
+    
+    def unregister(self, action):
+        self._handlers.pop(action, None)
+    
+    @property
+    def pending(self):
+        """Number of timers waiting to fire"""
+        return len(self._timers)
+    
+    async def start(self):
+        """Load persisted timers and begin firing them"""
+        if self._task:
+            return
+        for timer in await self.db.get_timers():
+            if self.owns is None or self.owns(timer):
+                self._push(timer)
+        self._task = asyncio.create_task(self._run())
+    
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+    
+    def _push(self, timer):
+        self._timers[timer['id']] = timer
+        heapq.heappush(self._heap, (timer['expires_at'], timer['id']))
+    
+    async def schedule(self, action, guild_id, user_id, delay, data=None):
+        """Persist a timer firing in delay seconds and return its ID"""
+        expires_at = time.time() + delay
+        timer_id = await self.db.add_timer(action, guild_id, user_id, expires_at, data)
+        self._push({
+            'id': timer_id,
+            'action': action,
+            'guild_id': guild_id,
+            'user_id': user_id,
+            'expires_at': expires_at,
+            'data': data or {}
+        })
+        if self._heap[0][1] == timer_id:
+            self._wakeup.set()
+        return timer_id
+    
+    def find(self, action, guild_id, user_id):
+        """Pending timers of an action for a user, as loaded by this process"""
+        return [
+            timer for timer in self._timers.values()
+            if timer['action'] == action and timer['guild_id'] == guild_id and timer['user_id'] == user_id
+        ]
+    
+    async def cancel(self, action, guild_id, user_id):
+        """Drop every pending timer of an action for a user"""
+        for timer_id in await self.db.remove_timers(action, guild_id, user_id):
+            self._timers.pop(timer_id, None)
+    
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            while self._heap and self._heap[0][1] not in self._timers:
+                heapq.heappop(self._heap)
+            
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+            
+            delay = self._heap[0][0] - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            
+            due = []
+            now = time.time()
+            while self._heap and self._heap[0][0] <= now:
+                _, timer_id = heapq.heappop(self._heap)
+                timer = self._timers.pop(timer_id, None)
+                if timer:
+                    due.append(timer)
+            # _fire handles its own errors; this only keeps a bug there from killing the loop
+            results = await asyncio.gather(*(self._fire(timer) for timer in due), return_exceptions=True)
+            for timer, result in zip(due, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Timer {timer['id']} ({timer['action']}) crashed the scheduler", exc_info=result)
+    
+    async def _fire(self, timer):
+        handler = self._handlers.get(timer['action'])
+        if not handler:
+            # Keep it persisted and retry once a cog registers the action again
+            logger.warning(f"No handler registered for timer action {timer['action']!r}")
+            self._orphans.setdefault(timer['action'], []).append(timer)
+            return
+        
+        claimed = self.owns is not None and timer['guild_id'] is None
+        try:
+            if claimed and not await self.db.remove_timer(timer['id']):
+                return  # Another cluster got to it first
+        except Exception:
+            logger.exception(f"Could not claim timer {timer['id']} ({timer['action']})")
+            await self._retry(timer, persisted=True)
+            return
+        
+        try:
+            await handler(timer)
+        except Exception:
+            logger.exception(f"Timer {timer['id']} ({timer['action']}) failed")
+            await self._retry(timer, persisted=not claimed)
+            return
+        
+        if not claimed:
+            try:
+                await self.db.remove_timer(timer['id'])
+            except Exception:
+                # It stays persisted and fires again after a restart; handlers are idempotent
+                logger.exception(f"Could not delete finished timer {timer['id']} ({timer['action']})")
+    
+    async def _retry(self, timer, persisted):
+        """Run a failed timer again later, backing off, until MAX_ATTEMPTS"""
+        attempts = timer.get('attempts', 0) + 1
+        if attempts >= self.MAX_ATTEMPTS:
+            logger.error(f"Giving up on timer {timer['id']} ({timer['action']}) after {attempts} attempts")
+            if persisted:
+                try:
+                    await self.db.remove_timer(timer['id'])
+                except Exception:
+                    logger.exception(f"Could not delete abandoned timer {timer['id']}")
+            return
+        
+        timer = dict(timer, attempts=attempts)
+        timer['expires_at'] = time.time() + min(self.RETRY_DELAY * 2 ** (attempts - 1), self.MAX_RETRY_DELAY)
+        if not persisted:
+            # A claimed timer was already deleted; store it again so a restart keeps it
+            try:
+                timer['id'] = await self.db.add_timer(
+                    timer['action'], timer['guild_id'], timer['user_id'], timer['expires_at'], timer['data']
+                )
+            except Exception:
+                logger.exception(f"Could not re-store timer {timer['id']} ({timer['action']})")
+        self._push(timer)
+        self._wakeup.set()
@@ -0,0 +1,16 @@
+from utils.storage.base import StorageBackend
+from utils.storage.json_backend import JSONBackend
+from utils.storage.sqlite_backend import SQLiteBackend
+
+BACKENDS = {
+    'json': JSONBackend,
+    'sqlite': SQLiteBackend
+}
+
+def create_backend(name):
+    """Instantiate the storage backend registered under name"""
+    try:
+        backend_class = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown storage backend: {name}") from None
+    return backend_class()
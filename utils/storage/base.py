@@ -0,0 +1,89 @@
+from concurrent.futures import Future
+
+class StorageBackend:
+    """Interface every storage engine behind Database implements"""
+    
+    def commit_future(self):
+        """Return a future resolved once every change made so far is durable"""
+        future = Future()
+        future.set_result(None)
+        return future
+    
+    def flush(self):
+        """Persist any buffered changes"""
+    
+    def close(self):
+        """Release resources held by the backend"""
+        self.flush()
+    
+    # Global Bans
+    def add_global_ban(self, user_id, reason, moderator_id, user_name=None):
+        raise NotImplementedError
+    
+    def remove_global_ban(self, user_id):
+        raise NotImplementedError
+    
+    def is_globally_banned(self, user_id):
+        raise NotImplementedError
+    
+    def get_global_bans(self):
+        raise NotImplementedError
+    
+    def count_global_bans(self):
+        raise NotImplementedError
+    
+    def get_global_bans_page(self, offset, limit):
+        raise NotImplementedError
+    
+    # Global Mutes
+    def add_global_mute(self, user_id, reason, moderator_id, duration=None):
+        raise NotImplementedError
+    
+    def remove_global_mute(self, user_id):
+        raise NotImplementedError
+    
+    def get_global_mutes(self):
+        raise NotImplementedError
+    
+    # Timers
+    def add_timer(self, action, guild_id, user_id, expires_at, data=None):
+        raise NotImplementedError
+    
+    def remove_timer(self, timer_id):
+        raise NotImplementedError
+    
+    def remove_timers(self, action, guild_id, user_id):
+        raise NotImplementedError
+    
+    def get_timers(self):
+        raise NotImplementedError
+    
+    # Warnings
+    def add_warning(self, guild_id, user_id, moderator_id, reason):
+        raise NotImplementedError
+    
+    def get_warnings(self, guild_id, user_id):
+        raise NotImplementedError
+    
+    def remove_warning(self, guild_id, user_id, warning_id):
+        raise NotImplementedError
+    
+    def clear_warnings(self, guild_id, user_id):
+        raise NotImplementedError
+    
+    # Moderation Logs
+    def log_moderation_action(self, guild_id, target_id, moderator_id, action, reason):
+        raise NotImplementedError
+    
+    def get_moderation_logs(self, guild_id, limit=50):
+        raise NotImplementedError
+    
+    # Server Settings
+    def get_server_settings(self, guild_id):
+        raise NotImplementedError
+    
+    def update_server_settings(self, guild_id, settings):
+        raise NotImplementedError
+    
+    def update_server_setting(self, guild_id, key, update):
+        raise NotImplementedError
@@ -0,0 +1,38 @@
+import os
+import tempfile
+
+def fsync_directory(directory):
+    """Persist a directory entry change such as a rename"""
+    try:
+        fd = os.open(directory or '.', os.O_RDONLY)
+    except OSError:
+        return  # Directories cannot be opened on every platform (e.g. Windows)
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def atomic_write(path, payload):
+    """Replace path with payload so readers only ever see the old or new file
+    
+    The data is written to a temporary file in the same directory, fsynced
+    and renamed over the target, so a crash mid-write leaves the previous
+    version intact instead of a truncated file.
+    """
+    directory = os.path.dirname(path) or '.'
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+    fsync_directory(directory)
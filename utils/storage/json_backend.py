@@ -0,0 +1,487 @@
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+from config import DATABASE_CONFIG
+from utils.storage.base import StorageBackend
+from utils.storage.files import atomic_write
+from utils.storage.segmented_log import SegmentedLog
+
+logger = logging.getLogger(__name__)
+
+class JSONBackend(StorageBackend):
+    """Flat JSON files kept resident in memory with write-back flushing"""
+    
+    def __init__(self, flush_delay=None, max_staleness=None, group_commit=None, commit_window=None):
+        self.global_bans_file = 'data/global_bans.json'
+        self.server_settings_file = 'data/server_settings.json'
+        self.warnings_file = 'data/warnings.json'
+        self.warning_counters_file = 'data/warning_counters.json'
+        self.moderation_logs_file = 'data/moderation_logs.json'
+        self.global_mutes_file = 'data/global_mutes.json'
+        self.timers_file = 'data/timers.json'
+        self.moderation_logs = SegmentedLog(
+            DATABASE_CONFIG['moderation_log_dir'], DATABASE_CONFIG['log_segment_size']
+        )
+        
+        # Write-back cache: every store stays resident after its first load
+        # and dirty stores are flushed by a background thread once writes
+        # go quiet for flush_delay seconds, but never later than
+        # max_staleness seconds after the first unflushed change.
+        #
+        # With group commit enabled the flusher instead commits every
+        # commit_window seconds after the first change, and callers can wait
+        # on commit_future() until their change is fsynced; everything that
+        # arrived within the window shares one round of fsyncs. Without it
+        # commit_future() is already resolved: callers are served from
+        # memory and never wait out the flush delay.
+        self.flush_delay = DATABASE_CONFIG['flush_delay'] if flush_delay is None else flush_delay
+        self.max_staleness = DATABASE_CONFIG['max_staleness'] if max_staleness is None else max_staleness
+        self.group_commit = DATABASE_CONFIG['group_commit'] if group_commit is None else group_commit
+        self.commit_window = DATABASE_CONFIG['commit_window'] if commit_window is None else commit_window
+        self.commits = 0
+        self._stores = {}
+        self._dirty = set()
+        self._logs_dirty = False
+        self._dirty_since = None
+        self._deadline = None
+        self._batch = None
+        self._inflight = None
+        self._closed = False
+        self._lock = threading.RLock()
+        self._wakeup = threading.Condition(self._lock)
+        self._flush_lock = threading.Lock()
+        
+        # Initialize files if they don't exist
+        self._init_file(self.global_bans_file, {})
+        self._init_file(self.server_settings_file, {})
+        self._init_file(self.warnings_file, {})
+        self._init_file(self.global_mutes_file, {})
+        self._init_file(self.timers_file, {'next_id': 1, 'timers': {}})
+        self._init_file(self.warning_counters_file, {})
+        self._migrate_moderation_logs()
+        self._migrate_warning_counters()
+        
+        self._flusher = threading.Thread(target=self._flush_loop, name="database-flusher", daemon=True)
+        self._flusher.start()
+    
+    def _init_file(self, filename, default_data):
+        """Initialize a file with default data if it doesn't exist"""
+        if not os.path.exists(filename):
+            atomic_write(filename, json.dumps(default_data, indent=2))
+    
+    def _migrate_moderation_logs(self):
+        """Move entries from the legacy single-file log into segments"""
+        if not os.path.exists(self.moderation_logs_file):
+            return
+        
+        try:
+            with open(self.moderation_logs_file, 'r') as f:
+                legacy = json.load(f)
+        except json.JSONDecodeError:
+            legacy = {}
+        
+        for guild_key, entries in legacy.items():
+            for entry in entries:
+                self.moderation_logs.append(guild_key, entry)
+        self.moderation_logs.sync()
+        os.replace(self.moderation_logs_file, self.moderation_logs_file + '.migrated')
+    
+    def _migrate_warning_counters(self):
+        """Move counters older versions kept inside a guild's warnings dict"""
+        warnings = self._load_json(self.warnings_file)
+        counters = self._load_json(self.warning_counters_file)
+        moved = False
+        for guild_key, users in warnings.items():
+            last_id = users.pop('last_warning_id', None)
+            if last_id is not None:
+                counters[guild_key] = max(counters.get(guild_key, 0), last_id)
+                moved = True
+        if moved:
+            self._save_json(self.warning_counters_file, counters)
+            self._save_json(self.warnings_file, warnings)
+            self.flush()
+    
+    def _load_json(self, filename):
+        """Return the resident copy of a store, reading it from disk on first use"""
+        with self._lock:
+            if filename not in self._stores:
+                # A corrupt store raises instead of loading as empty: the next
+                # flush would otherwise overwrite the file and lose its data.
+                try:
+                    with open(filename, 'r') as f:
+                        self._stores[filename] = json.load(f)
+                except FileNotFoundError:
+                    self._stores[filename] = {}
+            return self._stores[filename]
+    
+    def _save_json(self, filename, data):
+        """Mark a store dirty and schedule a flush"""
+        with self._lock:
+            self._stores[filename] = data
+            self._dirty.add(filename)
+            self._schedule_flush()
+    
+    def _schedule_flush(self):
+        """Move the flusher's deadline to cover a new change (lock held)"""
+        now = time.monotonic()
+        if self._dirty_since is None:
+            self._dirty_since = now
+        if self.group_commit:
+            self._deadline = self._dirty_since + self.commit_window
+        else:
+            self._deadline = min(now + self.flush_delay, self._dirty_since + self.max_staleness)
+        if self.group_commit and self._batch is None:
+            self._batch = Future()
+        self._wakeup.notify()
+    
+    def _flush_loop(self):
+        """Background thread writing dirty stores once their deadline passes"""
+        with self._lock:
+            while not self._closed:
+                if self._deadline is None:
+                    self._wakeup.wait()
+                    continue
+                remaining = self._deadline - time.monotonic()
+                if remaining > 0:
+                    self._wakeup.wait(remaining)
+                    continue
+                self._lock.release()
+                try:
+                    self.flush()
+                except Exception:
+                    logger.exception("Failed to flush database stores")
+                finally:
+                    self._lock.acquire()
+    
+    def commit_future(self):
+        """Return a future resolved once every change made so far is on disk
+
+        Only group commit tracks durability; otherwise the future is already done.
+        """
+        with self._lock:
+            future = self._batch or self._inflight
+            if future is None:
+                future = Future()
+                future.set_result(None)
+            return future
+    
+    def flush(self):
+        """Write every dirty store to disk now as one commit"""
+        with self._flush_lock:
+            with self._lock:
+                pending = {
+                    filename: json.dumps(self._stores[filename], indent=2)
+                    for filename in self._dirty
+                }
+                logs_dirty = self._logs_dirty
+                batch = self._inflight = self._batch
+                self._dirty.clear()
+                self._logs_dirty = False
+                self._dirty_since = None
+                self._deadline = None
+                self._batch = None
+            
+            try:
+                for filename, payload in pending.items():
+                    atomic_write(filename, payload)
+                if logs_dirty:
+                    self.moderation_logs.sync()
+            except BaseException as e:
+                # Keep the changes dirty so the next commit retries them
+                with self._lock:
+                    self._dirty.update(pending)
+                    self._logs_dirty = self._logs_dirty or logs_dirty
+                    self._schedule_flush()
+                if batch is not None:
+                    batch.set_exception(e)
+                raise
+            finally:
+                with self._lock:
+                    self._inflight = None
+            
+            if pending or logs_dirty:
+                self.commits += 1
+            if batch is not None:
+                batch.set_result(None)
+    
+    def close(self):
+        """Stop the background flusher and persist any pending changes"""
+        with self._lock:
+            self._closed = True
+            self._wakeup.notify()
+        self._flusher.join()
+        self.flush()
+    
+    def export(self):
+        """Every stored record, for moving the data to another backend"""
+        with self._lock:
+            warnings = [
+                dict(warning, guild_id=int(guild_key), user_id=int(user_key))
+                for guild_key, users in self._load_json(self.warnings_file).items()
+                for user_key, user_warnings in users.items()
+                for warning in user_warnings
+            ]
+            return {
+                'global_bans': self.get_global_bans(),
+                'global_mutes': self.get_global_mutes(),
+                'timers': self.get_timers(),
+                'warnings': warnings,
+                'warning_counters': {
+                    int(guild_key): last_id
+                    for guild_key, last_id in self._load_json(self.warning_counters_file).items()
+                },
+                'server_settings': {
+                    int(guild_key): settings
+                    for guild_key, settings in self._load_json(self.server_settings_file).items()
+                },
+                'moderation_logs': [
+                    dict(entry, guild_id=int(guild_key))
+                    for guild_key in self.moderation_logs.guilds()
+                    for entry in self.moderation_logs.entries(guild_key)
+                ]
+            }
+    
+    # Global Bans
+    def add_global_ban(self, user_id, reason, moderator_id, user_name=None):
+        """Add a user to global ban list"""
+        with self._lock:
+            data = self._load_json(self.global_bans_file)
+            data.pop(str(user_id), None)  # A re-ban moves to the newest position
+            data[str(user_id)] = {
+                'user_id': user_id,
+                'user_name': user_name,
+                'reason': reason,
+                'moderator_id': moderator_id,
+                'timestamp': datetime.utcnow().isoformat()
+            }
+            self._save_json(self.global_bans_file, data)
+    
+    def remove_global_ban(self, user_id):
+        """Remove a user from global ban list"""
+        with self._lock:
+            data = self._load_json(self.global_bans_file)
+            if str(user_id) in data:
+                del data[str(user_id)]
+                self._save_json(self.global_bans_file, data)
+                return True
+            return False
+    
+    def is_globally_banned(self, user_id):
+        """Check if a user is globally banned"""
+        data = self._load_json(self.global_bans_file)
+        return str(user_id) in data
+    
+    def get_global_bans(self):
+        """Get all global bans"""
+        with self._lock:
+            data = self._load_json(self.global_bans_file)
+            return [dict(ban) for ban in data.values()]
+    
+    def count_global_bans(self):
+        with self._lock:
+            return len(self._load_json(self.global_bans_file))
+    
+    def get_global_bans_page(self, offset, limit):
+        with self._lock:
+            bans = list(self._load_json(self.global_bans_file).values())
+            newest_first = bans[::-1][offset:offset + limit]
+            return [dict(ban) for ban in newest_first]
+    
+    # Global Mutes
+    def add_global_mute(self, user_id, reason, moderator_id, duration=None):
+        """Add a user to global mute list"""
+        with self._lock:
+            data = self._load_json(self.global_mutes_file)
+            data[str(user_id)] = {
+                'user_id': user_id,
+                'reason': reason,
+                'moderator_id': moderator_id,
+                'timestamp': datetime.utcnow().isoformat(),
+                'expires_at': time.time() + duration if duration else None
+            }
+            self._save_json(self.global_mutes_file, data)
+    
+    def remove_global_mute(self, user_id):
+        """Remove a user from global mute list"""
+        with self._lock:
+            data = self._load_json(self.global_mutes_file)
+            if str(user_id) in data:
+                del data[str(user_id)]
+                self._save_json(self.global_mutes_file, data)
+                return True
+            return False
+    
+    def get_global_mutes(self):
+        """Get all global mutes"""
+        with self._lock:
+            data = self._load_json(self.global_mutes_file)
+            return [dict(mute) for mute in data.values()]
+    
+    # Timers
+    def add_timer(self, action, guild_id, user_id, expires_at, data=None):
+        """Persist a timed action and return its ID"""
+        with self._lock:
+            store = self._load_json(self.timers_file)
+            timer_id = store['next_id']
+            store['next_id'] = timer_id + 1
+            store['timers'][str(timer_id)] = {
+                'id': timer_id,
+                'action': action,
+                'guild_id': guild_id,
+                'user_id': user_id,
+                'expires_at': expires_at,
+                'data': data or {}
+            }
+            self._save_json(self.timers_file, store)
+            return timer_id
+    
+    def remove_timer(self, timer_id):
+        """Delete a timed action"""
+        with self._lock:
+            store = self._load_json(self.timers_file)
+            if store['timers'].pop(str(timer_id), None) is not None:
+                self._save_json(self.timers_file, store)
+                return True
+            return False
+    
+    def remove_timers(self, action, guild_id, user_id):
+        """Delete every timed action of a kind for a user and return their IDs"""
+        with self._lock:
+            store = self._load_json(self.timers_file)
+            removed = [
+                timer['id'] for timer in store['timers'].values()
+                if (timer['action'], timer['guild_id'], timer['user_id']) == (action, guild_id, user_id)
+            ]
+            for timer_id in removed:
+                del store['timers'][str(timer_id)]
+            if removed:
+                self._save_json(self.timers_file, store)
+            return removed
+    
+    def get_timers(self):
+        """Get every pending timed action"""
+        with self._lock:
+            store = self._load_json(self.timers_file)
+            return [dict(timer) for timer in store['timers'].values()]
+    
+    # Warnings
+    def add_warning(self, guild_id, user_id, moderator_id, reason):
+        """Add a warning to a user"""
+        with self._lock:
+            data = self._load_json(self.warnings_file)
+            guild_key = str(guild_id)
+            user_key = str(user_id)
+            
+            if guild_key not in data:
+                data[guild_key] = {}
+            if user_key not in data[guild_key]:
+                data[guild_key][user_key] = []
+            
+            # IDs come from a per-guild counter so deleting a warning never
+            # lets a later one reuse its ID
+            counters = self._load_json(self.warning_counters_file)
+            if guild_key not in counters:
+                counters[guild_key] = max(
+                    (warning['id'] for warnings in data[guild_key].values() for warning in warnings),
+                    default=0
+                )
+            counters[guild_key] += 1
+            warning_id = counters[guild_key]
+            self._save_json(self.warning_counters_file, counters)
+            warning = {
+                'id': warning_id,
+                'reason': reason,
+                'moderator_id': moderator_id,
+                'timestamp': datetime.utcnow().isoformat()
+            }
+            
+            data[guild_key][user_key].append(warning)
+            self._save_json(self.warnings_file, data)
+            return warning_id
+    
+    def get_warnings(self, guild_id, user_id):
+        """Get all warnings for a user in a guild"""
+        with self._lock:
+            data = self._load_json(self.warnings_file)
+            guild_key = str(guild_id)
+            user_key = str(user_id)
+            
+            if guild_key in data and user_key in data[guild_key]:
+                return [dict(warning) for warning in data[guild_key][user_key]]
+            return []
+    
+    def remove_warning(self, guild_id, user_id, warning_id):
+        """Delete one warning from a user"""
+        with self._lock:
+            data = self._load_json(self.warnings_file)
+            warnings = data.get(str(guild_id), {}).get(str(user_id), [])
+            for index, warning in enumerate(warnings):
+                if warning['id'] == warning_id:
+                    del warnings[index]
+                    self._save_json(self.warnings_file, data)
+                    return True
+            return False
+    
+    def clear_warnings(self, guild_id, user_id):
+        """Clear all warnings for a user"""
+        with self._lock:
+            data = self._load_json(self.warnings_file)
+            guild_key = str(guild_id)
+            user_key = str(user_id)
+            
+            if guild_key in data and user_key in data[guild_key]:
+                data[guild_key][user_key] = []
+                self._save_json(self.warnings_file, data)
+                return True
+            return False
+    
+    # Moderation Logs
+    def log_moderation_action(self, guild_id, target_id, moderator_id, action, reason):
+        """Log a moderation action"""
+        log_entry = {
+            'target_id': target_id,
+            'moderator_id': moderator_id,
+            'action': action,
+            'reason': reason,
+            'timestamp': datetime.utcnow().isoformat()
+        }
+        with self._lock:
+            self.moderation_logs.append(guild_id, log_entry)
+            self._logs_dirty = True
+            self._schedule_flush()
+    
+    def get_moderation_logs(self, guild_id, limit=50):
+        """Get recent moderation logs for a guild"""
+        return self.moderation_logs.tail(guild_id, limit)
+    
+    # Server Settings
+    def get_server_settings(self, guild_id):
+        """Get settings for a server"""
+        with self._lock:
+            data = self._load_json(self.server_settings_file)
+            return dict(data.get(str(guild_id), {}))
+    
+    def update_server_settings(self, guild_id, settings):
+        """Update settings for a server"""
+        with self._lock:
+            data = self._load_json(self.server_settings_file)
+            data[str(guild_id)] = settings
+            self._save_json(self.server_settings_file, data)
+    
+    def update_server_setting(self, guild_id, key, update):
+        """Replace one setting with update(current value) under the lock; None removes it"""
+        with self._lock:
+            data = self._load_json(self.server_settings_file)
+            settings = dict(data.get(str(guild_id), {}))
+            value = update(settings.get(key))
+            if value is None:
+                settings.pop(key, None)
+            else:
+                settings[key] = value
+            data[str(guild_id)] = settings
+            self._save_json(self.server_settings_file, data)
+            return value
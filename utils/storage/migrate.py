@@ -0,0 +1,73 @@
+"""Copy the JSON store into the SQLite database
+
+    python -m utils.storage.migrate
+
+Run once before switching DATABASE_CONFIG['backend'] to 'sqlite' (which
+multi-cluster launches require). Refuses to write into a database that
+already holds data.
+"""
+import json
+import logging
+import os
+import sys
+from config import DATABASE_CONFIG
+from utils.storage.json_backend import JSONBackend
+from utils.storage.sqlite_backend import SQLiteBackend
+
+logger = logging.getLogger(__name__)
+
+def json_store_has_data():
+    """Whether the JSON files hold records a new SQLite database would miss"""
+    for path in ('data/global_bans.json', 'data/global_mutes.json', 'data/warnings.json',
+                 'data/server_settings.json', 'data/timers.json'):
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if path.endswith('timers.json'):
+            data = data.get('timers')
+        if data:
+            return True
+    log_dir = DATABASE_CONFIG['moderation_log_dir']
+    return os.path.isdir(log_dir) and bool(os.listdir(log_dir))
+
+def needs_migration():
+    """SQLite is configured but its database was never filled from the JSON store"""
+    if DATABASE_CONFIG['backend'] != 'sqlite' or not json_store_has_data():
+        return False
+    if not os.path.exists(DATABASE_CONFIG['sqlite_path']):
+        return True
+    target = SQLiteBackend()
+    try:
+        return target.is_empty()
+    finally:
+        target.close()
+
+def migrate(source=None, target=None):
+    """Copy every record from source into an empty target and return the counts"""
+    source = source or JSONBackend()
+    target = target or SQLiteBackend()
+    try:
+        if not target.is_empty():
+            raise RuntimeError(f"{target.path} already holds data; not migrating into it")
+        data = source.export()
+        target.import_data(data)
+        return {table: len(records) for table, records in data.items()}
+    finally:
+        source.close()
+        target.close()
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    try:
+        counts = migrate()
+    except RuntimeError as e:
+        logger.error(str(e))
+        sys.exit(1)
+    for table, count in counts.items():
+        logger.info(f"{table}: {count}")
+    logger.info(f"Migrated to {DATABASE_CONFIG['sqlite_path']}; set DATABASE_CONFIG['backend'] = 'sqlite' to use it")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import json
+import os
+import threading
+from utils.storage.files import fsync_directory
+
+READ_BLOCK_SIZE = 8192
+
+class SegmentedLog:
+    """Append-only JSONL log split into per-guild, size-rotated segments
+    
+    Appends only ever touch the end of the newest segment, and reading the
+    last N entries walks backwards from the tail of that segment, so neither
+    cost grows with a guild's history.
+    """
+    
+    def __init__(self, directory, segment_size):
+        self.directory = directory
+        self.segment_size = segment_size
+        self._segments = {}  # guild key -> [newest segment index, its size in bytes]
+        self._unsynced = set()
+        self._unsynced_dirs = set()
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+    
+    def _guild_dir(self, guild_key):
+        return os.path.join(self.directory, guild_key)
+    
+    def _segment_path(self, guild_key, index):
+        return os.path.join(self._guild_dir(guild_key), f"{index:08d}.jsonl")
+    
+    def _segment_indexes(self, guild_key):
+        """List a guild's segment indexes, oldest first"""
+        try:
+            names = os.listdir(self._guild_dir(guild_key))
+        except FileNotFoundError:
+            return []
+        return sorted(int(name[:-6]) for name in names if name.endswith('.jsonl'))
+    
+    def _newest_segment(self, guild_key):
+        """Return the cached [index, size] of a guild's newest segment"""
+        if guild_key not in self._segments:
+            indexes = self._segment_indexes(guild_key)
+            if indexes:
+                index = indexes[-1]
+                size = os.path.getsize(self._segment_path(guild_key, index))
+            else:
+                os.makedirs(self._guild_dir(guild_key), exist_ok=True)
+                index, size = 0, 0
+            self._segments[guild_key] = [index, size]
+        return self._segments[guild_key]
+    
+    def append(self, guild_id, entry):
+        """Append one entry to the guild's newest segment, rotating when full"""
+        line = (json.dumps(entry) + '\n').encode('utf-8')
+        guild_key = str(guild_id)
+        
+        with self._lock:
+            segment = self._newest_segment(guild_key)
+            if segment[1] and segment[1] + len(line) > self.segment_size:
+                segment[0] += 1
+                segment[1] = 0
+            if not segment[1]:
+                self._unsynced_dirs.add(self._guild_dir(guild_key))
+            
+            path = self._segment_path(guild_key, segment[0])
+            with open(path, 'ab') as f:
+                f.write(line)
+            segment[1] += len(line)
+            self._unsynced.add(path)
+    
+    def sync(self):
+        """fsync every segment appended to since the last sync"""
+        with self._lock:
+            paths, self._unsynced = self._unsynced, set()
+            directories, self._unsynced_dirs = self._unsynced_dirs, set()
+        
+        for path in paths:
+            with open(path, 'ab') as f:
+                os.fsync(f.fileno())
+        for directory in directories:
+            fsync_directory(directory)
+    
+    def tail(self, guild_id, limit):
+        """Return the last limit entries for a guild, oldest first"""
+        guild_key = str(guild_id)
+        entries = []
+        
+        with self._lock:
+            indexes = self._segment_indexes(guild_key)
+        
+        for index in reversed(indexes):
+            remaining = limit - len(entries)
+            if remaining <= 0:
+                break
+            entries = self._read_tail(self._segment_path(guild_key, index), remaining) + entries
+        
+        return entries
+    
+    def guilds(self):
+        """Keys of every guild with a log"""
+        return [name for name in os.listdir(self.directory) if os.path.isdir(self._guild_dir(name))]
+    
+    def entries(self, guild_id):
+        """Every entry for a guild, oldest first"""
+        guild_key = str(guild_id)
+        for index in self._segment_indexes(guild_key):
+            with open(self._segment_path(guild_key, index), 'rb') as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Torn final write from a crash
+    
+    def _read_tail(self, path, limit):
+        """Read up to limit entries from the end of one segment file"""
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            return []
+        
+        with f:
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            buffer = b''
+            
+            # Read fixed-size blocks backwards until enough complete lines are buffered
+            while position > 0 and buffer.count(b'\n') <= limit:
+                step = min(READ_BLOCK_SIZE, position)
+                position -= step
+                f.seek(position)
+                buffer = f.read(step) + buffer
+        
+        lines = buffer.split(b'\n')
+        if position > 0:
+            # The first line is only partially buffered
+            lines = lines[1:]
+        
+        entries = []
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue  # Torn final write from a crash
+        return entries[-limit:]
@@ -0,0 +1,318 @@
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from config import DATABASE_CONFIG
+from utils.storage.base import StorageBackend
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS global_bans (
+    user_id INTEGER PRIMARY KEY,
+    user_name TEXT,
+    reason TEXT,
+    moderator_id INTEGER,
+    timestamp TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_global_bans_timestamp ON global_bans (timestamp);
+
+CREATE TABLE IF NOT EXISTS global_mutes (
+    user_id INTEGER PRIMARY KEY,
+    reason TEXT,
+    moderator_id INTEGER,
+    timestamp TEXT,
+    expires_at REAL
+);
+
+CREATE TABLE IF NOT EXISTS timers (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    action TEXT NOT NULL,
+    guild_id INTEGER,
+    user_id INTEGER,
+    expires_at REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_timers_expires ON timers (expires_at);
+CREATE INDEX IF NOT EXISTS idx_timers_target ON timers (action, guild_id, user_id);
+
+CREATE TABLE IF NOT EXISTS warnings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    warning_id INTEGER NOT NULL,
+    moderator_id INTEGER,
+    reason TEXT,
+    timestamp TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_warnings_member ON warnings (guild_id, user_id, timestamp);
+
+CREATE TABLE IF NOT EXISTS warning_counters (
+    guild_id INTEGER PRIMARY KEY,
+    last_id INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS moderation_logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    guild_id INTEGER NOT NULL,
+    target_id INTEGER,
+    moderator_id INTEGER,
+    action TEXT,
+    reason TEXT,
+    timestamp TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_moderation_logs_guild ON moderation_logs (guild_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_moderation_logs_target ON moderation_logs (guild_id, target_id);
+
+CREATE TABLE IF NOT EXISTS server_settings (
+    guild_id INTEGER PRIMARY KEY,
+    settings TEXT NOT NULL
+);
+"""
+
+class SQLiteBackend(StorageBackend):
+    """Indexed SQLite store running in WAL mode"""
+    
+    def __init__(self, path=None):
+        self.path = path or DATABASE_CONFIG['sqlite_path']
+        self._lock = threading.Lock()
+        # Cluster processes share the file, so wait out each other's write locks
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+        self._conn.commit()
+    
+    def _migrate(self):
+        """Add columns introduced after a database file was created"""
+        columns = {row['name'] for row in self._conn.execute("PRAGMA table_info(global_bans)")}
+        if 'user_name' not in columns:
+            self._conn.execute("ALTER TABLE global_bans ADD COLUMN user_name TEXT")
+    
+    def _execute(self, query, params=()):
+        """Run a single write statement in its own transaction"""
+        with self._lock, self._conn:
+            return self._conn.execute(query, params)
+    
+    def _fetchall(self, query, params=()):
+        """Run a read query and return all rows"""
+        with self._lock:
+            return self._conn.execute(query, params).fetchall()
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+    
+    def is_empty(self):
+        tables = ('global_bans', 'global_mutes', 'timers', 'warnings', 'moderation_logs', 'server_settings')
+        with self._lock:
+            return not any(
+                self._conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone() for table in tables
+            )
+    
+    def import_data(self, data):
+        """Load records exported by another backend in one transaction"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO global_bans (user_id, user_name, reason, moderator_id, timestamp) "
+                "VALUES (:user_id, :user_name, :reason, :moderator_id, :timestamp)",
+                [dict({'user_name': None}, **ban) for ban in data['global_bans']]
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO global_mutes (user_id, reason, moderator_id, timestamp, expires_at) "
+                "VALUES (:user_id, :reason, :moderator_id, :timestamp, :expires_at)",
+                [dict({'expires_at': None}, **mute) for mute in data['global_mutes']]
+            )
+            self._conn.executemany(
+                "INSERT INTO timers (action, guild_id, user_id, expires_at, data) VALUES (?, ?, ?, ?, ?)",
+                [(timer['action'], timer['guild_id'], timer['user_id'], timer['expires_at'], json.dumps(timer['data']))
+                 for timer in data['timers']]
+            )
+            self._conn.executemany(
+                "INSERT INTO warnings (guild_id, user_id, warning_id, moderator_id, reason, timestamp) "
+                "VALUES (:guild_id, :user_id, :id, :moderator_id, :reason, :timestamp)",
+                data['warnings']
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO warning_counters (guild_id, last_id) VALUES (?, ?)",
+                data['warning_counters'].items()
+            )
+            self._conn.executemany(
+                "INSERT INTO moderation_logs (guild_id, target_id, moderator_id, action, reason, timestamp) "
+                "VALUES (:guild_id, :target_id, :moderator_id, :action, :reason, :timestamp)",
+                data['moderation_logs']
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO server_settings (guild_id, settings) VALUES (?, ?)",
+                [(guild_id, json.dumps(settings)) for guild_id, settings in data['server_settings'].items()]
+            )
+    
+    # Global Bans
+    def add_global_ban(self, user_id, reason, moderator_id, user_name=None):
+        self._execute(
+            "INSERT OR REPLACE INTO global_bans (user_id, user_name, reason, moderator_id, timestamp) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (user_id, user_name, reason, moderator_id, datetime.utcnow().isoformat())
+        )
+    
+    def remove_global_ban(self, user_id):
+        cursor = self._execute("DELETE FROM global_bans WHERE user_id = ?", (user_id,))
+        return cursor.rowcount > 0
+    
+    def is_globally_banned(self, user_id):
+        rows = self._fetchall("SELECT 1 FROM global_bans WHERE user_id = ?", (user_id,))
+        return bool(rows)
+    
+    def get_global_bans(self):
+        rows = self._fetchall(
+            "SELECT user_id, user_name, reason, moderator_id, timestamp FROM global_bans ORDER BY timestamp"
+        )
+        return [dict(row) for row in rows]
+    
+    def count_global_bans(self):
+        return self._fetchall("SELECT COUNT(*) AS count FROM global_bans")[0]['count']
+    
+    def get_global_bans_page(self, offset, limit):
+        rows = self._fetchall(
+            "SELECT user_id, user_name, reason, moderator_id, timestamp FROM global_bans "
+            "ORDER BY timestamp DESC LIMIT ? OFFSET ?",
+            (limit, offset)
+        )
+        return [dict(row) for row in rows]
+    
+    # Global Mutes
+    def add_global_mute(self, user_id, reason, moderator_id, duration=None):
+        self._execute(
+            "INSERT OR REPLACE INTO global_mutes (user_id, reason, moderator_id, timestamp, expires_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (user_id, reason, moderator_id, datetime.utcnow().isoformat(),
+             time.time() + duration if duration else None)
+        )
+    
+    def remove_global_mute(self, user_id):
+        cursor = self._execute("DELETE FROM global_mutes WHERE user_id = ?", (user_id,))
+        return cursor.rowcount > 0
+    
+    def get_global_mutes(self):
+        rows = self._fetchall(
+            "SELECT user_id, reason, moderator_id, timestamp, expires_at FROM global_mutes ORDER BY timestamp"
+        )
+        return [dict(row) for row in rows]
+    
+    # Timers
+    def add_timer(self, action, guild_id, user_id, expires_at, data=None):
+        cursor = self._execute(
+            "INSERT INTO timers (action, guild_id, user_id, expires_at, data) VALUES (?, ?, ?, ?, ?)",
+            (action, guild_id, user_id, expires_at, json.dumps(data or {}))
+        )
+        return cursor.lastrowid
+    
+    def remove_timer(self, timer_id):
+        cursor = self._execute("DELETE FROM timers WHERE id = ?", (timer_id,))
+        return cursor.rowcount > 0
+    
+    def remove_timers(self, action, guild_id, user_id):
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT id FROM timers WHERE action = ? AND guild_id IS ? AND user_id IS ?",
+                (action, guild_id, user_id)
+            ).fetchall()
+            removed = [row['id'] for row in rows]
+            self._conn.executemany("DELETE FROM timers WHERE id = ?", [(timer_id,) for timer_id in removed])
+        return removed
+    
+    def get_timers(self):
+        rows = self._fetchall(
+            "SELECT id, action, guild_id, user_id, expires_at, data FROM timers ORDER BY expires_at"
+        )
+        return [dict(row, data=json.loads(row['data'])) for row in rows]
+    
+    # Warnings
+    def add_warning(self, guild_id, user_id, moderator_id, reason):
+        with self._lock, self._conn:
+            # Guilds warned before the counter existed continue from their highest ID
+            self._conn.execute(
+                "INSERT OR IGNORE INTO warning_counters (guild_id, last_id) "
+                "SELECT ?, COALESCE(MAX(warning_id), 0) FROM warnings WHERE guild_id = ?",
+                (guild_id, guild_id)
+            )
+            self._conn.execute(
+                "UPDATE warning_counters SET last_id = last_id + 1 WHERE guild_id = ?", (guild_id,)
+            )
+            warning_id = self._conn.execute(
+                "SELECT last_id FROM warning_counters WHERE guild_id = ?", (guild_id,)
+            ).fetchone()[0]
+            self._conn.execute(
+                "INSERT INTO warnings (guild_id, user_id, warning_id, moderator_id, reason, timestamp) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (guild_id, user_id, warning_id, moderator_id, reason, datetime.utcnow().isoformat())
+            )
+        return warning_id
+    
+    def get_warnings(self, guild_id, user_id):
+        rows = self._fetchall(
+            "SELECT warning_id AS id, reason, moderator_id, timestamp FROM warnings "
+            "WHERE guild_id = ? AND user_id = ? ORDER BY warnings.id",
+            (guild_id, user_id)
+        )
+        return [dict(row) for row in rows]
+    
+    def remove_warning(self, guild_id, user_id, warning_id):
+        cursor = self._execute(
+            "DELETE FROM warnings WHERE guild_id = ? AND user_id = ? AND warning_id = ?",
+            (guild_id, user_id, warning_id)
+        )
+        return cursor.rowcount > 0
+    
+    def clear_warnings(self, guild_id, user_id):
+        cursor = self._execute(
+            "DELETE FROM warnings WHERE guild_id = ? AND user_id = ?", (guild_id, user_id)
+        )
+        return cursor.rowcount > 0
+    
+    # Moderation Logs
+    def log_moderation_action(self, guild_id, target_id, moderator_id, action, reason):
+        self._execute(
+            "INSERT INTO moderation_logs (guild_id, target_id, moderator_id, action, reason, timestamp) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (guild_id, target_id, moderator_id, action, reason, datetime.utcnow().isoformat())
+        )
+    
+    def get_moderation_logs(self, guild_id, limit=50):
+        rows = self._fetchall(
+            "SELECT target_id, moderator_id, action, reason, timestamp FROM moderation_logs "
+            "WHERE guild_id = ? ORDER BY timestamp DESC, id DESC LIMIT ?",
+            (guild_id, limit)
+        )
+        return [dict(row) for row in reversed(rows)]
+    
+    # Server Settings
+    def get_server_settings(self, guild_id):
+        rows = self._fetchall("SELECT settings FROM server_settings WHERE guild_id = ?", (guild_id,))
+        return json.loads(rows[0]['settings']) if rows else {}
+    
+    def update_server_settings(self, guild_id, settings):
+        self._execute(
+            "INSERT OR REPLACE INTO server_settings (guild_id, settings) VALUES (?, ?)",
+            (guild_id, json.dumps(settings))
+        )
+    
+    def update_server_setting(self, guild_id, key, update):
+        with self._lock, self._conn:
+            # Take the write lock before reading so other clusters can't interleave
+            self._conn.execute("BEGIN IMMEDIATE")
+            row = self._conn.execute(
+                "SELECT settings FROM server_settings WHERE guild_id = ?", (guild_id,)
+            ).fetchone()
+            settings = json.loads(row['settings']) if row else {}
+            value = update(settings.get(key))
+            if value is None:
+                settings.pop(key, None)
+            else:
+                settings[key] = value
+            self._conn.execute(
+                "INSERT OR REPLACE INTO server_settings (guild_id, settings) VALUES (?, ?)",
+                (guild_id, json.dumps(settings))
+            )
+            return value
@@ -0,0 +1,86 @@
+import re
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlparse
+
+YOUTUBE_HOSTS = {'youtube.com', 'www.youtube.com', 'm.youtube.com', 'music.youtube.com'}
+
+def normalize_query(query):
+    """Map equivalent URLs and searches to the same cache key"""
+    query = query.strip()
+    parsed = urlparse(query)
+    if parsed.scheme in ('http', 'https') and parsed.netloc:
+        host = parsed.netloc.lower()
+        if host in YOUTUBE_HOSTS and parsed.path == '/watch':
+            video_id = parse_qs(parsed.query).get('v', [None])[0]
+            if video_id:
+                return f"youtube:{video_id}"
+        if host == 'youtu.be' and parsed.path.strip('/'):
+            return f"youtube:{parsed.path.strip('/')}"
+        return f"{parsed.scheme}://{host}{parsed.path}" + (f"?{parsed.query}" if parsed.query else "")
+    return "search:" + re.sub(r'\s+', ' ', query.lower())
+
+def stream_expiry(info, default_ttl):
+    """Return when a resolved stream URL stops working (unix time)
+    
+    Signed stream URLs (e.g. googlevideo.com) carry their expiry in an
+    `expire` query parameter; other URLs get the default TTL.
+    """
+    url = info.get('url') or ''
+    expire = parse_qs(urlparse(url).query).get('expire', [None])[0]
+    if expire and expire.isdigit():
+        return int(expire)
+    return time.time() + default_ttl
+
+class TrackCache:
+    """LRU cache of resolved track info that honours stream URL expiry
+    
+    An entry is fresh until refresh_margin seconds before its stream URL
+    expires. After that it is still served, but the caller should
+    revalidate it in the background; once expired it counts as a miss.
+    """
+    
+    def __init__(self, max_entries, default_ttl, refresh_margin):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.refresh_margin = refresh_margin
+        self._entries = OrderedDict()  # key -> (info, expires_at)
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def get(self, key):
+        """Return (info, needs_refresh) for a usable entry, or None on a miss"""
+        entry = self._entries.get(key)
+        now = time.time()
+        if not entry or entry[1] <= now:
+            if entry:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        if entry[1] - self.refresh_margin <= now:
+            self.stale_hits += 1
+            return entry[0], True
+        self.hits += 1
+        return entry[0], False
+    
+    def put(self, key, info):
+        self._entries[key] = (info, stream_expiry(info, self.default_ttl))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def stats(self):
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits + self.stale_hits) / lookups if lookups else 0.0
+        }
@@ -0,0 +1,77 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+import discord
+from config import USER_CACHE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+class UserResolver:
+    """Turns user IDs into User objects with as few REST calls as possible
+
+    The gateway cache is checked first, then a TTL cache of users fetched
+    earlier (including IDs that turned out not to exist). Remaining misses
+    are fetched concurrently, at most `concurrency` at a time, and
+    concurrent lookups of the same ID share one request.
+    """
+
+    def __init__(self, bot, ttl=None, max_entries=None, concurrency=None):
+        self.bot = bot
+        self.ttl = ttl or USER_CACHE_CONFIG['ttl']
+        self.max_entries = max_entries or USER_CACHE_CONFIG['max_entries']
+        self._slots = asyncio.Semaphore(concurrency or USER_CACHE_CONFIG['concurrency'])
+        self._entries = OrderedDict()  # user id -> (user or None, expires_at)
+        self._inflight = {}
+        self.fetches = 0
+
+    def cached(self, user_id):
+        """Return (found, user) without touching the network"""
+        user = self.bot.get_user(user_id)
+        if user:
+            return True, user
+        entry = self._entries.get(user_id)
+        if entry and entry[1] > time.monotonic():
+            self._entries.move_to_end(user_id)
+            return True, entry[0]
+        return False, None
+
+    def _store(self, user_id, user):
+        self._entries[user_id] = (user, time.monotonic() + self.ttl)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def resolve(self, user_id):
+        """Return the User for an ID, or None if it doesn't exist"""
+        found, user = self.cached(user_id)
+        if found:
+            return user
+        if user_id not in self._inflight:
+            self._inflight[user_id] = asyncio.ensure_future(self._fetch(user_id))
+        return await asyncio.shield(self._inflight[user_id])
+
+    async def _fetch(self, user_id):
+        try:
+            async with self._slots:
+                self.fetches += 1
+                try:
+                    user = await self.bot.fetch_user(user_id)
+                except discord.NotFound:
+                    user = None
+            self._store(user_id, user)
+            return user
+        finally:
+            self._inflight.pop(user_id, None)
+
+    async def resolve_many(self, user_ids):
+        """Resolve several IDs concurrently; failures map to None"""
+        user_ids = list(dict.fromkeys(user_ids))
+        results = await asyncio.gather(*(self.resolve(user_id) for user_id in user_ids), return_exceptions=True)
+        users = {}
+        for user_id, result in zip(user_ids, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Could not fetch user {user_id}: {result}")
+                result = None
+            users[user_id] = result
+        return users
@@ -0,0 +1,112 @@
+import asyncio
+import logging
+import time
+from config import BOT_CONFIG, VOICE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+class SessionLimitReached(Exception):
+    """Raised when the process already holds max_sessions voice connections"""
+
+class VoiceSession:
+    """Bookkeeping for one guild's voice connection"""
+
+    def __init__(self, guild_id, channel_id):
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.connected_at = time.monotonic()
+        self.last_active = self.connected_at
+        self.active = False
+
+class VoiceSessionManager:
+    """Tracks voice sessions and reclaims the ones nobody is using
+
+    Every check_interval seconds each session is asked whether it is
+    active (playing to at least one listener). Sessions that have not been
+    active for timeout seconds are handed to on_expire to be torn down, so
+    idle and alone-in-channel connections don't hold a UDP socket and an
+    ffmpeg process forever. open() refuses new sessions past max_sessions.
+    """
+
+    def __init__(self, timeout=None, max_sessions=None, check_interval=None):
+        self.timeout = timeout or BOT_CONFIG['music_timeout']
+        self.max_sessions = max_sessions or VOICE_CONFIG['max_sessions']
+        self.check_interval = check_interval or VOICE_CONFIG['check_interval']
+        self.sessions = {}  # guild id -> VoiceSession
+        self.reclaimed = 0
+        self._task = None
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def __contains__(self, guild_id):
+        return guild_id in self.sessions
+
+    def open(self, guild_id, channel_id):
+        """Register a new connection, raising SessionLimitReached when full"""
+        session = self.sessions.get(guild_id)
+        if session:
+            session.channel_id = channel_id
+            self.touch(guild_id)
+            return session
+        if len(self.sessions) >= self.max_sessions:
+            raise SessionLimitReached()
+        session = VoiceSession(guild_id, channel_id)
+        self.sessions[guild_id] = session
+        return session
+
+    def close(self, guild_id):
+        return self.sessions.pop(guild_id, None)
+
+    def touch(self, guild_id):
+        """Mark a session as used just now"""
+        session = self.sessions.get(guild_id)
+        if session:
+            session.last_active = time.monotonic()
+
+    def expired(self, now=None):
+        """Guild IDs whose sessions have been inactive for longer than the timeout"""
+        now = now or time.monotonic()
+        return [
+            guild_id for guild_id, session in self.sessions.items()
+            if not session.active and now - session.last_active >= self.timeout
+        ]
+
+    def start(self, is_active, on_expire):
+        """Begin sweeping with is_active(guild_id) and async on_expire(guild_id)"""
+        if not self._task:
+            self._task = asyncio.create_task(self._run(is_active, on_expire))
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def sweep(self, is_active):
+        """Refresh activity flags and return the sessions to reclaim"""
+        for guild_id, session in self.sessions.items():
+            session.active = is_active(guild_id)
+            if session.active:
+                session.last_active = time.monotonic()
+        return self.expired()
+
+    async def _run(self, is_active, on_expire):
+        while True:
+            await asyncio.sleep(self.check_interval)
+            for guild_id in self.sweep(is_active):
+                self.close(guild_id)
+                self.reclaimed += 1
+                try:
+                    await on_expire(guild_id)
+                except Exception as e:
+                    logger.warning(f"Failed to reclaim voice session in guild {guild_id}: {e}")
+
+    def stats(self):
+        active = sum(1 for session in self.sessions.values() if session.active)
+        return {
+            'sessions': len(self.sessions),
+            'active': active,
+            'idle': len(self.sessions) - active,
+            'max_sessions': self.max_sessions,
+            'reclaimed': self.reclaimed
+        }